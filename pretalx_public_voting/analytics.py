@@ -0,0 +1,57 @@
+import datetime as dt
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour, TruncMinute
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+
+from .models import VoteEvent, VoteRollup
+
+ROLLUP_TRUNCATIONS = {VoteRollup.MINUTE: TruncMinute, VoteRollup.HOUR: TruncHour}
+ROLLUP_WINDOW = dt.timedelta(hours=2)
+
+
+def update_vote_rollups(since=None):
+    """Recounts all rollup buckets from ``since`` on (by default, the last
+    two full hours) from the vote event log. Recounting whole buckets instead
+    of adding to them means that this can safely run repeatedly."""
+    if since is None:
+        since = now() - ROLLUP_WINDOW
+    since = since.replace(minute=0, second=0, microsecond=0)
+    updated = 0
+    with scopes_disabled():
+        for resolution, truncate in ROLLUP_TRUNCATIONS.items():
+            buckets = (
+                VoteEvent.objects.filter(timestamp__gte=since)
+                .annotate(bucket=truncate("timestamp"))
+                .values("submission_id", "bucket")
+                .annotate(
+                    votes=Count("id"),
+                    new_votes=Count("id", filter=Q(old_score__isnull=True)),
+                    score_sum=Sum("new_score"),
+                )
+                .order_by()
+            )
+            rollups = VoteRollup.objects.bulk_create(
+                [VoteRollup(resolution=resolution, **bucket) for bucket in buckets],
+                update_conflicts=True,
+                unique_fields=("submission", "resolution", "bucket"),
+                update_fields=("votes", "new_votes", "score_sum"),
+            )
+            updated += len(rollups)
+    return updated
+
+
+def get_vote_activity(event, resolution=VoteRollup.HOUR, since=None):
+    """Returns the votes of all submissions of an event per bucket, oldest
+    bucket first."""
+    rollups = VoteRollup.objects.filter(submission__event=event, resolution=resolution)
+    if since:
+        rollups = rollups.filter(bucket__gte=since)
+    return list(
+        rollups.values("bucket")
+        .annotate(
+            votes=Sum("votes"), new_votes=Sum("new_votes"), score_sum=Sum("score_sum")
+        )
+        .order_by("bucket")
+    )
@@ -0,0 +1,208 @@
+import datetime as dt
+import itertools
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Min
+from django.utils.translation import gettext_lazy as _
+from django_scopes import scopes_disabled
+
+from .models import FlaggedVoter, PublicVote, VoteEvent
+from .timing import span
+
+LOAD_BATCH_SIZE = 10_000
+# Voters need this many votes before giving all of them the same score counts
+STRAIGHT_LINE_MIN_VOTES = 10
+# This many voters with exactly the same ballot form a co-voting cluster
+CLUSTER_MIN_SIZE = 5
+# New voters are counted per window of BURST_WINDOW seconds. A window is a
+# burst if it has at least BURST_MIN_VOTERS new voters, and at least
+# BURST_FACTOR times both the median of the BURST_NEIGHBOURS windows before
+# and after it and the mean of all windows, so that neither a sustained rush
+# nor voting that all happens within a short time counts as a burst.
+BURST_WINDOW = 300
+BURST_NEIGHBOURS = 12
+BURST_MIN_VOTERS = 20
+BURST_FACTOR = 5
+
+STRAIGHT_LINE = "straight_line"
+CLUSTER = "cluster"
+BURST = "burst"
+REASONS = {
+    STRAIGHT_LINE: _("Gave the same score to many submissions"),
+    CLUSTER: _("Cast exactly the same votes as several other voters"),
+    BURST: _("Started voting during a sudden burst of new voters"),
+}
+
+
+class Ballots:
+    """All votes of an event as a sparse voter × submission matrix in
+    coordinate form: vote ``i`` has the score ``scores[i]`` in row
+    ``voter[i]`` and column ``submission[i]``. Votes are sorted by voter and
+    time, and ``starts`` holds the index of the first vote of every voter.
+    ``first_vote_times`` holds the time every voter started voting."""
+
+    def __init__(self, email_hashes, submission_ids, scores, timestamps):
+        self.voters, voter = np.unique(email_hashes, return_inverse=True)
+        self.submissions, submission = np.unique(submission_ids, return_inverse=True)
+        order = np.lexsort((timestamps, voter))
+        self.voter = voter[order]
+        self.submission = submission[order]
+        self.scores = scores[order]
+        self.timestamps = timestamps[order]
+        self.starts = np.flatnonzero(np.diff(self.voter, prepend=-1))
+        self.counts = np.diff(np.append(self.starts, len(self.voter)))
+        self.first_vote_times = self.timestamps[self.starts]
+
+    def __len__(self):
+        return len(self.voter)
+
+    @classmethod
+    def load(cls, event):
+        votes = (
+            PublicVote.objects.filter(event=event)
+            .order_by()
+            .values_list("email_hash", "submission_id", "score", "timestamp")
+            .iterator(chunk_size=LOAD_BATCH_SIZE)
+        )
+        columns = ([], [], [], [])
+        # Convert in batches, so that we never hold a million vote tuples
+        while batch := list(itertools.islice(votes, LOAD_BATCH_SIZE)):
+            email_hashes, submission_ids, scores, timestamps = zip(*batch, strict=True)
+            columns[0].append(np.array(email_hashes, dtype="S32"))
+            columns[1].append(np.array(submission_ids, dtype=np.int64))
+            columns[2].append(np.array(scores, dtype=np.int64))
+            columns[3].append(
+                np.fromiter(
+                    (timestamp.timestamp() for timestamp in timestamps),
+                    dtype=np.float64,
+                    count=len(timestamps),
+                )
+            )
+        dtypes = ("S32", np.int64, np.int64, np.float64)
+        ballots = cls(
+            *(
+                np.concatenate(column) if column else np.empty(0, dtype=dtype)
+                for column, dtype in zip(columns, dtypes, strict=True)
+            )
+        )
+        # Votes only know when they were last changed, so voters start voting
+        # with their first logged vote. Votes from before the log, or
+        # imported ones, fall back to their own time.
+        started = dict(
+            VoteEvent.objects.filter(submission__event=event, old_score__isnull=True)
+            .order_by()
+            .values_list("email_hash")
+            .annotate(Min("timestamp"))
+        )
+        for index, email_hash in enumerate(ballots.voters):
+            if timestamp := started.get(email_hash.decode()):
+                ballots.first_vote_times[index] = timestamp.timestamp()
+        return ballots
+
+    def score_statistics(self):
+        """Returns the mean and the variance of every voter's scores."""
+        sums = np.bincount(self.voter, weights=self.scores)
+        squares = np.bincount(self.voter, weights=self.scores**2)
+        means = sums / self.counts
+        return means, np.maximum(squares / self.counts - means**2, 0)
+
+    def straight_lining(self, min_votes=STRAIGHT_LINE_MIN_VOTES):
+        lowest = np.minimum.reduceat(self.scores, self.starts)
+        highest = np.maximum.reduceat(self.scores, self.starts)
+        return (self.counts >= min_votes) & (lowest == highest)
+
+    def cluster_sizes(self):
+        """Returns the number of voters with exactly the same ballot as each
+        voter, including themselves."""
+        # Every (submission, score) pair gets a random 64 bit key, and the
+        # wrapping sum of its keys is a fingerprint of the whole ballot.
+        offsets = self.scores - self.scores.min()
+        pairs = self.submission * (offsets.max() + 1) + offsets
+        keys = np.random.default_rng(0).integers(
+            np.iinfo(np.uint64).max, size=pairs.max() + 1, dtype=np.uint64
+        )
+        fingerprints = np.add.reduceat(keys[pairs], self.starts)
+        _, cluster, sizes = np.unique(
+            fingerprints, return_inverse=True, return_counts=True
+        )
+        return sizes[cluster]
+
+    def first_votes(self):
+        return self.first_vote_times
+
+    def bursts(
+        self,
+        window=BURST_WINDOW,
+        neighbours=BURST_NEIGHBOURS,
+        min_voters=BURST_MIN_VOTERS,
+        factor=BURST_FACTOR,
+    ):
+        first_votes = self.first_votes()
+        windows = ((first_votes - first_votes.min()) // window).astype(np.int64)
+        new_voters = np.bincount(windows)
+        padded = np.pad(new_voters, neighbours)
+        baseline = np.median(
+            np.lib.stride_tricks.sliding_window_view(padded, 2 * neighbours + 1), axis=1
+        )
+        baseline = np.maximum(baseline, new_voters.mean())
+        is_burst = (new_voters >= min_voters) & (new_voters >= factor * baseline)
+        return is_burst[windows]
+
+
+def find_suspicious_voters(ballots):
+    """Returns a dict of the reasons and statistics of every suspicious
+    voter, by email hash."""
+    if not len(ballots):
+        return {}
+    means, variances = ballots.score_statistics()
+    cluster_sizes = ballots.cluster_sizes()
+    checks = {
+        STRAIGHT_LINE: ballots.straight_lining(),
+        CLUSTER: cluster_sizes >= CLUSTER_MIN_SIZE,
+        BURST: ballots.bursts(),
+    }
+    first_votes = ballots.first_votes()
+    return {
+        ballots.voters[voter].decode(): {
+            "reasons": [reason for reason, flags in checks.items() if flags[voter]],
+            "details": {
+                "votes": int(ballots.counts[voter]),
+                "mean": round(float(means[voter]), 2),
+                "variance": round(float(variances[voter]), 2),
+                "cluster_size": int(cluster_sizes[voter]),
+                "first_vote": dt.datetime.fromtimestamp(
+                    first_votes[voter], tz=dt.UTC
+                ).isoformat(),
+            },
+        }
+        for voter in np.flatnonzero(np.logical_or.reduce(list(checks.values())))
+    }
+
+
+def analyse_votes(event):
+    """Flags the suspicious voters of an event and returns their number.
+
+    Replaces the flags of earlier runs, but voters that organisers excluded
+    stay excluded."""
+    with span("anomalies.load", event), scopes_disabled():
+        ballots = Ballots.load(event)
+    with span("anomalies.analyse", event):
+        suspicious = find_suspicious_voters(ballots)
+    with transaction.atomic(), scopes_disabled():
+        FlaggedVoter.objects.filter(event=event, excluded=False).delete()
+        FlaggedVoter.objects.bulk_create(
+            [
+                FlaggedVoter(event=event, email_hash=email_hash, **flags)
+                for email_hash, flags in suspicious.items()
+            ],
+            batch_size=LOAD_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=("event", "email_hash"),
+            update_fields=("reasons", "details"),
+        )
+    return len(suspicious)
+
+
+def get_excluded_voters(event):
+    return FlaggedVoter.objects.filter(event=event, excluded=True).values("email_hash")
@@ -0,0 +1,53 @@
+from contextlib import ContextDecorator
+
+from django.db import connections
+
+
+class QueryBudgetExceededError(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Database execute wrapper that records all queries it sees."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+class query_budget(ContextDecorator):  # noqa: N801 -- used like a function
+    """Fails loudly when the wrapped code runs more than ``limit`` queries.
+
+    Can be used as a context manager or as a decorator. Budgets should not
+    depend on the amount of data, so a budget exceeded with a large event
+    usually means a query per row crept in."""
+
+    def __init__(self, limit, label=None, using="default"):
+        self.limit = limit
+        self.label = label
+        self.using = using
+        self.counter = None
+
+    def __enter__(self):
+        self.counter = QueryCounter()
+        self._wrapper = connections[self.using].execute_wrapper(self.counter)
+        self._wrapper.__enter__()
+        return self.counter
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.counter) > self.limit:
+            queries = "\n".join(
+                f"{index}. {sql}" for index, sql in enumerate(self.counter.queries, 1)
+            )
+            raise QueryBudgetExceededError(
+                f"{self.label or 'Code block'} ran {len(self.counter)} queries, "
+                f"but its budget is {self.limit}:\n{queries}"
+            )
+        return False
@@ -0,0 +1,72 @@
+import time
+
+from django.core.cache import cache as default_cache
+
+SUBMISSIONS_VERSION = "public_voting_submissions_version"
+SETTINGS_VERSION = "public_voting_settings_version"
+EVENT_VERSION = "public_voting_event_version"
+VOTER_VERSION_TIMEOUT = 7 * 24 * 3600
+# How long other requests wait for a value that one request is building
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT = 5
+BUILD_POLL_INTERVAL = 0.05
+MISSING = object()
+
+
+def voter_version_key(hashed_email):
+    return f"public_voting_voter_version_{hashed_email}"
+
+
+def voter_requests_key(hashed_email):
+    return f"public_voting_voter_requests_{hashed_email}"
+
+
+def is_voting_event(event):
+    return bool(event) and "pretalx_public_voting" in event.plugin_list
+
+
+def bump_version(event, key, timeout=None):
+    # Versions are timestamps, so that they can double as Last-Modified
+    # values. They only ever grow, so a lost or evicted version just
+    # results in a cache miss, never in stale content. This needs a cache
+    # that all processes share: with a per-process cache, the other
+    # processes never see the bump and keep serving stale content.
+    event.cache.set(key, time.time(), timeout)
+
+
+def get_versions(event, *keys):
+    cache = event.cache
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if versions.get(key) is None}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_or_build(key, build, timeout):
+    """Returns the cached value of ``key``, or builds and caches it.
+
+    Only one request builds a missing value at a time. The others wait for
+    its result for up to BUILD_WAIT seconds before they build it themselves,
+    so that a crowd of voters arriving at a cold cache does not run the same
+    expensive queries all at once."""
+    value = default_cache.get(key, MISSING)
+    if value is not MISSING:
+        return value
+    lock_key = f"{key}_lock"
+    locked = default_cache.add(lock_key, True, BUILD_LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + BUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(BUILD_POLL_INTERVAL)
+            value = default_cache.get(key, MISSING)
+            if value is not MISSING:
+                return value
+    try:
+        value = build()
+        default_cache.set(key, value, timeout)
+    finally:
+        if locked:
+            default_cache.delete(lock_key)
+    return value
@@ -1,8 +1,12 @@
+from django.db import DEFAULT_DB_ALIAS
 from django.utils.translation import gettext_lazy as _
 
 from pretalx.common.exporter import BaseExporter, CSVExporterMixin
 
+from .anomalies import get_excluded_voters
 from .models import PublicVote
+from .routing import get_replica_database
+from .votes import flush_votes, is_buffering
 
 
 class PublicVotingCSVExporter(CSVExporterMixin, BaseExporter):
@@ -17,8 +21,15 @@ class PublicVotingCSVExporter(CSVExporterMixin, BaseExporter):
 
     def get_csv_data(self, request, **kwargs):
         fieldnames = ["code", "voter", "timestamp", "score"]
+        using = get_replica_database()
+        if is_buffering():
+            flush_votes()
+            # The replica may not have the flushed votes yet
+            using = DEFAULT_DB_ALIAS
         votes = (
-            PublicVote.objects.filter(submission__event=self.event)
+            PublicVote.objects.using(using)
+            .filter(event=self.event)
+            .exclude(email_hash__in=get_excluded_voters(self.event))
             .order_by("submission__code")
             .select_related("submission")
         )
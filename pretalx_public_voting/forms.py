@@ -1,5 +1,5 @@
 from django import forms
-from django.db.models import Count, Q
+from django.forms.models import ModelChoiceIteratorValue
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from django_scopes.forms import SafeModelMultipleChoiceField
@@ -9,10 +9,11 @@ from pretalx.common.forms.renderers import InlineFormLabelRenderer, InlineFormRe
 from pretalx.common.forms.widgets import (
     EnhancedSelectMultiple,
     HtmlDateTimeInput,
+    SearchInput,
     SelectMultipleWithCount,
 )
 from pretalx.common.urls import build_absolute_uri
-from pretalx.submission.models import SubmissionStates, Track
+from pretalx.submission.models import Track
 
 from .models import PublicVote, PublicVotingSettings
 from .utils import event_sign, hash_email
@@ -122,6 +123,14 @@ class VoteForm(forms.Form):
             )
         return score
 
+    def get_vote(self):
+        return PublicVote(
+            submission=self.submission,
+            event_id=self.submission.event_id,
+            email_hash=self.hashed_email,
+            score=self.cleaned_data["score"],
+        )
+
     def save(self):
         return PublicVote.objects.update_or_create(
             submission=self.submission,
@@ -180,6 +189,7 @@ class PublicVotingSettingsForm(I18nModelForm):
             "anonymize_speakers",
             "show_session_image",
             "show_session_description",
+            "progressive_loading",
             "limit_tracks",
             "limit_submission_types",
             "allowed_emails",
@@ -199,6 +209,9 @@ class PublicVotingSettingsForm(I18nModelForm):
 
 
 class PublicVotingFilterForm(forms.Form):
+    q = forms.CharField(
+        required=False, max_length=200, label=_("Search"), widget=SearchInput
+    )
     track = forms.ModelMultipleChoiceField(
         required=False,
         queryset=Track.objects.none(),
@@ -209,34 +222,26 @@ class PublicVotingFilterForm(forms.Form):
 
     default_renderer = InlineFormRenderer
 
-    def __init__(self, event, limit_tracks=None, *args, **kwargs):
+    def __init__(self, event, *args, tracks=(), using=None, **kwargs):
         self.event = event
         super().__init__(*args, **kwargs)
 
-        if limit_tracks and limit_tracks.exists():
-            available_tracks = limit_tracks
-        else:
-            available_tracks = event.tracks.all()
-
-        # Only show track filter if there are multiple tracks
-        if available_tracks.count() > 1:
-            self.fields["track"].queryset = available_tracks.annotate(
-                count=Count(
-                    "submissions",
-                    distinct=True,
-                    filter=Q(
-                        event=event, submissions__state=SubmissionStates.SUBMITTED
-                    ),
+        # The tracks and their submission counts come from the facets
+        # snapshot, so only validating a selected track queries the database.
+        if tracks:
+            field = self.fields["track"]
+            field.queryset = event.tracks.using(using).filter(
+                pk__in=[track.pk for track in tracks]
+            )
+            field.choices = [
+                (
+                    ModelChoiceIteratorValue(track.pk, track),
+                    field.label_from_instance(track),
                 )
-            ).order_by("-count")
+                for track in tracks
+            ]
         else:
             self.fields.pop("track", None)
 
-    def filter_queryset(self, qs):
-        track = self.cleaned_data.get("track")
-        if track:
-            qs = qs.filter(track__in=track)
-        return qs
-
     class Media:
         css = {"all": ["orga/css/forms/search.css"]}
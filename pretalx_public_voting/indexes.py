@@ -0,0 +1,86 @@
+from django.db import connections
+from django.db.models import Q
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+
+from .models import PublicVote, PublicVotingSettings
+from .utils import get_plugin_flag
+from .warmup import WARMUP_LEAD
+
+# With the ``partial_vote_indexes`` setting, every event with open voting gets
+# its own index on PostgreSQL, which only contains the votes of that event.
+# Votes of all events share one table, so on a long-running instance the
+# regular indexes mostly hold votes of past events, while the live event's
+# lookups only walk its own, small index. The indexes are created shortly
+# before voting starts and dropped once it has ended.
+INDEX_PREFIX = "pretalx_public_vote_open_"
+
+
+def get_index_name(event_id):
+    return f"{INDEX_PREFIX}{event_id}"
+
+
+def get_connection():
+    connection = connections[PublicVote.objects.db]
+    if get_plugin_flag("partial_vote_indexes") and connection.vendor == "postgresql":
+        return connection
+    return None
+
+
+def get_open_event_ids():
+    """The events whose voting is open or starts soon. Voting without an end
+    counts as open until the event is over."""
+    _now = now()
+    with scopes_disabled():
+        return set(
+            PublicVotingSettings.objects.filter(
+                Q(start__isnull=True) | Q(start__lte=_now + WARMUP_LEAD),
+                Q(end__gt=_now) | Q(end__isnull=True, event__date_to__gte=_now.date()),
+            ).values_list("event_id", flat=True)
+        )
+
+
+def get_existing_indexes(cursor):
+    """Returns the event IDs of all partial indexes, and whether the index is
+    valid, i.e. not left over from a failed concurrent build."""
+    cursor.execute(
+        "SELECT class.relname, index.indisvalid FROM pg_index index "
+        "JOIN pg_class class ON class.oid = index.indexrelid "
+        "WHERE index.indrelid = %s::regclass AND class.relname LIKE %s",
+        [PublicVote._meta.db_table, f"{INDEX_PREFIX}%"],
+    )
+    return {
+        int(name.removeprefix(INDEX_PREFIX)): valid for name, valid in cursor.fetchall()
+    }
+
+
+def update_vote_indexes():
+    """Creates the partial indexes of open events and drops all others.
+    Returns the IDs of the events whose indexes were created and dropped."""
+    connection = get_connection()
+    if not connection:
+        return set(), set()
+    open_events = get_open_event_ids()
+    quote = connection.ops.quote_name
+    table = quote(PublicVote._meta.db_table)
+    # Indexes are built and dropped concurrently, so that votes can still
+    # be written meanwhile. This does not work in a transaction.
+    with connection.cursor() as cursor:
+        existing = get_existing_indexes(cursor)
+        dropped = {
+            event_id
+            for event_id, valid in existing.items()
+            if event_id not in open_events or not valid
+        }
+        for event_id in dropped:
+            cursor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {quote(get_index_name(event_id))}"
+            )
+        created = open_events - (existing.keys() - dropped)
+        for event_id in created:
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(get_index_name(event_id))} "
+                f"ON {table} (email_hash, submission_id) INCLUDE (score) "
+                f"WHERE event_id = {int(event_id)}"
+            )
+    return created, dropped - open_events
@@ -0,0 +1,266 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.db import DatabaseError, IntegrityError, OperationalError, connection
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django_scopes import scopes_disabled
+
+from .models import BufferedVote, FlaggedVoter, PublicVote, VoteEvent, VoterProgress
+from .results import update_results
+from .snapshots import get_votable_submissions, get_voting_settings
+from .utils import event_sign, hash_email
+from .votes import flush_votes, is_buffering
+
+# Simulates many voters at once against the local database, in a single
+# process. Every voter signs up, opens the link from their mail, browses
+# pages of the voting list and scores random submissions. Sync voters are
+# threads with a test client each, going through the WSGI request handler;
+# async voters share one event loop and go through the ASGI handler.
+#
+# The plan of every voter only depends on the seed and the voter's number,
+# so runs with the same seed send the same requests, whatever the timing.
+# Voters get example.org addresses, which pretalx never sends mail to
+# outside of DEBUG mode.
+VOTER_EMAIL = "loadtest-{seed}-{voter}@example.org"
+PERCENTILES = (50, 95, 99)
+LOCK_SAMPLE_INTERVAL = 0.1
+
+
+def get_voter_email(seed, voter):
+    return VOTER_EMAIL.format(seed=seed, voter=voter)
+
+
+def get_voter_plan(event, codes, seed, voter, pages=3, votes=5, signup=True):
+    """Returns the requests of one voter, as tuples of action, method, URL,
+    data and the expected status code."""
+    rng = random.Random(f"{seed}-{voter}")  # noqa: S311
+    voting_settings = get_voting_settings(event)
+    signed_user = event_sign(hash_email(get_voter_email(seed, voter), event), event)
+    signup_url = reverse(
+        "plugins:pretalx_public_voting:signup", kwargs={"event": event.slug}
+    )
+    list_url = reverse(
+        "plugins:pretalx_public_voting:talks",
+        kwargs={"event": event.slug, "signed_user": signed_user},
+    )
+    plan = []
+    if signup:
+        plan.append(("signup.get", "get", signup_url, None, 200))
+        plan.append(
+            (
+                "signup.post",
+                "post",
+                signup_url,
+                {"email": get_voter_email(seed, voter)},
+                302,
+            )
+        )
+    page_count = max(1, -(-len(codes) // 20))
+    for __ in range(pages):
+        page = rng.randint(1, page_count)
+        plan.append(("submission_list.get", "get", list_url, {"page": page}, 200))
+        for __ in range(votes):
+            score = rng.randint(voting_settings.min_score, voting_settings.max_score)
+            data = {f"{rng.choice(codes)}-score": str(score)}
+            plan.append(("submission_list.post", "post", list_url, data, 200))
+    return plan
+
+
+def classify_error(error):
+    """Sorts exceptions into the kinds of errors the load test reports."""
+    if isinstance(error, IntegrityError):
+        return "integrity"
+    if isinstance(error, OperationalError) and any(
+        word in str(error).lower() for word in ("lock", "deadlock")
+    ):
+        return "lock"
+    if isinstance(error, DatabaseError):
+        return "database"
+    return type(error).__name__
+
+
+def get_percentile(timings, percentile):
+    if len(timings) < 2:  # noqa: PLR2004 -- quantiles need two values
+        return timings[0] if timings else None
+    return statistics.quantiles(timings, n=100, method="inclusive")[percentile - 1]
+
+
+class LoadTestResult:
+    """Collects the latency and outcome of every request. Thread-safe."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.lock_samples = []
+        self.duration = None
+
+    def record(self, action, duration, error=None):
+        with self.lock:
+            self.timings[action].append(duration * 1000)
+            if error:
+                self.errors[action][error] += 1
+
+    def summary(self):
+        actions = {}
+        for action, timings in sorted(self.timings.items()):
+            errors = self.errors[action]
+            actions[action] = {
+                "requests": len(timings),
+                "errors": dict(errors),
+                "error_rate": round(sum(errors.values()) / len(timings), 4),
+                **{
+                    f"p{percentile}_ms": round(get_percentile(timings, percentile), 3)
+                    for percentile in PERCENTILES
+                },
+            }
+        requests = sum(len(timings) for timings in self.timings.values())
+        result = {
+            "requests": requests,
+            "duration_s": round(self.duration, 3),
+            "requests_per_second": round(requests / self.duration, 1),
+            "actions": actions,
+            "lock_waits": None,
+        }
+        if self.lock_samples:
+            result["lock_waits"] = {
+                "samples": len(self.lock_samples),
+                "max_waiting": max(self.lock_samples),
+                "waiting_share": round(
+                    sum(1 for waiting in self.lock_samples if waiting)
+                    / len(self.lock_samples),
+                    4,
+                ),
+            }
+        return result
+
+
+def check_response(response, expected_status):
+    if response.status_code != expected_status:
+        return f"status_{response.status_code}"
+    return None
+
+
+def get_client_kwargs(event):
+    url = urlsplit(event.urls.base.full())
+    return {"HTTP_HOST": url.netloc}, url.scheme == "https"
+
+
+def run_sync_voter(event, plan, result):
+    headers, secure = get_client_kwargs(event)
+    client = Client(**headers)
+    try:
+        for action, method, url, data, expected_status in plan:
+            started = time.perf_counter()
+            try:
+                response = getattr(client, method)(url, data, secure=secure)
+                error = check_response(response, expected_status)
+            except Exception as exception:  # noqa: BLE001 -- reported below
+                error = classify_error(exception)
+            result.record(action, time.perf_counter() - started, error)
+    finally:
+        connection.close()
+
+
+async def run_async_voter(event, plan, result, semaphore):
+    headers, secure = get_client_kwargs(event)
+    client = AsyncClient(**headers)
+    async with semaphore:
+        for action, method, url, data, expected_status in plan:
+            started = time.perf_counter()
+            try:
+                response = await getattr(client, method)(url, data, secure=secure)
+                error = check_response(response, expected_status)
+            except Exception as exception:  # noqa: BLE001 -- reported below
+                error = classify_error(exception)
+            result.record(action, time.perf_counter() - started, error)
+
+
+def sample_lock_waits(result, stop):
+    """Counts the backends that wait for a lock, on PostgreSQL only."""
+    if connection.vendor != "postgresql":
+        return
+    try:
+        with connection.cursor() as cursor:
+            while not stop.wait(LOCK_SAMPLE_INTERVAL):
+                cursor.execute(
+                    "SELECT count(*) FROM pg_locks WHERE NOT granted "
+                    "AND database = (SELECT oid FROM pg_database "
+                    "WHERE datname = current_database())"
+                )
+                result.lock_samples.append(cursor.fetchone()[0])
+    finally:
+        connection.close()
+
+
+def run_load_test(
+    event,
+    voters=100,
+    concurrency=16,
+    pages=3,
+    votes=5,
+    seed=0,
+    use_async=False,
+    signup=True,
+):
+    """Runs the voters, at most ``concurrency`` at a time, and returns the
+    LoadTestResult."""
+    with scopes_disabled():
+        codes = [code for __, code, __ in get_votable_submissions(event)]
+    if not codes:
+        raise ValueError("There are no submissions to vote on.")
+    plans = [
+        get_voter_plan(event, codes, seed, voter, pages, votes, signup)
+        for voter in range(voters)
+    ]
+    result = LoadTestResult()
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_lock_waits, args=(result, stop))
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        if use_async:
+
+            async def run_all():
+                semaphore = asyncio.Semaphore(concurrency)
+                await asyncio.gather(
+                    *(run_async_voter(event, plan, result, semaphore) for plan in plans)
+                )
+
+            asyncio.run(run_all())
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(
+                    executor.map(
+                        lambda plan: run_sync_voter(event, plan, result), plans
+                    )
+                )
+    finally:
+        result.duration = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+    return result
+
+
+def delete_load_test_votes(event, seed, voters):
+    """Removes everything the voters of a load test left behind."""
+    email_hashes = [
+        hash_email(get_voter_email(seed, voter), event) for voter in range(voters)
+    ]
+    if is_buffering():
+        flush_votes()
+    with scopes_disabled():
+        for model in (PublicVote, BufferedVote, VoteEvent):
+            model.objects.filter(
+                submission__event=event, email_hash__in=email_hashes
+            ).delete()
+        for model in (VoterProgress, FlaggedVoter):
+            model.objects.filter(event=event, email_hash__in=email_hashes).delete()
+    update_results(event)
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pretalx.event.models import Event
+
+from pretalx_public_voting.transfer import (
+    FORMATS,
+    export_votes,
+    get_format,
+    open_votes_file,
+)
+
+
+class Command(BaseCommand):
+    help = "Export all public votes of an event as newline-delimited JSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=str, required=True, help="Event slug.")
+        parser.add_argument(
+            "path",
+            type=str,
+            help="File to write, or - for stdout. Files ending in .gz are gzipped.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to csv for .csv files and to ndjson otherwise.",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Always gzip.")
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options["event"]).first()
+        if not event:
+            raise CommandError(f"There is no event {options['event']}.")
+        path = options["path"]
+        started = time.monotonic()
+        with open_votes_file(path, "w", compress=options["gzip"] or None) as stream:
+            count = export_votes(event, stream, get_format(path, options["format"]))
+        duration = time.monotonic() - started
+        # Keep stdout clean when the votes go there
+        output = self.stderr if path == "-" else self.stdout
+        output.write(
+            f"Exported {count} votes in {duration:.1f}s "
+            f"({count / max(duration, 0.001):.0f} votes/s)."
+        )
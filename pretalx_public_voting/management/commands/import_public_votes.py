@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django_scopes import scope
+
+from pretalx.event.models import Event
+
+from pretalx_public_voting.snapshots import get_voting_settings
+from pretalx_public_voting.transfer import (
+    FORMATS,
+    IMPORT_BATCH_SIZE,
+    get_format,
+    import_votes,
+    open_votes_file,
+    read_votes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import public votes into an event from newline-delimited JSON or CSV "
+        "with the columns code, voter, timestamp and score. Voters are hashed "
+        "email addresses, which only match voters of events with the same slug."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=str, required=True, help="Event slug.")
+        parser.add_argument(
+            "path",
+            type=str,
+            help="File to read, or - for stdin. Files ending in .gz are gunzipped.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to csv for .csv files and to ndjson otherwise.",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Always gunzip.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f"Votes per database write (default: {IMPORT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only validate the votes."
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options["event"]).first()
+        if not event:
+            raise CommandError(f"There is no event {options['event']}.")
+        if not get_voting_settings(event):
+            raise CommandError(f"Public voting is not set up for {event.slug}.")
+        path = options["path"]
+        started = time.monotonic()
+        with (
+            scope(event=event),
+            open_votes_file(path, "r", compress=options["gzip"] or None) as stream,
+        ):
+            result = import_votes(
+                event,
+                read_votes(stream, get_format(path, options["format"])),
+                batch_size=max(options["batch_size"], 1),
+                dry_run=options["dry_run"],
+            )
+        duration = time.monotonic() - started
+        for error in result["errors"]:
+            self.stderr.write(error)
+        verb = "Validated" if options["dry_run"] else "Imported"
+        imported = result["created"] + result["updated"]
+        self.stdout.write(
+            f"{verb} {imported} votes ({result['created']} new, {result['updated']} "
+            f"replaced) and skipped {result['skipped']} in {duration:.1f}s "
+            f"({imported / max(duration, 0.001):.0f} votes/s)."
+        )
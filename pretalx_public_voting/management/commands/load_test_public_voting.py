@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pretalx.event.models import Event
+
+from pretalx_public_voting.loadtest import delete_load_test_votes, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate many concurrent voters signing up, browsing and voting, and "
+        "report throughput, latency percentiles, lock waits and errors. Only "
+        "run this against a local or staging database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=str, required=True, help="Event slug.")
+        parser.add_argument("--voters", type=int, default=100)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=16,
+            help="Number of voters at the same time (default: 16).",
+        )
+        parser.add_argument(
+            "--pages", type=int, default=3, help="Pages every voter opens."
+        )
+        parser.add_argument(
+            "--votes", type=int, default=5, help="Votes per page and voter."
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Runs with the same seed repeat."
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Run the voters on one event loop through the ASGI handler.",
+        )
+        parser.add_argument(
+            "--no-signup",
+            action="store_false",
+            dest="signup",
+            help="Skip the signup, e.g. if sending mail is not set up.",
+        )
+        parser.add_argument(
+            "--keep-votes",
+            action="store_true",
+            help="Keep the votes of the simulated voters after the run.",
+        )
+        parser.add_argument("--output", type=str, help="Write the results as JSON.")
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options["event"]).first()
+        if not event:
+            raise CommandError(f"There is no event {options['event']}.")
+        try:
+            result = run_load_test(
+                event,
+                voters=options["voters"],
+                concurrency=options["concurrency"],
+                pages=options["pages"],
+                votes=options["votes"],
+                seed=options["seed"],
+                use_async=options["use_async"],
+                signup=options["signup"],
+            )
+        except ValueError as error:
+            raise CommandError(str(error)) from None
+        finally:
+            if not options["keep_votes"]:
+                delete_load_test_votes(event, options["seed"], options["voters"])
+        summary = result.summary()
+        self.stdout.write(
+            f"{summary['requests']} requests in {summary['duration_s']:.1f}s "
+            f"({summary['requests_per_second']:.1f} requests/s)"
+        )
+        for action, values in summary["actions"].items():
+            errors = ", ".join(
+                f"{count} {error}" for error, count in values["errors"].items()
+            )
+            self.stdout.write(
+                f"{action}: {values['requests']} requests, "
+                f"p50 {values['p50_ms']:.1f}ms, p95 {values['p95_ms']:.1f}ms, "
+                f"p99 {values['p99_ms']:.1f}ms, "
+                f"error rate {values['error_rate']:.2%}"
+                + (f" ({errors})" if errors else "")
+            )
+        if lock_waits := summary["lock_waits"]:
+            self.stdout.write(
+                f"Lock waits: up to {lock_waits['max_waiting']} waiting backends, "
+                f"in {lock_waits['waiting_share']:.1%} of {lock_waits['samples']} samples"
+            )
+        if options["output"]:
+            with Path(options["output"]).open("w") as fp:
+                json.dump(summary, fp, indent=2)
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pretalx.event.models import Event
+
+from pretalx_public_voting.progress import recount_progress
+from pretalx_public_voting.results import update_results
+from pretalx_public_voting.verification import verify_statistics
+
+MAX_EXAMPLES = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the voter score statistics and results of an event from all "
+        "its votes, and compare them to the stored ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=str, required=True, help="Event slug.")
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recount the statistics and results if they differ.",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options["event"]).first()
+        if not event:
+            raise CommandError(f"There is no event {options['event']}.")
+        differences = verify_statistics(event)
+        if self.report(differences) and options["fix"]:
+            recount_progress(event)
+            update_results(event)
+            self.stdout.write("Recounted the statistics and results.")
+            differences = verify_statistics(event)
+            self.report(differences)
+        if differences["voter_differences"] or differences["submission_differences"]:
+            raise CommandError("The stored statistics do not match the votes.")
+
+    def report(self, differences):
+        voter_differences = differences["voter_differences"]
+        submission_differences = differences["submission_differences"]
+        self.stdout.write(
+            f"Checked {differences['voters']} voters and "
+            f"{differences['submissions']} submissions: {len(voter_differences)} "
+            f"voters and {len(submission_differences)} submissions differ."
+        )
+        for email_hash, stored, computed in voter_differences[:MAX_EXAMPLES]:
+            self.stdout.write(
+                f"Voter {email_hash}: stored {stored}, computed {computed} "
+                "(votes, score sum, sum of squares)"
+            )
+        for submission_id, stored, computed in submission_differences[:MAX_EXAMPLES]:
+            self.stdout.write(
+                f"Submission {submission_id}: stored {format_row(stored)}, "
+                f"computed {format_row(computed)} (votes, score sum, z-score sum)"
+            )
+        return bool(voter_differences or submission_differences)
+
+
+def format_row(row):
+    if row is None:
+        return None
+    return tuple(round(float(value), 6) for value in row)
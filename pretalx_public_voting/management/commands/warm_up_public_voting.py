@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django_scopes import scope
+
+from pretalx.event.models import Event
+
+from pretalx_public_voting.warmup import warm_up, warm_up_upcoming
+
+
+class Command(BaseCommand):
+    help = "Prebuild the caches of the public voting pages, by default for all events whose voting starts soon"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event", type=str, help="Slug of an event to warm up right away."
+        )
+
+    def handle(self, *args, **options):
+        if not options.get("event"):
+            for event in warm_up_upcoming():
+                self.stdout.write(f"Warmed up {event.slug}.")
+            return
+        event = Event.objects.filter(slug=options["event"]).first()
+        if not event:
+            raise CommandError(f"There is no event {options['event']}.")
+        with scope(event=event):
+            count = warm_up(event)
+        self.stdout.write(f"Warmed up {count} submissions of {event.slug}.")
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pretalx_public_voting", "0007_publicvotingsettings_limit_submission_types")
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publicvotingsettings",
+            name="progressive_loading",
+            field=models.BooleanField(default=False),
+        )
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("submission", "0046_question_submission_types"),
+        ("pretalx_public_voting", "0008_publicvotingsettings_progressive_loading"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BufferedVote",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("score", models.IntegerField()),
+                ("email_hash", models.CharField(max_length=32)),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="buffered_public_votes",
+                        to="submission.Submission",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["email_hash", "submission"],
+                        name="pretalx_pub_email_h_6c1497_idx",
+                    )
+                ]
+            },
+        )
+    ]
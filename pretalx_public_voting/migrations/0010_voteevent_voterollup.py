@@ -0,0 +1,60 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("submission", "0046_question_submission_types"),
+        ("pretalx_public_voting", "0009_bufferedvote"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoteEvent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("email_hash", models.CharField(max_length=32)),
+                ("old_score", models.IntegerField(null=True)),
+                ("new_score", models.IntegerField()),
+                ("timestamp", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="public_vote_events",
+                        to="submission.Submission",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="VoteRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("resolution", models.CharField(max_length=6)),
+                ("bucket", models.DateTimeField()),
+                ("votes", models.PositiveIntegerField(default=0)),
+                ("new_votes", models.PositiveIntegerField(default=0)),
+                ("score_sum", models.IntegerField(default=0)),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="public_vote_rollups",
+                        to="submission.Submission",
+                    ),
+                ),
+            ],
+            options={"unique_together": {("submission", "resolution", "bucket")}},
+        ),
+    ]
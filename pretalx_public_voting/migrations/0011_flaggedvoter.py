@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import pretalx_public_voting.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0029_event_domain"),
+        ("pretalx_public_voting", "0010_voteevent_voterollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlaggedVoter",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("email_hash", models.CharField(max_length=32)),
+                ("reasons", models.JSONField(default=list)),
+                (
+                    "details",
+                    models.JSONField(default=pretalx_public_voting.models.get_dict),
+                ),
+                ("excluded", models.BooleanField(default=False)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flagged_public_voters",
+                        to="event.Event",
+                    ),
+                ),
+            ],
+            options={"unique_together": {("event", "email_hash")}},
+        )
+    ]
@@ -0,0 +1,76 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_votes(apps, schema_editor):
+    PublicVote = apps.get_model("pretalx_public_voting", "PublicVote")
+    VoterProgress = apps.get_model("pretalx_public_voting", "VoterProgress")
+    counts = (
+        PublicVote.objects.order_by()
+        .values("submission__event_id", "email_hash", "submission__track_id")
+        .annotate(votes=Count("id"))
+        .iterator(chunk_size=5000)
+    )
+    VoterProgress.objects.bulk_create(
+        (
+            VoterProgress(
+                event_id=row["submission__event_id"],
+                email_hash=row["email_hash"],
+                track_id=row["submission__track_id"],
+                votes=row["votes"],
+            )
+            for row in counts
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0029_event_domain"),
+        ("submission", "0046_question_submission_types"),
+        ("pretalx_public_voting", "0011_flaggedvoter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoterProgress",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("email_hash", models.CharField(max_length=32)),
+                ("votes", models.PositiveIntegerField(default=0)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="public_voter_progress",
+                        to="event.Event",
+                    ),
+                ),
+                (
+                    "track",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="submission.Track",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["event", "email_hash"],
+                        name="pretalx_pub_event_i_688c0d_idx",
+                    )
+                ]
+            },
+        ),
+        migrations.RunPython(count_existing_votes, migrations.RunPython.noop),
+    ]
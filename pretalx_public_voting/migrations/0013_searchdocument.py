@@ -0,0 +1,136 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of the index that search.py expects, so that later changes
+# to search.py never change what this migration does
+CREATE_SEARCH_INDEX = {
+    "postgresql": [
+        (
+            "ALTER TABLE pretalx_public_voting_searchdocument "
+            "ADD COLUMN IF NOT EXISTS vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED"
+        ),
+        (
+            "CREATE INDEX IF NOT EXISTS pretalx_public_voting_search_vector "
+            "ON pretalx_public_voting_searchdocument USING gin (vector)"
+        ),
+    ],
+    "sqlite": [
+        (
+            "CREATE VIRTUAL TABLE IF NOT EXISTS pretalx_public_voting_search_fts "
+            "USING fts5(text, content='pretalx_public_voting_searchdocument', "
+            "content_rowid='id')"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS pretalx_public_voting_search_fts_insert "
+            "AFTER INSERT ON pretalx_public_voting_searchdocument "
+            "BEGIN INSERT INTO pretalx_public_voting_search_fts(rowid, text) "
+            "VALUES (new.id, new.text); END"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS pretalx_public_voting_search_fts_delete "
+            "AFTER DELETE ON pretalx_public_voting_searchdocument "
+            "BEGIN INSERT INTO pretalx_public_voting_search_fts"
+            "(pretalx_public_voting_search_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); END"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS pretalx_public_voting_search_fts_update "
+            "AFTER UPDATE ON pretalx_public_voting_searchdocument "
+            "BEGIN INSERT INTO pretalx_public_voting_search_fts"
+            "(pretalx_public_voting_search_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); "
+            "INSERT INTO pretalx_public_voting_search_fts(rowid, text) "
+            "VALUES (new.id, new.text); END"
+        ),
+    ],
+}
+DROP_SEARCH_INDEX = {
+    "postgresql": [
+        "ALTER TABLE pretalx_public_voting_searchdocument DROP COLUMN IF EXISTS vector"
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS pretalx_public_voting_search_fts_insert",
+        "DROP TRIGGER IF EXISTS pretalx_public_voting_search_fts_delete",
+        "DROP TRIGGER IF EXISTS pretalx_public_voting_search_fts_update",
+        "DROP TABLE IF EXISTS pretalx_public_voting_search_fts",
+    ],
+}
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SEARCH_INDEX.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    for sql in DROP_SEARCH_INDEX.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def index_existing_submissions(apps, schema_editor):
+    PublicVotingSettings = apps.get_model(
+        "pretalx_public_voting", "PublicVotingSettings"
+    )
+    SearchDocument = apps.get_model("pretalx_public_voting", "SearchDocument")
+    Submission = apps.get_model("submission", "Submission")
+    for voting_settings in PublicVotingSettings.objects.all():
+        submissions = Submission.objects.filter(
+            event_id=voting_settings.event_id, state="submitted"
+        ).prefetch_related("speakers")
+        documents = []
+        for submission in submissions.iterator(chunk_size=500):
+            parts = [submission.title, submission.abstract]
+            if voting_settings.show_session_description:
+                parts.append(submission.description)
+            if not voting_settings.anonymize_speakers:
+                parts.extend(speaker.name for speaker in submission.speakers.all())
+            documents.append(
+                SearchDocument(
+                    submission_id=submission.pk,
+                    event_id=voting_settings.event_id,
+                    text="\n".join(part for part in parts if part),
+                )
+            )
+        SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0029_event_domain"),
+        ("submission", "0046_question_submission_types"),
+        ("pretalx_public_voting", "0012_voterprogress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("text", models.TextField()),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="event.Event",
+                    ),
+                ),
+                (
+                    "submission",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="public_voting_search",
+                        to="submission.Submission",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_submissions, migrations.RunPython.noop),
+    ]
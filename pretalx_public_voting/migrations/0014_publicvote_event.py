@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_submission_events(apps, schema_editor):
+    PublicVote = apps.get_model("pretalx_public_voting", "PublicVote")
+    Submission = apps.get_model("submission", "Submission")
+    events = Submission.objects.filter(pk=OuterRef("submission_id")).values("event_id")
+    PublicVote.objects.filter(event__isnull=True).update(event_id=Subquery(events[:1]))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0029_event_domain"),
+        ("submission", "0046_question_submission_types"),
+        ("pretalx_public_voting", "0013_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publicvote",
+            name="event",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="event.Event",
+            ),
+        ),
+        migrations.RunPython(copy_submission_events, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="publicvote",
+            name="event",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="event.Event",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publicvote",
+            index=models.Index(
+                fields=["event", "email_hash"], name="pretalx_pub_event_i_af0d05_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def sum_existing_scores(apps, schema_editor):
+    PublicVote = apps.get_model("pretalx_public_voting", "PublicVote")
+    VoterProgress = apps.get_model("pretalx_public_voting", "VoterProgress")
+    VoterProgress.objects.all().delete()
+    counts = (
+        PublicVote.objects.order_by()
+        .values("event_id", "email_hash", "submission__track_id")
+        .annotate(
+            votes=Count("id"),
+            score_sum=Sum("score"),
+            score_squares=Sum(F("score") * F("score")),
+        )
+        .iterator(chunk_size=5000)
+    )
+    VoterProgress.objects.bulk_create(
+        (
+            VoterProgress(
+                event_id=row["event_id"],
+                email_hash=row["email_hash"],
+                track_id=row["submission__track_id"],
+                votes=row["votes"],
+                score_sum=row["score_sum"],
+                score_squares=row["score_squares"],
+            )
+            for row in counts
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [("pretalx_public_voting", "0015_results")]
+
+    operations = [
+        migrations.AddField(
+            model_name="submissionresult",
+            name="z_score_sum",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="voterprogress",
+            name="score_squares",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="voterprogress",
+            name="score_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(sum_existing_scores, migrations.RunPython.noop),
+    ]
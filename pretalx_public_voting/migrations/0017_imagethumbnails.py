@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("pretalx_public_voting", "0016_score_statistics")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageThumbnails",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("digest", models.CharField(max_length=20, unique=True)),
+                ("width", models.PositiveIntegerField(default=0)),
+                ("widths", models.JSONField(default=list)),
+            ],
+        )
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    VoterProgress = apps.get_model("pretalx_public_voting", "VoterProgress")
+    duplicates = (
+        VoterProgress.objects.order_by()
+        .values("event_id", "email_hash", "track_id")
+        .annotate(
+            rows=Count("id"),
+            total_votes=Sum("votes"),
+            total_score_sum=Sum("score_sum"),
+            total_score_squares=Sum("score_squares"),
+        )
+        .filter(rows__gt=1)
+    )
+    for row in list(duplicates):
+        VoterProgress.objects.filter(
+            event_id=row["event_id"],
+            email_hash=row["email_hash"],
+            track_id=row["track_id"],
+        ).delete()
+        VoterProgress.objects.create(
+            event_id=row["event_id"],
+            email_hash=row["email_hash"],
+            track_id=row["track_id"],
+            votes=row["total_votes"],
+            score_sum=row["total_score_sum"],
+            score_squares=row["total_score_squares"],
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [("pretalx_public_voting", "0017_imagethumbnails")]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="voterprogress",
+            constraint=models.UniqueConstraint(
+                models.F("event"),
+                models.F("email_hash"),
+                Coalesce(models.F("track"), models.Value(0)),
+                name="unique_voter_progress_per_track",
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django_scopes import ScopedManager
@@ -57,6 +58,13 @@ class PublicVotingSettings(models.Model):
         ),
         default=False,
     )
+    progressive_loading = models.BooleanField(
+        verbose_name=_("Load submissions while scrolling"),
+        help_text=_(
+            "Instead of paging through the submissions, voters with JavaScript enabled get more submissions as they scroll down."
+        ),
+        default=False,
+    )
     min_score = models.IntegerField(
         default=1,
         verbose_name=_("Minimum score"),
@@ -104,14 +112,221 @@ class PublicVote(models.Model):
         related_name="public_votes",
         on_delete=models.CASCADE,
     )
+    # The submission's event, so that votes can be scoped and indexed without
+    # joining submissions. Covered by the index below.
+    event = models.ForeignKey(
+        to="event.Event", related_name="+", on_delete=models.CASCADE, db_index=False
+    )
     # The hashed email addresses are always 16 bytes long => 32 characters
     email_hash = models.CharField(max_length=32, blank=False)
     timestamp = models.DateTimeField(auto_now=True)
 
-    objects = ScopedManager(event="submission__event")
+    objects = ScopedManager(event="event")
 
     class Meta:
         unique_together = (("submission", "email_hash"),)
+        indexes = [models.Index(fields=["event", "email_hash"])]
 
     def __str__(self):
         return f"Vote(score={self.score}, email_hash={self.email_hash}, timestamp={self.timestamp}, submission={self.submission.title})"
+
+    def save(self, *args, **kwargs):
+        if not self.event_id:
+            self.event_id = self.submission.event_id
+        super().save(*args, **kwargs)
+
+
+class BufferedVote(models.Model):
+    """A vote that has been accepted, but not yet written to PublicVote.
+    Only used with the ``vote_buffer`` setting, see votes.py."""
+
+    score = models.IntegerField()
+    submission = models.ForeignKey(
+        to="submission.Submission",
+        related_name="buffered_public_votes",
+        on_delete=models.CASCADE,
+    )
+    email_hash = models.CharField(max_length=32)
+
+    objects = ScopedManager(event="submission__event")
+
+    class Meta:
+        indexes = [models.Index(fields=["email_hash", "submission"])]
+
+    def __str__(self):
+        return f"BufferedVote(score={self.score}, email_hash={self.email_hash}, submission={self.submission_id})"
+
+
+class VoteEvent(models.Model):
+    """An append-only record of every accepted vote, including changes."""
+
+    submission = models.ForeignKey(
+        to="submission.Submission",
+        related_name="public_vote_events",
+        on_delete=models.CASCADE,
+    )
+    email_hash = models.CharField(max_length=32)
+    old_score = models.IntegerField(null=True)
+    new_score = models.IntegerField()
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = ScopedManager(event="submission__event")
+
+    def __str__(self):
+        return f"VoteEvent(submission={self.submission_id}, email_hash={self.email_hash}, {self.old_score} -> {self.new_score})"
+
+
+class VoteRollup(models.Model):
+    """Vote events per submission, counted per minute or per hour."""
+
+    MINUTE = "minute"
+    HOUR = "hour"
+
+    submission = models.ForeignKey(
+        to="submission.Submission",
+        related_name="public_vote_rollups",
+        on_delete=models.CASCADE,
+    )
+    resolution = models.CharField(
+        max_length=6, choices=((MINUTE, MINUTE), (HOUR, HOUR))
+    )
+    bucket = models.DateTimeField()
+    votes = models.PositiveIntegerField(default=0)
+    new_votes = models.PositiveIntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+
+    objects = ScopedManager(event="submission__event")
+
+    class Meta:
+        unique_together = (("submission", "resolution", "bucket"),)
+
+    def __str__(self):
+        return f"VoteRollup(submission={self.submission_id}, {self.resolution}={self.bucket}, votes={self.votes})"
+
+
+class VoterProgress(models.Model):
+    """The number of submissions a voter scored, and the sum and the sum of
+    squares of their scores, per track. Updated with every vote, see
+    progress.py."""
+
+    event = models.ForeignKey(
+        to="event.Event", related_name="public_voter_progress", on_delete=models.CASCADE
+    )
+    email_hash = models.CharField(max_length=32)
+    track = models.ForeignKey(
+        to="submission.Track", related_name="+", null=True, on_delete=models.CASCADE
+    )
+    votes = models.PositiveIntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+    score_squares = models.PositiveIntegerField(default=0)
+
+    objects = ScopedManager(event="event")
+
+    class Meta:
+        indexes = [models.Index(fields=["event", "email_hash"])]
+        # Votes without a track count towards track 0, as NULLs never conflict
+        constraints = [
+            models.UniqueConstraint(
+                models.F("event"),
+                models.F("email_hash"),
+                Coalesce(models.F("track"), models.Value(0)),
+                name="unique_voter_progress_per_track",
+            )
+        ]
+
+    def __str__(self):
+        return f"VoterProgress(event={self.event_id}, email_hash={self.email_hash}, track={self.track_id}, votes={self.votes})"
+
+
+class SearchDocument(models.Model):
+    """The searchable text of a submission that voters can vote on. The
+    full-text index over it is database specific, see search.py."""
+
+    submission = models.OneToOneField(
+        to="submission.Submission",
+        related_name="public_voting_search",
+        on_delete=models.CASCADE,
+    )
+    event = models.ForeignKey(
+        to="event.Event", related_name="+", on_delete=models.CASCADE
+    )
+    text = models.TextField()
+
+    objects = ScopedManager(event="event")
+
+    def __str__(self):
+        return f"SearchDocument(submission={self.submission_id})"
+
+
+class FlaggedVoter(models.Model):
+    """A voter whose votes look suspicious, see anomalies.py. Organisers
+    decide whether to exclude them from the results."""
+
+    event = models.ForeignKey(
+        to="event.Event", related_name="flagged_public_voters", on_delete=models.CASCADE
+    )
+    email_hash = models.CharField(max_length=32)
+    reasons = models.JSONField(default=list)
+    details = models.JSONField(default=get_dict)
+    excluded = models.BooleanField(default=False)
+
+    objects = ScopedManager(event="event")
+
+    class Meta:
+        unique_together = (("event", "email_hash"),)
+
+    def __str__(self):
+        return f"FlaggedVoter(event={self.event_id}, email_hash={self.email_hash}, reasons={self.reasons})"
+
+
+class SubmissionResult(models.Model):
+    """The votes of a submission, without excluded voters. Recounted from
+    the votes of the event, see results.py."""
+
+    submission = models.OneToOneField(
+        to="submission.Submission",
+        related_name="public_voting_result",
+        on_delete=models.CASCADE,
+    )
+    event = models.ForeignKey(
+        to="event.Event", related_name="+", on_delete=models.CASCADE
+    )
+    votes = models.PositiveIntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+    # The sum of the votes' z-scores, i.e. of their distance from the mean
+    # score of their voter, in standard deviations of the voter's scores
+    z_score_sum = models.FloatField(default=0)
+
+    objects = ScopedManager(event="event")
+
+    def __str__(self):
+        return f"SubmissionResult(submission={self.submission_id}, votes={self.votes}, score_sum={self.score_sum})"
+
+
+class EventResult(models.Model):
+    """The number of voters and votes of an event, counted together with
+    its SubmissionResults."""
+
+    event = models.OneToOneField(
+        to="event.Event", related_name="public_voting_result", on_delete=models.CASCADE
+    )
+    voters = models.PositiveIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField()
+
+    objects = ScopedManager(event="event")
+
+    def __str__(self):
+        return f"EventResult(event={self.event_id}, voters={self.voters}, votes={self.votes})"
+
+
+class ImageThumbnails(models.Model):
+    """The width of an uploaded image and the widths of its thumbnails,
+    keyed by the digest of its file name, see thumbnails.py."""
+
+    digest = models.CharField(max_length=20, unique=True)
+    width = models.PositiveIntegerField(default=0)
+    widths = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"ImageThumbnails(digest={self.digest}, widths={self.widths})"
@@ -0,0 +1,129 @@
+import cProfile
+import datetime as dt
+import random
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+from .utils import get_plugin_flag, get_plugin_setting
+
+PROFILE_PARAMETER = "profile"
+PROFILE_TOKEN = "profile"  # noqa: S105 -- signed per event, not a secret itself
+PROFILE_NAME_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[a-z_.]+-[0-9a-f]{8}\.prof$")
+PROFILE_FLAG_MAX_AGE = 7 * 24 * 3600
+# Only one profiler can be active per process, and under ASGI many requests
+# share a thread, so a request that finds it taken is not profiled.
+PROFILER_LOCK = threading.Lock()
+
+
+def get_profile_dir(event):
+    base = get_plugin_setting("profiling_dir") or (
+        Path(settings.DATA_DIR) / "public_voting_profiles"
+    )
+    return Path(base) / event.slug
+
+
+def get_profile_signer(event):
+    # A salt of its own, so that voter links and profile flags cannot be
+    # used in place of each other
+    return signing.TimestampSigner(salt=f"{event.slug}-profile")
+
+
+def get_profile_flag(event):
+    """The signed query parameter value that profiles a single request."""
+    return get_profile_signer(event).sign(PROFILE_TOKEN)
+
+
+def is_profile_flag(flag, event):
+    try:
+        value = get_profile_signer(event).unsign(flag, max_age=PROFILE_FLAG_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == PROFILE_TOKEN
+
+
+def should_profile(request):
+    if not get_plugin_flag("profiling"):
+        return False
+    flag = request.GET.get(PROFILE_PARAMETER)
+    if flag and is_profile_flag(flag, request.event):
+        return True
+    sample_rate = int(get_plugin_setting("profiling_sample_rate") or 0)
+    return bool(sample_rate) and random.randrange(sample_rate) == 0  # noqa: S311
+
+
+def rotate_profiles(directory, keep):
+    profiles = sorted(directory.glob("*.prof"), key=lambda path: path.name)
+    for path in profiles[:-keep] if keep else profiles:
+        path.unlink(missing_ok=True)
+
+
+def start_profiler():
+    if not PROFILER_LOCK.acquire(blocking=False):
+        return None
+    # Another profiler or debugger, or, with sys.monitoring on Python 3.12+,
+    # another profiling tool may already be active
+    profiler = cProfile.Profile()
+    try:
+        if sys.getprofile() is None:
+            profiler.enable()
+            return profiler
+    except ValueError:
+        pass
+    PROFILER_LOCK.release()
+    return None
+
+
+@contextmanager
+def profile(event, name):
+    """Profiles the block and stores the profile, unless another profiler is
+    active, in which case it yields None."""
+    profiler = start_profiler()
+    if not profiler:
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        PROFILER_LOCK.release()
+        directory = get_profile_dir(event)
+        directory.mkdir(parents=True, exist_ok=True)
+        timestamp = dt.datetime.now(tz=dt.UTC).strftime("%Y%m%dT%H%M%S")
+        profiler.dump_stats(
+            directory / f"{timestamp}-{name}-{uuid.uuid4().hex[:8]}.prof"
+        )
+        rotate_profiles(directory, int(get_plugin_setting("profiling_max_files") or 20))
+
+
+def profile_request(request, name):
+    if not should_profile(request):
+        return nullcontext()
+    return profile(request.event, name)
+
+
+def get_profiles(event):
+    directory = get_profile_dir(event)
+    if not directory.is_dir():
+        return []
+    return [
+        {
+            "name": path.name,
+            "size": path.stat().st_size,
+            "created": dt.datetime.fromtimestamp(path.stat().st_mtime, tz=dt.UTC),
+        }
+        for path in sorted(directory.glob("*.prof"), reverse=True)
+    ]
+
+
+def get_profile_path(event, name):
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = get_profile_dir(event) / name
+    return path if path.is_file() else None
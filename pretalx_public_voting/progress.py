@@ -0,0 +1,152 @@
+import itertools
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django_scopes import scopes_disabled
+
+from .models import PublicVote, VoterProgress
+
+RECOUNT_BATCH_SIZE = 5000
+STATISTICS_FIELDS = ("votes", "score_sum", "score_squares")
+
+
+def lock_progress(event, votes, tracks):
+    """Returns the progress rows of the voters in the tracks of the votes,
+    keyed by email hash and track, creating missing rows.
+
+    The rows stay locked until the end of the transaction, so that
+    concurrent votes of the same voter read each other's scores and are
+    counted one after the other."""
+    keys = sorted(
+        {(vote.email_hash, tracks.get(vote.submission_id)) for vote in votes},
+        key=lambda key: (key[0], key[1] or 0),
+    )
+    with scopes_disabled():
+        # Concurrent first votes wait for each other's row instead of
+        # creating a second one, see the unique constraint
+        VoterProgress.objects.bulk_create(
+            [
+                VoterProgress(event=event, email_hash=email_hash, track_id=track_id)
+                for email_hash, track_id in keys
+            ],
+            ignore_conflicts=True,
+        )
+        rows = (
+            VoterProgress.objects.select_for_update()
+            .filter(event=event, email_hash__in={email_hash for email_hash, __ in keys})
+            .order_by("pk")
+            .only("email_hash", "track_id")
+        )
+        return {(row.email_hash, row.track_id): row for row in rows}
+
+
+def record_progress(progress, votes, tracks):
+    """Counts the first votes of every voter on a submission, and adds up
+    the changes of their scores and squared scores, per track.
+
+    ``progress`` are the locked rows from ``lock_progress``, and ``tracks``
+    maps the primary key of every voted submission to its track. The votes
+    know their previous score, so this never needs to look at earlier
+    votes. As the scores are integers, the sums are exact, and the mean and
+    variance of every voter's scores follow from them."""
+    changes = defaultdict(Counter)
+    for vote in votes:
+        old_score = vote.old_score
+        change = changes[vote.email_hash, tracks.get(vote.submission_id)]
+        if old_score is None:
+            change["votes"] += 1
+            old_score = 0
+        change["score_sum"] += vote.score - old_score
+        change["score_squares"] += vote.score**2 - old_score**2
+    updated = []
+    for key, change in changes.items():
+        if any(change.values()):
+            row = progress[key]
+            for field in STATISTICS_FIELDS:
+                setattr(row, field, F(field) + change[field])
+            updated.append(row)
+    with scopes_disabled():
+        VoterProgress.objects.bulk_update(updated, STATISTICS_FIELDS)
+
+
+def recount_progress(event):
+    """Counts the progress of all voters of the event from their votes, e.g.
+    after votes were written without going through the vote writer."""
+    with scopes_disabled(), transaction.atomic():
+        VoterProgress.objects.filter(event=event).delete()
+        counts = (
+            PublicVote.objects.filter(event=event)
+            .order_by()
+            .values_list("email_hash", "submission__track_id")
+            .annotate(
+                votes=Count("id"),
+                score_sum=Sum("score"),
+                score_squares=Sum(F("score") * F("score")),
+            )
+            .iterator(chunk_size=RECOUNT_BATCH_SIZE)
+        )
+        while batch := list(itertools.islice(counts, RECOUNT_BATCH_SIZE)):
+            VoterProgress.objects.bulk_create(
+                VoterProgress(
+                    event=event,
+                    email_hash=email_hash,
+                    track_id=track_id,
+                    votes=votes,
+                    score_sum=score_sum,
+                    score_squares=score_squares,
+                )
+                for email_hash, track_id, votes, score_sum, score_squares in batch
+            )
+
+
+def get_voter_statistics(event):
+    """Returns the number of votes, the mean and the standard deviation of
+    the scores of every voter of the event, by email hash."""
+    statistics = {}
+    with scopes_disabled():
+        for email_hash, votes, score_sum, score_squares in (
+            VoterProgress.objects.filter(event=event)
+            .values_list("email_hash")
+            .annotate(Sum("votes"), Sum("score_sum"), Sum("score_squares"))
+            .order_by()
+        ):
+            if not votes:
+                continue
+            mean = score_sum / votes
+            variance = max(score_squares / votes - mean**2, 0)
+            statistics[email_hash] = (votes, mean, math.sqrt(variance))
+    return statistics
+
+
+def get_voter_progress(event, hashed_email, using=None):
+    """Returns the number of submissions the voter scored, per track."""
+    counts = Counter()
+    with scopes_disabled():
+        for track_id, votes in (
+            VoterProgress.objects.using(using)
+            .filter(event=event, email_hash=hashed_email)
+            .values_list("track_id", "votes")
+        ):
+            counts[track_id] += votes
+    return counts
+
+
+def get_progress(votable_submissions, voted, tracks=()):
+    """Returns how many of the votable submissions the voter scored and how
+    many there are, in total and in the given tracks.
+
+    The counts per track can include votes on submissions that are no longer
+    votable, or have moved to another track, so they are capped at the
+    number of votable submissions in the track."""
+    sizes = Counter(track for __, __, track in votable_submissions)
+    scored = {track: min(voted.get(track, 0), size) for track, size in sizes.items()}
+    result = {"scored": sum(scored.values()), "total": len(votable_submissions)}
+    if tracks:
+        result["filter_scored"] = sum(scored.get(track, 0) for track in tracks)
+        result["filter_total"] = sum(sizes.get(track, 0) for track in tracks)
+    else:
+        result["filter_scored"] = result["scored"]
+        result["filter_total"] = result["total"]
+    return result
@@ -0,0 +1,51 @@
+# Columns and relations needed to show each field of a submission. Anything
+# not listed here (large texts, unused foreign keys) is not loaded at all.
+FIELD_COLUMNS = {
+    "code": ("code",),
+    "title": ("title",),
+    "abstract": ("abstract",),
+    "description": ("description",),
+    "image": ("image",),
+    "image_srcset": ("image",),
+    "submission_type": ("submission_type__name",),
+    "track": ("track__name",),
+}
+FIELD_RELATIONS = {"submission_type": "submission_type", "track": "track"}
+FIELD_PREFETCHES = {"speakers": "speakers"}
+
+
+def get_displayed_fields(voting_settings, show_submission_types=True):
+    """Returns the submission fields the voting page shows with the given
+    settings."""
+    fields = {"code", "title", "abstract", "score"}
+    if not voting_settings.anonymize_speakers:
+        fields.add("speakers")
+    if voting_settings.show_session_description:
+        fields.add("description")
+    if voting_settings.show_session_image:
+        fields.add("image")
+    if show_submission_types:
+        fields.add("submission_type")
+    return fields
+
+
+def plan_submission_queryset(queryset, fields):
+    """Restricts a submission queryset to the columns, joins and prefetches
+    required to show ``fields``."""
+    # Querysets from event.submissions attach the event to every row, which
+    # reads the foreign key, so it must not be deferred.
+    columns = {"code", "event"}
+    related = []
+    prefetch = []
+    for field in fields:
+        columns.update(FIELD_COLUMNS.get(field, ()))
+        if field in FIELD_RELATIONS:
+            related.append(FIELD_RELATIONS[field])
+        if field in FIELD_PREFETCHES:
+            prefetch.append(FIELD_PREFETCHES[field])
+    queryset = queryset.only(*sorted(columns))
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    return queryset
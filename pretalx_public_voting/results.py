@@ -0,0 +1,188 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+
+from .anomalies import get_excluded_voters
+from .models import (
+    EventResult,
+    PublicVote,
+    PublicVotingSettings,
+    SubmissionResult,
+    VoteEvent,
+)
+from .progress import get_voter_statistics
+from .votes import flush_votes, is_buffering
+
+# The results of every event are counted into SubmissionResult and
+# EventResult, so that results across many events can be compared without
+# reading any votes. Counting replaces the results of an event, so it can
+# safely run repeatedly. The periodic tasks recount events with votes or vote
+# events that are newer than their results.
+RESULTS_BATCH_SIZE = 5000
+
+
+def update_results(event):
+    """Recounts the results of the event from its votes, leaving out
+    excluded voters. Every vote is also normalised with the mean and the
+    standard deviation of its voter's scores, so that harsh and generous
+    voters weigh the same."""
+    if is_buffering():
+        flush_votes()
+    # Votes that arrive while counting make the results stale right away
+    started = now()
+    voter_statistics = get_voter_statistics(event)
+    results = {}
+    voters = set()
+    with scopes_disabled():
+        votes = (
+            PublicVote.objects.filter(event=event)
+            .exclude(email_hash__in=get_excluded_voters(event))
+            .order_by()
+            .values_list("submission_id", "email_hash", "score")
+            .iterator(chunk_size=RESULTS_BATCH_SIZE)
+        )
+        for submission_id, email_hash, score in votes:
+            result = results.get(submission_id)
+            if not result:
+                result = results[submission_id] = SubmissionResult(
+                    event=event, submission_id=submission_id
+                )
+            result.votes += 1
+            result.score_sum += score
+            result.z_score_sum += get_z_score(score, voter_statistics.get(email_hash))
+            voters.add(email_hash)
+        with transaction.atomic():
+            SubmissionResult.objects.filter(event=event).delete()
+            SubmissionResult.objects.bulk_create(
+                results.values(), batch_size=RESULTS_BATCH_SIZE
+            )
+            EventResult.objects.update_or_create(
+                event=event,
+                defaults={
+                    "voters": len(voters),
+                    "votes": sum(result.votes for result in results.values()),
+                    "updated": started,
+                },
+            )
+    return len(results)
+
+
+def get_z_score(score, statistics):
+    """Voters who gave every submission the same score, or whose scores are
+    not counted yet, do not tell submissions apart."""
+    if not statistics or not statistics[2]:
+        return 0
+    __, mean, deviation = statistics
+    return (score - mean) / deviation
+
+
+def update_stale_results():
+    """Recounts the results of all events that have been voted on since
+    their results were counted, and of events that have none yet."""
+    with scopes_disabled():
+        # Both lookups stop at the first newer row, using the timestamp index
+        # of vote events and the event index of votes
+        stale = [
+            voting_settings.event
+            for voting_settings in PublicVotingSettings.objects.annotate(
+                counted=Subquery(
+                    EventResult.objects.filter(event_id=OuterRef("event_id")).values(
+                        "updated"
+                    )
+                )
+            )
+            .filter(
+                Q(counted__isnull=True)
+                | Exists(
+                    VoteEvent.objects.filter(
+                        submission__event_id=OuterRef("event_id"),
+                        timestamp__gt=OuterRef("counted"),
+                    )
+                )
+                | Exists(
+                    PublicVote.objects.filter(
+                        event_id=OuterRef("event_id"), timestamp__gt=OuterRef("counted")
+                    )
+                )
+            )
+            .select_related("event")
+        ]
+    for event in stale:
+        update_results(event)
+    return stale
+
+
+def get_ranks(values):
+    """Returns the rank of every value, highest first, with equal values
+    sharing the better rank."""
+    ordered = sorted(values, reverse=True)
+    first = {}
+    for position, value in enumerate(ordered, start=1):
+        first.setdefault(value, position)
+    return [first[value] for value in values]
+
+
+def get_event_results(events):
+    """Returns the counted results of the events, with the mean score, the
+    mean z-score and the ranks by both of every voted submission, ranked
+    within its event."""
+    with scopes_disabled():
+        totals = {
+            result.event_id: result
+            for result in EventResult.objects.filter(event__in=events)
+        }
+        submissions = {}
+        for result in (
+            SubmissionResult.objects.filter(event__in=events, votes__gt=0)
+            .select_related("submission")
+            .only(
+                "event_id",
+                "votes",
+                "score_sum",
+                "z_score_sum",
+                "submission__code",
+                "submission__title",
+            )
+            .order_by("submission__code")
+        ):
+            submissions.setdefault(result.event_id, []).append(
+                {
+                    "code": result.submission.code,
+                    "title": result.submission.title,
+                    "votes": result.votes,
+                    "score_sum": result.score_sum,
+                    "mean": result.score_sum / result.votes,
+                    "normalized": result.z_score_sum / result.votes,
+                }
+            )
+    results = []
+    for event in events:
+        total = totals.get(event.pk)
+        rows = submissions.get(event.pk, [])
+        ranks = get_ranks([row["mean"] for row in rows])
+        normalized_ranks = get_ranks([row["normalized"] for row in rows])
+        for row, rank, normalized_rank in zip(
+            rows, ranks, normalized_ranks, strict=True
+        ):
+            row["rank"] = rank
+            row["normalized_rank"] = normalized_rank
+        rows.sort(key=lambda row: (row["rank"], row["code"]))
+        results.append(
+            {
+                "event": event,
+                "voters": total.voters if total else 0,
+                "votes": total.votes if total else 0,
+                "votes_per_voter": (
+                    total.votes / total.voters if total and total.voters else None
+                ),
+                "mean": (
+                    sum(row["score_sum"] for row in rows) / total.votes
+                    if total and total.votes
+                    else None
+                ),
+                "updated": total.updated if total else None,
+                "submissions": rows,
+            }
+        )
+    return results
@@ -0,0 +1,37 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .utils import get_plugin_setting
+
+# Voters who just voted read from the primary database for a while, so that
+# they see their own votes even if the replica lags behind.
+RECENT_VOTE_COOKIE = "pretalx_public_voting_recent_vote"
+DEFAULT_REPLICA_STICKINESS = 30
+
+
+def get_replica_database():
+    """Returns the database alias configured with ``replica_database``, or
+    the default database if there is none."""
+    alias = get_plugin_setting("replica_database")
+    if alias and alias in connections:
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+def get_read_database(request):
+    if request.method not in ("GET", "HEAD") or request.COOKIES.get(RECENT_VOTE_COOKIE):
+        return DEFAULT_DB_ALIAS
+    return get_replica_database()
+
+
+def mark_recent_vote(response):
+    if get_replica_database() != DEFAULT_DB_ALIAS:
+        response.set_cookie(
+            RECENT_VOTE_COOKIE,
+            "1",
+            max_age=int(
+                get_plugin_setting("replica_stickiness") or DEFAULT_REPLICA_STICKINESS
+            ),
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
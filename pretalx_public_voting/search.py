@@ -0,0 +1,154 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django_scopes import scopes_disabled
+
+from pretalx.submission.models import SubmissionStates
+
+from .models import PublicVotingSettings, SearchDocument
+
+# Voters search the text shown on the voting page. The documents table holds
+# that text, and the full-text index over it is database specific: a
+# generated tsvector column with a GIN index on PostgreSQL, and an FTS5 table
+# on SQLite. Searches only ever read the index.
+FTS_TABLE = "pretalx_public_voting_search_fts"
+INDEX_BATCH_SIZE = 500
+MAX_TERMS = 8
+
+
+def create_search_index(schema_editor):
+    """Creates the full-text index, unless it exists already. Migrations
+    create it from a frozen copy of this, see 0013_searchdocument, so any
+    change here needs a new migration, too."""
+    table = SearchDocument._meta.db_table
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS pretalx_public_voting_search_vector "
+            f"ON {table} USING gin (vector)"
+        )
+    elif vendor == "sqlite":
+        # An external content table: the index reads the text from the
+        # documents table, and triggers keep it up to date.
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"text, content='{table}', content_rowid='id')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {table} "  # noqa: S608 -- constant names
+            f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {table} "  # noqa: S608 -- constant names
+            f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+            "VALUES ('delete', old.id, old.text); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON {table} "  # noqa: S608 -- constant names
+            f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+            "VALUES ('delete', old.id, old.text); "
+            f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END"
+        )
+
+
+def get_search_text(submission, voting_settings):
+    parts = [submission.title, submission.abstract]
+    if voting_settings.show_session_description:
+        parts.append(submission.description)
+    if not voting_settings.anonymize_speakers:
+        parts.extend(
+            speaker.get_display_name() for speaker in submission.speakers.all()
+        )
+    return "\n".join(part for part in parts if part)
+
+
+def index_submissions(event, submission_pks):
+    """Updates the search documents of the given submissions, and removes
+    those that voters can no longer vote on."""
+    voting_settings = PublicVotingSettings.objects.filter(event=event).first()
+    if not voting_settings:
+        return
+    with scopes_disabled():
+        submissions = event.submissions.filter(
+            pk__in=submission_pks, state=SubmissionStates.SUBMITTED
+        ).prefetch_related("speakers")
+        documents = [
+            SearchDocument(
+                submission=submission,
+                event=event,
+                text=get_search_text(submission, voting_settings),
+            )
+            for submission in submissions
+        ]
+        SearchDocument.objects.filter(submission_id__in=submission_pks).exclude(
+            submission__in=[document.submission for document in documents]
+        ).delete()
+        SearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=("submission",),
+            update_fields=("text",),
+        )
+
+
+def rebuild_search_index(event):
+    """Indexes all submissions of the event, e.g. after the settings that
+    decide which texts voters see have changed."""
+    with scopes_disabled():
+        submission_pks = list(
+            event.submissions.filter(state=SubmissionStates.SUBMITTED).values_list(
+                "pk", flat=True
+            )
+        )
+        with transaction.atomic():
+            SearchDocument.objects.filter(event=event).exclude(
+                submission_id__in=submission_pks
+            ).delete()
+            for start in range(0, len(submission_pks), INDEX_BATCH_SIZE):
+                index_submissions(
+                    event, submission_pks[start : start + INDEX_BATCH_SIZE]
+                )
+
+
+def get_search_terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def search_submissions(event, query, using=None):
+    """Returns the primary keys of all submissions that contain every term of
+    the query, as a word or the start of a word, or None without terms."""
+    terms = get_search_terms(query)
+    if not terms:
+        return None
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    table = SearchDocument._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = (
+            f"SELECT submission_id FROM {table} "  # noqa: S608 -- constant names
+            "WHERE event_id = %s AND vector @@ to_tsquery('simple', %s)"
+        )
+        params = [event.pk, " & ".join(f"{term}:*" for term in terms)]
+    elif connection.vendor == "sqlite":
+        sql = (
+            f"SELECT document.submission_id FROM {FTS_TABLE} "  # noqa: S608 -- constant names
+            f"JOIN {table} document ON document.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND document.event_id = %s"
+        )
+        params = [" ".join(f'"{term}"*' for term in terms), event.pk]
+    else:
+        # There is no full-text index on other databases
+        with scopes_disabled():
+            return set(
+                SearchDocument.objects.using(using)
+                .filter(event=event)
+                .filter(*(Q(text__icontains=term) for term in terms))
+                .values_list("submission_id", flat=True)
+            )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
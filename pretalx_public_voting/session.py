@@ -0,0 +1,52 @@
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .utils import event_unsign, get_plugin_setting
+
+# Voters who opened their voting link once are recognised by this cookie, so
+# that signup and share links take them straight back to their voting list
+# instead of sending them another mail.
+VOTER_COOKIE = "pretalx_public_voting_voter"
+DEFAULT_VOTER_SESSION_AGE = 60 * 60 * 24 * 30
+
+
+def get_cookie_path(event):
+    # Only send the cookie to the voting pages of the event it belongs to
+    return reverse(
+        "plugins:pretalx_public_voting:signup", kwargs={"event": event.slug}
+    ).removesuffix("signup/")
+
+
+def get_voter_session(request):
+    """Returns the signed voter from the voter cookie, if it is valid for the
+    current event."""
+    signed_user = request.COOKIES.get(VOTER_COOKIE)
+    if signed_user and event_unsign(signed_user, request.event):
+        return signed_user
+    return None
+
+
+def set_voter_session(request, response, signed_user):
+    if request.COOKIES.get(VOTER_COOKIE) != signed_user:
+        response.set_cookie(
+            VOTER_COOKIE,
+            signed_user,
+            max_age=int(
+                get_plugin_setting("voter_session_age") or DEFAULT_VOTER_SESSION_AGE
+            ),
+            path=get_cookie_path(request.event),
+            secure=request.is_secure(),
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+def get_voter_url(request, signed_user):
+    url = reverse(
+        "plugins:pretalx_public_voting:talks",
+        kwargs={"event": request.event.slug, "signed_user": signed_user},
+    )
+    if submission_code := request.GET.get("submission_code"):
+        url += "?" + urlencode({"submission_code": submission_code})
+    return url
@@ -1,9 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from pretalx.common.signals import register_data_exporters
+from pretalx.common.signals import (
+    minimum_interval,
+    periodic_task,
+    register_data_exporters,
+)
+from pretalx.event.models import Event
 from pretalx.orga.signals import event_copy_data, nav_event_settings
+from pretalx.submission.models import Submission, SubmissionType, Track
+
+from .analytics import update_vote_rollups
+from .cache import (
+    EVENT_VERSION,
+    SETTINGS_VERSION,
+    SUBMISSIONS_VERSION,
+    bump_version,
+    is_voting_event,
+)
+from .indexes import update_vote_indexes
+from .models import PublicVotingSettings
+from .results import update_stale_results
+from .search import index_submissions
+from .thumbnails import generate_missing_thumbnails
+from .votes import flush_votes
+from .warmup import warm_up_upcoming
 
 
 @receiver(nav_event_settings)
@@ -37,3 +61,109 @@ def copy_event_settings(sender, other, **kwargs):
         old_settings.id = None
         old_settings.event = sender
         old_settings.save()
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+@receiver(post_save, sender=SubmissionType)
+@receiver(post_delete, sender=SubmissionType)
+def bump_submissions_version(sender, instance, **kwargs):
+    event = getattr(instance, "event", None)
+    if is_voting_event(event):
+        bump_version(event, SUBMISSIONS_VERSION)
+
+
+@receiver(m2m_changed, sender=Submission.speakers.through)
+def bump_submissions_version_on_speaker_change(sender, instance, **kwargs):
+    if kwargs.get("action", "").startswith("post_") and isinstance(
+        instance, Submission
+    ):
+        bump_submissions_version(sender, instance)
+
+
+@receiver(post_save, sender=Submission)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    if not raw and is_voting_event(instance.event):
+        index_submissions(instance.event, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Submission.speakers.through)
+def update_search_document_on_speaker_change(sender, instance, **kwargs):
+    if kwargs.get("action", "").startswith("post_") and isinstance(
+        instance, Submission
+    ):
+        update_search_document(sender, instance)
+
+
+@receiver(post_save, sender=PublicVotingSettings)
+def bump_settings_version(sender, instance, **kwargs):
+    bump_version(instance.event, SETTINGS_VERSION)
+
+
+@receiver(post_save, sender=Event)
+def bump_event_version(sender, instance, **kwargs):
+    # The cached signup and thanks pages show the event's name, logo and colours
+    if is_voting_event(instance):
+        bump_version(instance, EVENT_VERSION)
+
+
+@receiver(post_save, sender=PublicVotingSettings)
+def rebuild_search_index(sender, instance, raw=False, **kwargs):
+    from .tasks import rebuild_event_search_index  # noqa: PLC0415 -- tasks import models
+
+    # The settings decide whether descriptions and speaker names are shown,
+    # and thereby searchable.
+    if not raw:
+        transaction.on_commit(
+            lambda: rebuild_event_search_index.apply_async(
+                kwargs={"event_id": instance.event_id}, ignore_result=True
+            )
+        )
+
+
+@receiver(m2m_changed, sender=PublicVotingSettings.limit_tracks.through)
+@receiver(m2m_changed, sender=PublicVotingSettings.limit_submission_types.through)
+def bump_settings_version_on_limit_change(sender, instance, **kwargs):
+    if kwargs.get("action", "").startswith("post_") and isinstance(
+        instance, PublicVotingSettings
+    ):
+        bump_settings_version(sender, instance)
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=1)
+def flush_vote_buffer(sender, **kwargs):
+    # Also runs when the vote buffer has been turned off, to flush leftovers
+    flush_votes()
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=1)
+def update_rollups(sender, **kwargs):
+    update_vote_rollups()
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=5)
+def warm_up_voting(sender, **kwargs):
+    warm_up_upcoming()
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=1)
+def update_thumbnails(sender, **kwargs):
+    generate_missing_thumbnails()
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=5)
+def update_partial_vote_indexes(sender, **kwargs):
+    update_vote_indexes()
+
+
+@receiver(periodic_task)
+@minimum_interval(minutes_after_success=5)
+def update_voting_results(sender, **kwargs):
+    update_stale_results()
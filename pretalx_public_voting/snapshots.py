@@ -0,0 +1,187 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Count, Exists, Q
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from pretalx.common.templatetags.rich_text import rich_text
+from pretalx.submission.models import SubmissionStates
+
+from .cache import (
+    EVENT_VERSION,
+    SETTINGS_VERSION,
+    SUBMISSIONS_VERSION,
+    get_or_build,
+    get_versions,
+)
+from .models import PublicVotingSettings
+
+# All snapshots are keyed by the versions of the data they are built from, so
+# they never need to be invalidated, and only expire to free memory. They are
+# built from the primary database, as a lagging replica could still return
+# data of an older version. Card fragments that voting pages render from a
+# replica are only kept for REPLICA_SNAPSHOT_TIMEOUT.
+SNAPSHOT_TIMEOUT = 24 * 3600
+REPLICA_SNAPSHOT_TIMEOUT = 60
+CARD_TEMPLATE = "pretalx_public_voting/card.html"
+CARD_FRAGMENT = "public_voting_card"
+# Stands in for the CSRF token in cached pages, see get_page_key
+CSRF_PLACEHOLDER = "public-voting-csrf-token"
+
+
+def get_snapshot_key(event, name, *versions):
+    return "_".join(("public_voting", name, str(event.pk), *map(str, versions)))
+
+
+def get_content_version(event):
+    """Changes whenever the submissions or the voting settings change."""
+    return "-".join(
+        str(version)
+        for version in get_versions(event, SUBMISSIONS_VERSION, SETTINGS_VERSION)
+    )
+
+
+def get_voting_settings(event):
+    """Returns the voting settings of the event, or None, and attaches them
+    to the event, so that ``event.public_vote_settings`` does not query."""
+    (version,) = get_versions(event, SETTINGS_VERSION)
+    voting_settings = get_or_build(
+        get_snapshot_key(event, "settings", version),
+        lambda: PublicVotingSettings.objects.filter(event=event).first(),
+        SNAPSHOT_TIMEOUT,
+    )
+    if voting_settings:
+        event.public_vote_settings = voting_settings
+    return voting_settings
+
+
+def get_intro_html(event):
+    """Returns the intro text of the voting settings, rendered in the
+    current language."""
+    (version,) = get_versions(event, SETTINGS_VERSION)
+    language = translation.get_language()
+    html = get_or_build(
+        get_snapshot_key(event, "intro", language, version),
+        lambda: str(rich_text(event.public_vote_settings.text)),
+        SNAPSHOT_TIMEOUT,
+    )
+    return mark_safe(html)  # noqa: S308 -- cleaned by rich_text
+
+
+def get_page_key(request, name):
+    """Pages that look the same for all anonymous visitors are cached per
+    language and host. They are rendered with CSRF_PLACEHOLDER as CSRF
+    token, which every response replaces with the token of its visitor."""
+    versions = get_versions(request.event, SETTINGS_VERSION, EVENT_VERSION)
+    return get_snapshot_key(
+        request.event,
+        "page",
+        name,
+        translation.get_language(),
+        request.get_host(),
+        *versions,
+    )
+
+
+def get_votable_submissions(event):
+    """Returns the primary key, code and track of every submission voters
+    can vote on, ordered by primary key."""
+
+    def build():
+        voting_settings = event.public_vote_settings
+        limit_tracks = PublicVotingSettings.limit_tracks.through.objects.filter(
+            publicvotingsettings_id=voting_settings.pk
+        )
+        limit_types = (
+            PublicVotingSettings.limit_submission_types.through.objects.filter(
+                publicvotingsettings_id=voting_settings.pk
+            )
+        )
+        return list(
+            event.submissions.filter(state=SubmissionStates.SUBMITTED)
+            .filter(~Exists(limit_tracks) | Q(track__in=limit_tracks.values("track")))
+            .filter(
+                ~Exists(limit_types)
+                | Q(submission_type__in=limit_types.values("submissiontype"))
+            )
+            .order_by("pk")
+            .values_list("pk", "code", "track_id")
+        )
+
+    return get_or_build(
+        get_snapshot_key(event, "votable", get_content_version(event)),
+        build,
+        SNAPSHOT_TIMEOUT,
+    )
+
+
+def get_facets(event):
+    """Returns the tracks voters can filter by, with their number of
+    submissions, and the number of session types."""
+
+    def build():
+        tracks = event.public_vote_settings.limit_tracks.all()
+        if not tracks.exists():
+            tracks = event.tracks.all()
+        tracks = list(
+            tracks.annotate(
+                count=Count(
+                    "submissions",
+                    distinct=True,
+                    filter=Q(
+                        event=event, submissions__state=SubmissionStates.SUBMITTED
+                    ),
+                )
+            ).order_by("-count")
+        )
+        return {
+            # There is nothing to filter with only one track
+            "tracks": tracks if len(tracks) > 1 else [],
+            "submission_types": event.submission_types.count(),
+        }
+
+    return get_or_build(
+        get_snapshot_key(event, "facets", get_content_version(event)),
+        build,
+        SNAPSHOT_TIMEOUT,
+    )
+
+
+def get_fragment_cache():
+    # The same cache that the {% cache %} template tag uses
+    try:
+        return caches["template_fragments"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def get_card_key(submission, locale, content_version, show_submission_types):
+    return make_template_fragment_key(
+        CARD_FRAGMENT, [submission.pk, locale, content_version, show_submission_types]
+    )
+
+
+def render_cards(event, submissions, show_submission_types):
+    """Renders and caches the voter-independent part of the cards of the
+    given submissions in all locales of the event, like the voting page
+    would."""
+    content_version = get_content_version(event)
+    context = {
+        "event": event,
+        "voting_settings": event.public_vote_settings,
+        "show_submission_types": show_submission_types,
+    }
+    for locale in event.locales:
+        with translation.override(locale):
+            get_fragment_cache().set_many(
+                {
+                    get_card_key(
+                        submission, locale, content_version, show_submission_types
+                    ): render_to_string(
+                        CARD_TEMPLATE, {**context, "submission": submission}
+                    )
+                    for submission in submissions
+                },
+                SNAPSHOT_TIMEOUT,
+            )
@@ -1,25 +1,227 @@
+const MAX_RENDERED_CARDS = 60
+
+const setupProgressiveLoading = (form) => {
+  const list = form.querySelector("#submission-list")
+  const sentinel = form.querySelector("#submission-list-sentinel")
+  const template = document.querySelector("#submission-card-template")
+  const placeholder = template.content.querySelector("input[type='radio']").name.split("-")[0]
+  let nextUrl = form.getAttribute("data-pretalx-voting-next-url")
+  let loading = false
+
+  // Pagination is only for voters without JavaScript
+  form.querySelector("#submission-list-pagination").classList.add("d-none")
+
+  // Cards far away from the viewport are replaced by spacers of the same
+  // height and kept as HTML strings, so that the DOM stays small on phones
+  // even after scrolling through hundreds of submissions.
+  const topSpacer = document.createElement("div")
+  const bottomSpacer = document.createElement("div")
+  list.prepend(topSpacer)
+  list.append(bottomSpacer)
+  const above = []
+  const below = []
+
+  const cardHeight = (card) => {
+    const style = window.getComputedStyle(card)
+    return card.getBoundingClientRect().height + parseFloat(style.marginTop) + parseFloat(style.marginBottom)
+  }
+  const updateSpacers = () => {
+    topSpacer.style.height = `${above.reduce((sum, entry) => sum + entry.height, 0)}px`
+    bottomSpacer.style.height = `${below.reduce((sum, entry) => sum + entry.height, 0)}px`
+  }
+  const stash = (card, stack) => {
+    // Persist the current selection in the markup before we throw the node away
+    card.querySelectorAll("input[type='radio']").forEach((input) => input.toggleAttribute("checked", input.checked))
+    stack.push({ html: card.outerHTML, height: cardHeight(card) })
+    card.remove()
+  }
+  const unstash = (entry) => {
+    const wrapper = document.createElement("div")
+    wrapper.innerHTML = entry.html
+    return wrapper.firstElementChild
+  }
+  const cards = () => list.querySelectorAll(".submission-card")
+
+  const recycle = () => {
+    const margin = window.innerHeight
+    while (above.length && topSpacer.getBoundingClientRect().bottom > -margin) {
+      topSpacer.after(unstash(above.pop()))
+    }
+    while (below.length && bottomSpacer.getBoundingClientRect().top < window.innerHeight + margin) {
+      bottomSpacer.before(unstash(below.pop()))
+    }
+    let rendered = cards()
+    while (rendered.length > MAX_RENDERED_CARDS) {
+      const first = rendered[0]
+      const last = rendered[rendered.length - 1]
+      if (first.getBoundingClientRect().bottom < -margin) {
+        stash(first, above)
+      } else if (last.getBoundingClientRect().top > window.innerHeight + margin) {
+        stash(last, below)
+      } else {
+        break
+      }
+      rendered = cards()
+    }
+    updateSpacers()
+  }
+
+  const fillField = (card, name, value, html = false) => {
+    const field = card.querySelector(`[data-pretalx-voting-field='${name}']`)
+    if (!field || !value) return
+    field.classList.remove("d-none")
+    const target = field.querySelector("span") || field
+    if (html) {
+      target.innerHTML = value // Rendered and sanitised on the server
+    } else {
+      target.textContent = value
+    }
+  }
+  const renderCard = (submission) => {
+    const wrapper = document.createElement("div")
+    wrapper.innerHTML = template.innerHTML.replaceAll(placeholder, submission.code)
+    const card = wrapper.firstElementChild
+    fillField(card, "title", submission.title)
+    fillField(card, "speakers", submission.speakers)
+    fillField(card, "submission_type", submission.submission_type)
+    fillField(card, "abstract", submission.abstract || "-", true)
+    fillField(card, "description", submission.description, true)
+    if (submission.image) {
+      const image = card.querySelector("[data-pretalx-voting-field='image'] img")
+      if (submission.image_srcset) {
+        image.srcset = submission.image_srcset
+        image.sizes = image.dataset.sizes
+      }
+      image.src = submission.image
+      card.querySelector("[data-pretalx-voting-field='image']").classList.remove("d-none")
+    }
+    if (submission.score !== null && submission.score !== undefined) {
+      const input = card.querySelector(`input[type='radio'][value='${submission.score}']`)
+      if (input) input.defaultChecked = true
+    }
+    return card
+  }
+
+  const loadMore = () => {
+    if (loading || !nextUrl || below.length) return
+    loading = true
+    fetch(nextUrl, { headers: { Accept: "application/json" } })
+      .then((response) => response.json())
+      .then((data) => {
+        data.results.forEach((submission) => bottomSpacer.before(renderCard(submission)))
+        nextUrl = data.next
+        recycle()
+      })
+      .catch((error) => console.error("Failed to load more submissions", { nextUrl, error }))
+      .finally(() => {
+        loading = false
+        if (!nextUrl) observer.disconnect()
+      })
+  }
+
+  const observer = new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) loadMore()
+  }, { rootMargin: "600px" })
+  if (nextUrl) observer.observe(sentinel)
+
+  let scheduled = false
+  window.addEventListener("scroll", () => {
+    if (scheduled) return
+    scheduled = true
+    window.requestAnimationFrame(() => {
+      scheduled = false
+      recycle()
+      if (!below.length && sentinel.getBoundingClientRect().top < window.innerHeight + 600) loadMore()
+    })
+  }, { passive: true })
+}
+
 onReady(() => {
+  const form = document.querySelector("form#voting-form")
+  if (!form) return
   const saveIndicator = document.querySelector("#js-save")
   const saving = saveIndicator.querySelector(".pretalx-vote-badge-primary")
   const saved = saveIndicator.querySelector(".pretalx-vote-badge-success")
+  const failed = saveIndicator.querySelector(".pretalx-vote-badge-danger")
   const savingSpinner = document.querySelector(".fa-spinner")
-  const form = document.querySelector("form#voting-form")
 
-  document.querySelectorAll('input[type="radio"]').forEach((input) => {
-    input.addEventListener('change', (event) => {
-      savingSpinner.classList.remove("d-none")
-      saved.classList.add("d-none")
-      saving.classList.remove("d-none")
-      window.setTimeout(() => {
-          fetch(form.action, {
-            method: 'POST',
-            body: new FormData(form),
-          }).then((res) => {
-            savingSpinner.classList.add("d-none")
-            saved.classList.remove("d-none")
-            saving.classList.add("d-none")
-          })
-      }, 5)
+  // Count first scores in the progress line right away. Options that were
+  // checked when the card was rendered carry the checked attribute, so a
+  // group without one had no score before its first change.
+  const scored = new Set()
+  const updateProgress = (name) => {
+    if (scored.has(name)) return
+    scored.add(name)
+    const options = form.querySelectorAll(`input[type="radio"][name="${name}"]`)
+    if (Array.from(options).some((option) => option.defaultChecked)) return
+    document.querySelectorAll("[data-pretalx-voting-progress]").forEach((counter) => {
+      const step = counter.dataset.pretalxVotingProgress === "scored" ? 1 : -1
+      counter.textContent = Math.max(parseInt(counter.textContent, 10) + step, 0)
     })
+  }
+
+  // Every request carries an ID, so that the server can skip retries, and the
+  // ID of this tab with a sequence number, so that it can skip requests that
+  // arrive after a newer one from this tab. Every request sends all scores of
+  // the form, and only one is in flight at a time: changes made meanwhile are
+  // sent together once it returns, so an older request can never be saved
+  // after a newer one.
+  const requestId = () => window.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(16).slice(2)}`
+  const clientId = requestId()
+  let sequence = 0
+  const showState = (state) => {
+    savingSpinner.classList.toggle("d-none", state !== "saving")
+    saving.classList.toggle("d-none", state !== "saving")
+    saved.classList.toggle("d-none", state !== "saved")
+    failed.classList.toggle("d-none", state !== "failed")
+  }
+  const send = (body, attempt = 0) => fetch(form.action, { method: 'POST', body })
+    .catch((error) => {
+      if (attempt >= 2) throw error
+      return new Promise((resolve) => window.setTimeout(resolve, 1000 * (attempt + 1)))
+        .then(() => send(body, attempt + 1))
+    })
+
+  let inFlight = false
+  let pending = false
+  const save = () => {
+    if (inFlight) {
+      pending = true
+      return
+    }
+    inFlight = true
+    pending = false
+    const body = new FormData(form)
+    body.append("request_id", requestId())
+    body.append("client_id", clientId)
+    body.append("sequence", ++sequence)
+    send(body)
+      .then((response) => {
+        if (!response.ok) throw new Error(`Saving failed with status ${response.status}`)
+        return response.json()
+      })
+      .then((data) => {
+        if (pending) return
+        // A repeated request was saved the first time it arrived
+        showState(data.skipped && data.reason !== "repeated" ? "failed" : "saved")
+      })
+      .catch((error) => {
+        console.error("Failed to save vote", error)
+        if (!pending) showState("failed")
+      })
+      .finally(() => {
+        inFlight = false
+        if (pending) save()
+      })
+  }
+
+  // Listen on the form, so that cards added while scrolling are included
+  form.addEventListener('change', (event) => {
+    if (!event.target.matches('input[type="radio"]')) return
+    updateProgress(event.target.name)
+    showState("saving")
+    window.setTimeout(save, 5)
   })
+
+  if (form.hasAttribute("data-pretalx-voting-progressive")) setupProgressiveLoading(form)
 })
@@ -0,0 +1,30 @@
+from django_scopes import scopes_disabled
+
+from pretalx.celery_app import app
+from pretalx.event.models import Event
+from pretalx.submission.models import Submission
+
+from .search import rebuild_search_index
+from .thumbnails import create_thumbnails
+from .votes import flush_votes
+
+
+@app.task(name="pretalx_public_voting.generate_thumbnails")
+def generate_thumbnails(*, submission_id):
+    with scopes_disabled():
+        submission = Submission.objects.filter(pk=submission_id).first()
+    if submission and submission.image:
+        create_thumbnails(submission.image)
+
+
+@app.task(name="pretalx_public_voting.flush_vote_buffer")
+def flush_vote_buffer():
+    flush_votes()
+
+
+@app.task(name="pretalx_public_voting.rebuild_search_index")
+def rebuild_event_search_index(*, event_id):
+    with scopes_disabled():
+        event = Event.objects.filter(pk=event_id).first()
+    if event:
+        rebuild_search_index(event)
@@ -0,0 +1,165 @@
+from hashlib import blake2b
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django_scopes import scopes_disabled
+
+from pretalx.celery_app import app
+from pretalx.common.image import load_img
+from pretalx.submission.models import Submission, SubmissionStates
+
+from .indexes import get_open_event_ids
+from .models import ImageThumbnails
+
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_SIZES = "(min-width: 992px) 960px, 100vw"
+THUMBNAIL_CACHE_TIMEOUT = 7 * 24 * 3600
+THUMBNAIL_PENDING_TIMEOUT = 300
+# Images to generate thumbnails for per run of the periodic task
+THUMBNAIL_BATCH_SIZE = 50
+WEBP_SETTINGS = {"format": "WEBP", "quality": 80, "method": 4}
+
+
+def get_image_digest(image):
+    # pretalx adds a random hash to every uploaded file name, so a changed
+    # image always gets a new name, and new thumbnail names with it.
+    return blake2b(image.name.encode(), digest_size=10).hexdigest()
+
+
+def get_thumbnail_name(image, width):
+    return f"public_voting/thumbnails/{get_image_digest(image)}-{width}w.webp"
+
+
+def get_cache_key(digest):
+    return f"public_voting_thumbnails_{digest}"
+
+
+def create_thumbnails(image):
+    """Stores resized WebP versions of ``image`` for all widths that are
+    smaller than the image itself, records them, and returns those widths."""
+    from PIL import Image, ImageOps  # noqa: PLC0415 -- like pretalx.common.image
+
+    with image.open("rb") as source:
+        img = load_img(source)
+        if img:
+            img.load()
+            img = ImageOps.exif_transpose(img)
+    widths = []
+    for width in THUMBNAIL_WIDTHS:
+        if not img or width >= img.width:
+            break
+        name = get_thumbnail_name(image, width)
+        if not default_storage.exists(name):
+            thumbnail = img.copy()
+            thumbnail.thumbnail((width, img.height), resample=Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            thumbnail.save(buffer, **WEBP_SETTINGS)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        widths.append(width)
+    # Images that cannot be read are recorded without thumbnails, so that
+    # they are not tried again.
+    digest = get_image_digest(image)
+    width = img.width if img else 0
+    ImageThumbnails.objects.update_or_create(
+        digest=digest, defaults={"width": width, "widths": widths}
+    )
+    cache.set(get_cache_key(digest), (width, widths), THUMBNAIL_CACHE_TIMEOUT)
+    return widths
+
+
+def get_thumbnails(digests):
+    """Returns the width of the image and the widths of its thumbnails by
+    digest, for all images whose thumbnails have been generated."""
+    keys = {get_cache_key(digest): digest for digest in digests}
+    thumbnails = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    if missing := set(digests) - set(thumbnails):
+        stored = {
+            digest: (width, widths)
+            for digest, width, widths in ImageThumbnails.objects.filter(
+                digest__in=missing
+            ).values_list("digest", "width", "widths")
+        }
+        cache.set_many(
+            {get_cache_key(digest): value for digest, value in stored.items()},
+            THUMBNAIL_CACHE_TIMEOUT,
+        )
+        thumbnails.update(stored)
+    return thumbnails
+
+
+def schedule_thumbnails(pk, digest):
+    from .tasks import generate_thumbnails  # noqa: PLC0415 -- tasks import models
+
+    # Without a worker, tasks run right away, which would decode the image
+    # in the request. generate_missing_thumbnails catches up on those.
+    if app.conf.task_always_eager:
+        return
+    if cache.add(f"{get_cache_key(digest)}_pending", True, THUMBNAIL_PENDING_TIMEOUT):
+        generate_thumbnails.apply_async(
+            kwargs={"submission_id": pk}, ignore_result=True
+        )
+
+
+def get_srcsets(submissions):
+    """Returns the ``srcset`` attribute for the images of all given
+    submissions by their primary key. Missing thumbnails are generated in
+    the background, and their images are shown at full size until then."""
+    images = {
+        submission.pk: submission.image
+        for submission in submissions
+        if submission.image
+    }
+    digests = {pk: get_image_digest(image) for pk, image in images.items()}
+    thumbnails = get_thumbnails(set(digests.values()))
+    srcsets = {}
+    for pk, digest in digests.items():
+        if digest not in thumbnails:
+            schedule_thumbnails(pk, digest)
+            continue
+        width, widths = thumbnails[digest]
+        if widths:
+            image = images[pk]
+            srcsets[pk] = ", ".join(
+                [
+                    *(
+                        f"{default_storage.url(get_thumbnail_name(image, size))} {size}w"
+                        for size in widths
+                    ),
+                    f"{image.url} {width}w",
+                ]
+            )
+    return srcsets
+
+
+def generate_missing_thumbnails(limit=THUMBNAIL_BATCH_SIZE):
+    """Generates missing thumbnails of the submissions of events with open
+    voting that show images, at most ``limit`` images per run. Returns the
+    number of images."""
+    with scopes_disabled():
+        submissions = list(
+            Submission.objects.filter(
+                event_id__in=get_open_event_ids(),
+                event__public_vote_settings__show_session_image=True,
+                state=SubmissionStates.SUBMITTED,
+            )
+            .exclude(image="")
+            .exclude(image__isnull=True)
+            .only("pk", "image")
+            .order_by("pk")
+        )
+    digests = {
+        submission.pk: get_image_digest(submission.image) for submission in submissions
+    }
+    done = set(
+        ImageThumbnails.objects.filter(digest__in=digests.values()).values_list(
+            "digest", flat=True
+        )
+    )
+    missing = [
+        submission for submission in submissions if digests[submission.pk] not in done
+    ]
+    for submission in missing[:limit]:
+        create_thumbnails(submission.image)
+    return len(missing[:limit])
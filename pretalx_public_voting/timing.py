@@ -0,0 +1,139 @@
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import nullcontext
+
+from django.dispatch import Signal
+
+from .utils import get_plugin_setting
+
+logger = logging.getLogger(__name__)
+
+# Sent for every finished span when the ``signal`` sink is enabled, with the
+# keyword arguments ``name``, ``duration`` (in seconds) and ``event``.
+timing_span = Signal()
+
+# Histogram buckets, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class SpanMetrics:
+    """Collects span durations as Prometheus histograms.
+
+    The numbers are kept per process, so with several workers, every worker
+    reports its own share."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, name, duration, event=None):
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                (name, event),
+                {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0},
+            )
+            index = bisect.bisect_left(self.buckets, duration)
+            if index < len(self.buckets):
+                histogram["buckets"][index] += 1
+            histogram["sum"] += duration
+            histogram["count"] += 1
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def render(self, event=None):
+        metric = "pretalx_public_voting_span_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in the phases of public voting requests.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self.lock:
+            histograms = sorted(
+                (name, histogram)
+                for (name, span_event), histogram in self.histograms.items()
+                if span_event == event
+            )
+            for name, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(
+                    self.buckets, histogram["buckets"], strict=True
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}'
+                    )
+                lines.extend(
+                    (
+                        f'{metric}_bucket{{span="{name}",le="+Inf"}} {histogram["count"]}',
+                        f'{metric}_sum{{span="{name}"}} {histogram["sum"]:.6f}',
+                        f'{metric}_count{{span="{name}"}} {histogram["count"]}',
+                    )
+                )
+        return "\n".join(lines) + "\n"
+
+
+metrics = SpanMetrics()
+
+
+def log_sink(name, duration, event):
+    logger.info("span=%s duration_ms=%.3f event=%s", name, duration * 1000, event)
+
+
+def signal_sink(name, duration, event):
+    timing_span.send(sender=None, name=name, duration=duration, event=event)
+
+
+SINKS = {"log": log_sink, "metrics": metrics.observe, "signal": signal_sink}
+
+
+@functools.lru_cache
+def parse_sinks(value):
+    return tuple(
+        SINKS[name.strip()]
+        for name in (value or "").split(",")
+        if name.strip() in SINKS
+    )
+
+
+def get_sinks():
+    """Returns the sinks enabled with the ``timing`` plugin setting, which
+    takes a comma-separated list of ``log``, ``metrics`` and ``signal``."""
+    return parse_sinks(get_plugin_setting("timing"))
+
+
+class Span:
+    __slots__ = ("event", "name", "sinks", "started")
+
+    def __init__(self, name, event, sinks):
+        self.name = name
+        self.event = event
+        self.sinks = sinks
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.started
+        for sink in self.sinks:
+            sink(self.name, duration, self.event)
+        return False
+
+
+NO_SPAN = nullcontext()
+
+
+def span(name, event=None):
+    """Times the wrapped block and reports it to all enabled sinks.
+
+    Returns a shared no-op context manager when timing is disabled."""
+    sinks = get_sinks()
+    if not sinks:
+        return NO_SPAN
+    return Span(name, getattr(event, "slug", event), sinks)
@@ -0,0 +1,220 @@
+import csv
+import datetime as dt
+import gzip
+import io
+import json
+import re
+import sys
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django_scopes import scopes_disabled
+
+from .cache import SUBMISSIONS_VERSION, bump_version
+from .models import PublicVote
+from .progress import recount_progress
+from .results import update_results
+from .snapshots import get_votable_submissions
+from .votes import UPSERT, flush_votes, is_buffering
+
+# Votes are exported and imported with the columns of the CSV exporter, as
+# newline-delimited JSON or CSV, one vote per line. Both directions stream,
+# so that memory use does not grow with the number of votes.
+FIELDS = ("code", "voter", "timestamp", "score")
+FORMATS = ("ndjson", "csv")
+EXPORT_CHUNK_SIZE = 10_000
+IMPORT_BATCH_SIZE = 10_000
+MAX_REPORTED_ERRORS = 20
+VOTER_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def get_format(path, file_format=None):
+    if file_format:
+        return file_format
+    return "csv" if path.removesuffix(".gz").endswith(".csv") else "ndjson"
+
+
+@contextmanager
+def open_votes_file(path, mode, compress=None):
+    """Opens ``path`` for reading (``"r"``) or writing (``"w"``) text, with
+    ``-`` standing for stdin or stdout. Files ending in ``.gz`` are gzipped."""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path == "-":
+        standard = sys.stdin if mode == "r" else sys.stdout
+        if not compress:
+            yield standard
+            return
+        # Closing the gzip stream leaves the standard stream open
+        binary = gzip.GzipFile(fileobj=standard.buffer, mode=f"{mode}b")
+    elif compress:
+        binary = gzip.open(path, f"{mode}b")  # noqa: SIM115 -- closed below
+    else:
+        binary = open(path, f"{mode}b")  # noqa: PTH123, SIM115 -- closed below
+    with io.TextIOWrapper(binary, encoding="utf-8", newline="") as stream:
+        yield stream
+
+
+def export_votes(event, stream, file_format):
+    """Writes all votes of the event to ``stream`` and returns their number.
+    Votes are read from the primary database, as a replica may not have the
+    latest or just flushed votes yet."""
+    if is_buffering():
+        flush_votes()
+    with scopes_disabled():
+        votes = (
+            PublicVote.objects.using(DEFAULT_DB_ALIAS)
+            .filter(event=event)
+            .order_by("pk")
+            .values_list("submission__code", "email_hash", "timestamp", "score")
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        if file_format == "csv":
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+        count = 0
+        for code, voter, timestamp, score in votes:
+            row = (code, voter, timestamp.isoformat(), score)
+            if file_format == "csv":
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(dict(zip(FIELDS, row, strict=True))) + "\n")
+            count += 1
+    return count
+
+
+def read_votes(stream, file_format):
+    """Yields the line number and the record of every vote in ``stream``.
+    Records that are no valid JSON objects are None."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def parse_vote(record, submissions, voting_settings):
+    """Returns a PublicVote for the record, or raises ValueError."""
+    if record is None:
+        raise ValueError("not a JSON object")
+    code = str(record.get("code") or "")
+    if code not in submissions:
+        raise ValueError(f"{code!r} is no submission voters can vote on")
+    voter = str(record.get("voter") or "")
+    if not VOTER_PATTERN.fullmatch(voter):
+        raise ValueError(f"{voter!r} is no hashed email address")
+    try:
+        score = int(record.get("score"))
+    except (TypeError, ValueError):
+        raise ValueError(f"{record.get('score')!r} is no score") from None
+    if not voting_settings.min_score <= score <= voting_settings.max_score:
+        raise ValueError(
+            f"{score} is not between {voting_settings.min_score} and {voting_settings.max_score}"
+        )
+    vote = PublicVote(
+        submission_id=submissions[code],
+        event_id=voting_settings.event_id,
+        email_hash=voter,
+        score=score,
+    )
+    vote.imported_timestamp = None
+    if timestamp := record.get("timestamp"):
+        timestamp = dt.datetime.fromisoformat(str(timestamp))
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=dt.UTC)
+        vote.imported_timestamp = timestamp
+    return vote
+
+
+def restore_timestamps(votes):
+    """Saving always sets the timestamp to now, so imported votes get their
+    original time back in a second step. One prepared statement for all
+    votes is much faster than ``bulk_update``, which builds a CASE
+    expression with one branch per vote."""
+    connection = connections[PublicVote.objects.db]
+    field = PublicVote._meta.get_field("timestamp")
+    quote = connection.ops.quote_name
+    sql = (
+        f"UPDATE {quote(PublicVote._meta.db_table)} "  # noqa: S608 -- constant names
+        f"SET {quote(field.column)} = %s WHERE {quote('id')} = %s"
+    )
+    params = [
+        (field.get_db_prep_value(vote.imported_timestamp, connection), vote.pk)
+        for vote in votes
+        if vote.pk and vote.imported_timestamp
+    ]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def count_existing_votes(event, votes):
+    """Returns how many of the votes, keyed by submission and voter, replace
+    existing votes."""
+    with scopes_disabled():
+        existing = PublicVote.objects.filter(
+            event=event,
+            email_hash__in={email_hash for __, email_hash in votes},
+            submission_id__in={submission_id for submission_id, __ in votes},
+        ).values_list("submission_id", "email_hash")
+        return len(votes.keys() & set(existing))
+
+
+def save_imported_votes(votes):
+    with scopes_disabled(), transaction.atomic():
+        PublicVote.objects.bulk_create(votes, **UPSERT)
+        restore_timestamps(votes)
+
+
+def import_votes(event, records, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """Validates the records from ``read_votes`` and upserts them in batches.
+
+    Returns the number of created, updated and skipped votes, and the
+    reasons for the first skipped votes. Imported votes replace existing
+    votes of the same voters, but are not logged as vote events. A vote
+    that appears in several batches is counted as updated after its first
+    batch, except in a dry run, which writes nothing."""
+    voting_settings = event.public_vote_settings
+    submissions = {code: pk for pk, code, __ in get_votable_submissions(event)}
+    result = {"created": 0, "updated": 0, "skipped": 0, "errors": []}
+    batch = {}
+
+    def save_batch():
+        updated = count_existing_votes(event, batch)
+        if not dry_run:
+            save_imported_votes(list(batch.values()))
+        result["created"] += len(batch) - updated
+        result["updated"] += updated
+        batch.clear()
+
+    if is_buffering() and not dry_run:
+        # Buffered votes are older than the imported ones
+        flush_votes()
+    for line_number, record in records:
+        try:
+            vote = parse_vote(record, submissions, voting_settings)
+        except ValueError as error:
+            result["skipped"] += 1
+            if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                result["errors"].append(f"Line {line_number}: {error}")
+            continue
+        # Upserts must not contain the same vote twice, and the last one wins
+        batch[vote.submission_id, vote.email_hash] = vote
+        if len(batch) >= batch_size:
+            save_batch()
+    if batch:
+        save_batch()
+    if (result["created"] or result["updated"]) and not dry_run:
+        recount_progress(event)
+        update_results(event)
+        # Voters may have new scores on every page
+        bump_version(event, SUBMISSIONS_VERSION)
+    return result
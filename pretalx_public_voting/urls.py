@@ -3,6 +3,17 @@ from django.urls import re_path
 from pretalx.event.models.event import SLUG_REGEX
 
 from . import views
+from .utils import get_plugin_flag
+
+# Under ASGI, the async views keep the voter-facing hot paths off the
+# sync thread pool. Enable them with ``async_views = true`` in the
+# ``[plugin:pretalx_public_voting]`` section of the pretalx config.
+if get_plugin_flag("async_views"):
+    signup_view = views.AsyncSignupView
+    submission_list_view = views.AsyncSubmissionListView
+else:
+    signup_view = views.SignupView
+    submission_list_view = views.SubmissionListView
 
 urlpatterns = [
     re_path(
@@ -10,9 +21,34 @@ urlpatterns = [
         views.PublicVotingSettingsView.as_view(),
         name="settings",
     ),
+    re_path(
+        rf"^orga/event/(?P<event>{SLUG_REGEX})/settings/p/public_voting/metrics/$",
+        views.TimingMetricsView.as_view(),
+        name="metrics",
+    ),
+    re_path(
+        rf"^orga/event/(?P<event>{SLUG_REGEX})/settings/p/public_voting/activity/$",
+        views.VoteActivityView.as_view(),
+        name="activity",
+    ),
+    re_path(
+        rf"^orga/event/(?P<event>{SLUG_REGEX})/settings/p/public_voting/anomalies/$",
+        views.VoteAnomalyView.as_view(),
+        name="anomalies",
+    ),
+    re_path(
+        rf"^orga/event/(?P<event>{SLUG_REGEX})/settings/p/public_voting/profiles/(?P<name>[^/]+)/$",
+        views.ProfileDownloadView.as_view(),
+        name="profile",
+    ),
+    re_path(
+        r"^orga/organiser/(?P<organiser>[^/]+)/p/public_voting/results/$",
+        views.OrganiserResultsView.as_view(),
+        name="organiser.results",
+    ),
     re_path(
         f"^(?P<event>{SLUG_REGEX})/p/voting/signup/$",
-        views.SignupView.as_view(),
+        signup_view.as_view(),
         name="signup",
     ),
     re_path(
@@ -22,7 +58,12 @@ urlpatterns = [
     ),
     re_path(
         f"^(?P<event>{SLUG_REGEX})/p/voting/talks/(?P<signed_user>[^/]+)/$",
-        views.SubmissionListView.as_view(),
+        submission_list_view.as_view(),
         name="talks",
     ),
+    re_path(
+        f"^(?P<event>{SLUG_REGEX})/p/voting/talks/(?P<signed_user>[^/]+)/api/$",
+        views.SubmissionListJSONView.as_view(),
+        name="talks.api",
+    ),
 ]
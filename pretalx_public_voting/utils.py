@@ -1,9 +1,23 @@
+import random
 from contextlib import suppress
 from hashlib import blake2b
 
+from django.conf import settings
 from django.core import signing
 
 
+def get_plugin_setting(name, default=None):
+    plugin_settings = getattr(settings, "PLUGIN_SETTINGS", {})
+    return plugin_settings.get("pretalx_public_voting", {}).get(name, default)
+
+
+def get_plugin_flag(name, default=False):
+    value = get_plugin_setting(name)
+    if value is None:
+        return default
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
 def hash_email(email, event):
     return blake2b(
         email.encode("utf-8"), salt=event.slug.encode("utf-8")[:16], digest_size=16
@@ -19,3 +33,10 @@ def event_unsign(data, event):
     signer = signing.Signer(salt=event.slug)
     with suppress(signing.BadSignature):
         return signer.unsign(data)
+
+
+def shuffle_for_voter(submission_pks, hashed_email):
+    # Every voter gets their own stable order, so that they see the same
+    # submissions on the same page when they come back.
+    random.Random(hashed_email).shuffle(submission_pks)  # noqa: S311
+    return submission_pks
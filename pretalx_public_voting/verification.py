@@ -0,0 +1,113 @@
+import numpy as np
+from django_scopes import scopes_disabled
+
+from .anomalies import Ballots
+from .models import FlaggedVoter, SubmissionResult, VoterProgress
+from .votes import flush_votes, is_buffering
+
+# The voter statistics are updated vote by vote, and the results are counted
+# periodically from them. Recomputing both from all votes at once with NumPy
+# checks that they still agree with the votes.
+
+
+def compute_statistics(ballots, excluded=()):
+    """Returns the number of votes, the score sum and the sum of squared
+    scores of every voter, and the votes, score sum and z-score sum of
+    every submission, leaving out excluded voters."""
+    voter_count = len(ballots.voters)
+    scores = ballots.scores.astype(np.float64)
+    voters = np.stack(
+        (
+            np.bincount(ballots.voter, minlength=voter_count),
+            np.bincount(ballots.voter, weights=scores, minlength=voter_count),
+            np.bincount(ballots.voter, weights=scores**2, minlength=voter_count),
+        ),
+        axis=1,
+    ).astype(np.int64)
+    means, variances = ballots.score_statistics()
+    deviations = np.sqrt(variances)[ballots.voter]
+    z_scores = np.divide(
+        scores - means[ballots.voter],
+        deviations,
+        out=np.zeros_like(scores),
+        where=deviations > 0,
+    )
+    kept = ~np.isin(ballots.voters, np.array(excluded, dtype="S32"))[ballots.voter]
+    submission_count = len(ballots.submissions)
+    submission = ballots.submission[kept]
+    submissions = np.stack(
+        (
+            np.bincount(submission, minlength=submission_count),
+            np.bincount(submission, weights=scores[kept], minlength=submission_count),
+            np.bincount(submission, weights=z_scores[kept], minlength=submission_count),
+        ),
+        axis=1,
+    )
+    return voters, submissions
+
+
+def verify_statistics(event):
+    """Compares the stored voter statistics and results of the event to
+    those computed from all its votes, and returns the differences."""
+    # Buffered votes are already counted in the voter statistics
+    if is_buffering():
+        flush_votes()
+    with scopes_disabled():
+        ballots = Ballots.load(event)
+        excluded = [
+            email_hash.encode()
+            for email_hash in FlaggedVoter.objects.filter(
+                event=event, excluded=True
+            ).values_list("email_hash", flat=True)
+        ]
+        voters, submissions = compute_statistics(ballots, excluded)
+        computed_voters = {
+            email_hash.decode(): tuple(int(value) for value in row)
+            for email_hash, row in zip(ballots.voters, voters, strict=True)
+        }
+        stored_voters = {}
+        for email_hash, *values in VoterProgress.objects.filter(
+            event=event
+        ).values_list("email_hash", "votes", "score_sum", "score_squares"):
+            totals = stored_voters.get(email_hash, (0, 0, 0))
+            stored_voters[email_hash] = tuple(
+                total + value for total, value in zip(totals, values, strict=True)
+            )
+        computed_submissions = {
+            int(submission_id): row
+            for submission_id, row in zip(ballots.submissions, submissions, strict=True)
+            if row[0]
+        }
+        stored_submissions = {
+            submission_id: np.array(values, dtype=np.float64)
+            for submission_id, *values in SubmissionResult.objects.filter(
+                event=event, votes__gt=0
+            ).values_list("submission_id", "votes", "score_sum", "z_score_sum")
+        }
+    voter_differences = [
+        (email_hash, stored_voters.get(email_hash), computed_voters.get(email_hash))
+        for email_hash in sorted(stored_voters.keys() | computed_voters.keys())
+        if stored_voters.get(email_hash, (0, 0, 0))
+        != computed_voters.get(email_hash, (0, 0, 0))
+    ]
+    submission_differences = [
+        (
+            submission_id,
+            stored_submissions.get(submission_id),
+            computed_submissions.get(submission_id),
+        )
+        for submission_id in sorted(
+            stored_submissions.keys() | computed_submissions.keys()
+        )
+        if submission_id not in stored_submissions
+        or submission_id not in computed_submissions
+        or not np.allclose(
+            stored_submissions[submission_id], computed_submissions[submission_id]
+        )
+    ]
+    return {
+        "voters": len(computed_voters),
+        "submissions": len(computed_submissions),
+        "voter_differences": voter_differences,
+        "submission_differences": submission_differences,
+    }
@@ -1,21 +1,52 @@
-import random
+import csv
+import datetime as dt
+import hashlib
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.db.models import Case, ObjectDoesNotExist, OuterRef, Subquery, When
-from django.http import Http404, JsonResponse
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
 from django.utils.timezone import now
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
-from django.views.generic.base import TemplateView
+from django.views.generic.base import TemplateView, View
 from django.views.generic.edit import FormView
 from django.views.generic.list import ListView
 from django_context_decorator import context
+from django_scopes import scopes_disabled
 
+from pretalx.common.templatetags.rich_text import rich_text
 from pretalx.common.views.mixins import PermissionRequired
+from pretalx.event.models import Event
 from pretalx.submission.models import Submission, SubmissionStates
 
+from . import __version__
+from .analytics import get_vote_activity
+from .anomalies import REASONS, analyse_votes
+from .cache import (
+    SETTINGS_VERSION,
+    SUBMISSIONS_VERSION,
+    VOTER_VERSION_TIMEOUT,
+    bump_version,
+    get_or_build,
+    get_versions,
+    voter_requests_key,
+    voter_version_key,
+)
 from .exporters import PublicVotingCSVExporter
 from .forms import (
     PublicVotingFilterForm,
@@ -23,33 +54,147 @@ from .forms import (
     SignupForm,
     VoteForm,
 )
-from .models import PublicVote, PublicVotingSettings
-from .utils import event_unsign
+from .models import FlaggedVoter, PublicVotingSettings, VoteRollup
+from .profiling import (
+    PROFILE_PARAMETER,
+    get_profile_flag,
+    get_profile_path,
+    get_profiles,
+    profile_request,
+)
+from .progress import get_progress, get_voter_progress
+from .query import get_displayed_fields, plan_submission_queryset
+from .results import get_event_results, update_results
+from .routing import get_read_database, mark_recent_vote
+from .search import search_submissions
+from .session import get_voter_session, get_voter_url, set_voter_session
+from .snapshots import (
+    CSRF_PLACEHOLDER,
+    REPLICA_SNAPSHOT_TIMEOUT,
+    SNAPSHOT_TIMEOUT,
+    get_content_version,
+    get_facets,
+    get_intro_html,
+    get_page_key,
+    get_votable_submissions,
+    get_voting_settings,
+)
+from .thumbnails import THUMBNAIL_SIZES, get_srcsets
+from .timing import get_sinks, metrics, span
+from .utils import event_unsign, get_plugin_flag, shuffle_for_voter
+from .votes import asave_votes, get_score_annotation, save_votes
+
+# Fields the voting page needs to render additional cards in the browser
+PROGRESSIVE_FIELDS = (
+    "code",
+    "title",
+    "speakers",
+    "submission_type",
+    "abstract",
+    "description",
+    "image",
+    "image_srcset",
+    "score",
+)
+CARD_TEMPLATE_PREFIX = "__code__"
+# Number of vote request IDs and browser tabs remembered per voter to
+# recognise retries and late requests
+RECENT_VOTE_REQUESTS = 20
 
 
 class PublicVotingRequired:
+    profile_name = None
+
+    def profile_request(self, request):
+        name = self.profile_name or self.__class__.__name__.lower()
+        return profile_request(request, f"{name}.{request.method.lower()}")
+
     def dispatch(self, request, *args, **kwargs):
-        try:
-            start = request.event.public_vote_settings.start
-            end = request.event.public_vote_settings.end
-        except (AttributeError, ObjectDoesNotExist):
-            raise Http404 from None
+        if self.view_is_async:
+            # Already loaded without blocking by AsyncPublicVotingRequired
+            voting_settings = request.event.public_vote_settings
+        else:
+            event = getattr(request, "event", None)
+            voting_settings = event and get_voting_settings(event)
+        if not voting_settings:
+            raise Http404
+        start = voting_settings.start
+        end = voting_settings.end
 
         _now = now()
         start_valid = (not start) or _now > start
         end_valid = (not end) or _now < end
         if not start_valid or not end_valid:
             raise Http404
-        return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            # Async views profile the whole coroutine in their own dispatch
+            return super().dispatch(request, *args, **kwargs)
+        with self.profile_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class AsyncPublicVotingRequired(PublicVotingRequired):
+    async def dispatch(self, request, *args, **kwargs):
+        event = getattr(request, "event", None)
+        if not event:
+            raise Http404
+        # Load the settings without blocking the event loop, so that the
+        # synchronous checks find them on the event.
+        if not await sync_to_async(get_voting_settings)(event):
+            raise Http404
+        with self.profile_request(request):
+            return await super().dispatch(request, *args, **kwargs)
+
+
+class CachedPageMixin:
+    """Serves the page from the cache to anonymous visitors without query
+    parameters, who all get the same page apart from their CSRF token."""
+
+    def is_cacheable(self):
+        request = self.request
+        return (
+            not request.GET
+            and not request.user.is_authenticated
+            and not len(messages.get_messages(request))
+        )
+
+    def render_page(self):
+        context = {**self.get_context_data(), "csrf_token": CSRF_PLACEHOLDER}
+        return self.render_to_response(context).render().content.decode()
+
+    def get_cached_page_response(self):
+        if not self.is_cacheable():
+            return None
+        content = get_or_build(
+            get_page_key(self.request, self.profile_name),
+            self.render_page,
+            SNAPSHOT_TIMEOUT,
+        )
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, get_token(self.request))
+        return HttpResponse(content)
 
 
-class SignupView(PublicVotingRequired, FormView):
+class SignupView(CachedPageMixin, PublicVotingRequired, FormView):
+    profile_name = "signup"
     template_name = "pretalx_public_voting/signup.html"
     form_class = SignupForm
 
     def get_success_url(self):
         return reverse("plugins:pretalx_public_voting:thanks", kwargs=self.kwargs)
 
+    def get_returning_voter_response(self):
+        if signed_user := get_voter_session(self.request):
+            return redirect(get_voter_url(self.request, signed_user))
+        return None
+
+    def get(self, request, *args, **kwargs):
+        return (
+            self.get_returning_voter_response()
+            or self.get_cached_page_response()
+            or super().get(request, *args, **kwargs)
+        )
+
     def get_form_kwargs(self):
         result = super().get_form_kwargs()
         result["event"] = self.request.event
@@ -57,15 +202,21 @@ class SignupView(PublicVotingRequired, FormView):
         return result
 
     def form_valid(self, form):
-        form.send_email()
+        with span("signup.send_email", self.request.event):
+            form.send_email()
         return super().form_valid(form)
 
 
-class ThanksView(PublicVotingRequired, TemplateView):
+class ThanksView(CachedPageMixin, PublicVotingRequired, TemplateView):
+    profile_name = "thanks"
     template_name = "pretalx_public_voting/thanks.html"
 
+    def get(self, request, *args, **kwargs):
+        return self.get_cached_page_response() or super().get(request, *args, **kwargs)
+
 
 class SubmissionListView(PublicVotingRequired, ListView):
+    profile_name = "submission_list"
     model = Submission
     template_name = "pretalx_public_voting/submission_list.html"
     paginate_by = 20
@@ -74,60 +225,186 @@ class SubmissionListView(PublicVotingRequired, ListView):
     @context
     @cached_property
     def hashed_email(self):
-        return event_unsign(self.kwargs["signed_user"], self.request.event)
+        with span("submission_list.unsign", self.request.event):
+            return event_unsign(self.kwargs["signed_user"], self.request.event)
+
+    @cached_property
+    def read_database(self):
+        return get_read_database(self.request)
+
+    @cached_property
+    def facets(self):
+        return get_facets(self.request.event)
 
     @cached_property
     def filter_form(self):
-        limit_tracks = self.request.event.public_vote_settings.limit_tracks.all()
         return PublicVotingFilterForm(
-            data=self.request.GET, event=self.request.event, limit_tracks=limit_tracks
+            data=self.request.GET,
+            event=self.request.event,
+            tracks=self.facets["tracks"],
+            using=self.read_database,
         )
 
-    def get_queryset(self):
+    @cached_property
+    def validators(self):
         if not self.hashed_email:
-            # If the use wasn't valid, there is no point of returning a
-            # QuerySet with the talks
-            return Submission.objects.none()
+            return None
+        event = self.request.event
+        versions = get_versions(
+            event,
+            SUBMISSIONS_VERSION,
+            SETTINGS_VERSION,
+            voter_version_key(self.hashed_email),
+        )
+        if event.updated:
+            versions.append(event.updated.timestamp())
+        etag = hashlib.sha1(  # noqa: S324 -- not used for security
+            "|".join(
+                str(value)
+                for value in (
+                    __version__,
+                    *versions,
+                    get_language(),
+                    self.request.get_full_path(),
+                    self.request.user.pk,
+                )
+            ).encode()
+        ).hexdigest()
+        return quote_etag(etag), int(max(versions))
+
+    def get_not_modified_response(self):
+        if not self.validators:
+            return None
+        etag, last_modified = self.validators
+        return get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
 
-        votes = PublicVote.objects.filter(
-            email_hash=self.hashed_email, submission_id=OuterRef("pk")
-        ).values("score")
+    def remember_voter(self, response):
+        if self.hashed_email:
+            set_voter_session(self.request, response, self.kwargs["signed_user"])
+        return response
 
-        # Idea is from https://stackoverflow.com/questions/4916851/django-get-a-queryset-from-array-of-ids-in-specific-order/37648265#37648265
-        base_qs = self.request.event.submissions.all().filter(
+    def add_validators(self, response):
+        if self.validators and response.status_code in (200, 304):
+            # Content read from a lagging replica may be older than the
+            # current versions, and must not be kept under their ETag
+            if response.status_code == 304 or self.read_database == DEFAULT_DB_ALIAS:
+                etag, last_modified = self.validators
+                response["ETag"] = etag
+                response["Last-Modified"] = http_date(last_modified)
+            # The page is personal, and browsers have to check back every time
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        response = self.get_not_modified_response()
+        if not response:
+            response = super().get(request, *args, **kwargs)
+            with span("submission_list.render", request.event):
+                response.render()
+        return self.remember_voter(self.add_validators(response))
+
+    def get_submission_queryset(self):
+        return self.request.event.submissions.using(self.read_database).filter(
             state=SubmissionStates.SUBMITTED
         )
 
-        # Filter by 'submission_code' query parameter if provided
+    @cached_property
+    def votable_submissions(self):
+        return get_votable_submissions(self.request.event)
+
+    def get_votable_submissions(self):
+        return self.votable_submissions
+
+    def get_score_annotation(self):
+        return get_score_annotation(self.hashed_email, self.request.event)
+
+    @cached_property
+    def filter_tracks(self):
+        if not self.filter_form.is_valid():
+            return set()
+        return {track.pk for track in self.filter_form.cleaned_data.get("track") or ()}
+
+    @cached_property
+    def search_results(self):
+        """The primary keys of the submissions that match the search, or None
+        if the request does not search."""
+        if not (self.filter_form.is_valid() and self.filter_form.cleaned_data["q"]):
+            return None
+        with span("submission_list.search", self.request.event):
+            return search_submissions(
+                self.request.event,
+                self.filter_form.cleaned_data["q"],
+                using=self.read_database,
+            )
+
+    def get_filtered_pks(self):
+        """Returns the primary keys of all votable submissions that match the
+        filters of the request."""
         submission_code = self.request.GET.get("submission_code")
-        if submission_code:
-            base_qs = base_qs.filter(code=submission_code)
+        tracks = self.filter_tracks
+        search_results = self.search_results
+        return [
+            pk
+            for pk, code, track in self.get_votable_submissions()
+            if (not submission_code or code == submission_code)
+            and (not tracks or track in tracks)
+            and (search_results is None or pk in search_results)
+        ]
 
-        # Apply organizer-configured track limits
-        tracks = self.request.event.public_vote_settings.limit_tracks.all()
-        if tracks:
-            base_qs = base_qs.filter(track__in=tracks)
-        submission_types = (
-            self.request.event.public_vote_settings.limit_submission_types.all()
+    def get_voter_order(self):
+        """Returns the primary keys of the filtered submissions, in the order
+        this voter always gets to see them."""
+        with span("submission_list.pks", self.request.event):
+            submission_pks = self.get_filtered_pks()
+        with span("submission_list.shuffle", self.request.event):
+            return shuffle_for_voter(submission_pks, self.hashed_email)
+
+    def get_submissions_queryset(self, submission_pks, fields):
+        return plan_submission_queryset(
+            self.get_submission_queryset()
+            .filter(pk__in=submission_pks)
+            .annotate(score=self.get_score_annotation()),
+            fields,
         )
-        if submission_types:
-            base_qs = base_qs.filter(submission_type__in=submission_types)
 
-        # Apply user-selected filters from filter form
-        if self.filter_form.is_valid():
-            base_qs = self.filter_form.filter_queryset(base_qs)
+    def load_submissions(self, submission_pks, fields):
+        """Loads the given submissions with the voter's scores, and restores
+        their order in Python instead of sorting in the database."""
+        submissions = {
+            submission.pk: submission
+            for submission in self.get_submissions_queryset(submission_pks, fields)
+        }
+        return [submissions[pk] for pk in submission_pks if pk in submissions]
+
+    def get_queryset(self):
+        if not self.hashed_email:
+            # If the use wasn't valid, there is no point of returning any talks
+            return []
+        return self.get_voter_order()
 
-        submission_pks = list(base_qs.values_list("pk", flat=True))
-        random.seed(self.hashed_email)
-        random.shuffle(submission_pks)
-        user_order = Case(
-            *[When(pk=pk, then=pos) for pos, pk in enumerate(submission_pks)]
+    def paginate_queryset(self, queryset, page_size):
+        # Paginate the primary keys, and only load the current page
+        paginator, page, object_list, is_paginated = super().paginate_queryset(
+            queryset, page_size
+        )
+        page.object_list = self.load_submissions(
+            object_list, self.get_displayed_fields()
         )
+        return paginator, page, page.object_list, is_paginated
 
-        return (
-            base_qs.annotate(score=Subquery(votes))
-            .prefetch_related("speakers", "submission_type", "track")
-            .order_by(user_order)
+    @cached_property
+    def show_submission_types(self):
+        return self.facets["submission_types"] > 1
+
+    def get_displayed_fields(self):
+        if self.request.method == "POST":
+            # Saving votes only needs to match submission codes
+            return {"code"}
+        return get_displayed_fields(
+            self.request.event.public_vote_settings,
+            show_submission_types=self.show_submission_types,
         )
 
     def get_form_for_submission(self, submission):
@@ -147,49 +424,415 @@ class SubmissionListView(PublicVotingRequired, ListView):
             prefix=submission.code,
         )
 
-    def get_context_data(self, **kwargs):
-        result = super().get_context_data(**kwargs)
-        submission_code = self.request.GET.get("submission_code")
+    def prepare_cards(self, submissions):
+        with span("submission_list.forms", self.request.event):
+            for submission in submissions:
+                submission.vote_form = self.get_form_for_submission(submission)
+        if self.request.event.public_vote_settings.show_session_image:
+            srcsets = get_srcsets(submissions)
+            for submission in submissions:
+                submission.image_srcset = srcsets.get(submission.pk)
 
-        # Provide filter form to template
-        result["filter_form"] = self.filter_form
+    def get_filter_context(self):
+        submission_code = self.request.GET.get("submission_code")
+        result = {"filter_form": self.filter_form}
 
         # Check if any filters are active
-        if submission_code or (
-            self.filter_form.is_valid() and self.filter_form.cleaned_data.get("track")
-        ):
+        if submission_code or self.filter_tracks or self.search_results is not None:
             result["filter_active"] = True
             result["remove_filter_url"] = self.request.path
         else:
             result["filter_active"] = False
+        return result
+
+    def get_progressive_context(self, page):
+        if not (page and self.request.event.public_vote_settings.progressive_loading):
+            return {"progressive_loading": False}
+        next_url = None
+        if page.has_next():
+            # Continue right after the current page, with the same filters
+            params = self.request.GET.copy()
+            params.pop(self.page_kwarg, None)
+            params["cursor"] = page.end_index()
+            params["fields"] = ",".join(PROGRESSIVE_FIELDS)
+            next_url = (
+                reverse("plugins:pretalx_public_voting:talks.api", kwargs=self.kwargs)
+                + "?"
+                + params.urlencode()
+            )
+        return {
+            "progressive_loading": True,
+            "progressive_next_url": next_url,
+            "card_template_form": VoteForm(
+                event=self.request.event, prefix=CARD_TEMPLATE_PREFIX
+            ),
+        }
 
+    def get_voter_progress_context(self, submissions):
+        if not self.hashed_email:
+            return {}
+        with span("submission_list.progress", self.request.event):
+            progress = get_progress(
+                self.get_votable_submissions(),
+                get_voter_progress(
+                    self.request.event, self.hashed_email, using=self.read_database
+                ),
+                tracks=self.filter_tracks,
+            )
+        if self.request.GET.get("submission_code"):
+            # Only the shared submission is shown
+            progress["filter_total"] = len(submissions)
+            progress["filter_scored"] = sum(
+                submission.score is not None for submission in submissions
+            )
+        elif self.search_results is not None:
+            # Progress is only counted per track, not per search result
+            progress["remaining"] = None
+            return {"voter_progress": progress}
+        progress["remaining"] = progress["filter_total"] - progress["filter_scored"]
+        return {"voter_progress": progress}
+
+    def get_card_context(self):
+        # Cards are cached per submission and locale, see snapshots.py
+        return {
+            "content_version": get_content_version(self.request.event),
+            "card_cache_timeout": (
+                SNAPSHOT_TIMEOUT
+                if self.read_database == DEFAULT_DB_ALIAS
+                else REPLICA_SNAPSHOT_TIMEOUT
+            ),
+            "thumbnail_sizes": THUMBNAIL_SIZES,
+        }
+
+    def get_context_data(self, **kwargs):
+        with span("submission_list.query", self.request.event):
+            result = super().get_context_data(**kwargs)
+        result.update(self.get_filter_context())
+        result.update(self.get_progressive_context(result.get("page_obj")))
+
+        result["voting_intro"] = get_intro_html(self.request.event)
         # Check if we should show submission types
-        result["show_submission_types"] = (
-            self.request.event.submission_types.all().count() > 1
-        )
+        result["show_submission_types"] = self.show_submission_types
+        result.update(self.get_card_context())
+        result.update(self.get_voter_progress_context(result["submissions"]))
 
-        for submission in result["submissions"]:
-            submission.vote_form = self.get_form_for_submission(submission)
+        self.prepare_cards(result["submissions"])
         return result
 
+    def get_vote_request(self):
+        """Returns the request ID, the ID of the browser tab and the sequence
+        number that vote.js sends with every vote, to recognise retries and
+        requests that arrive after a newer one from the same tab. Clocks and
+        counters differ between tabs and devices, so sequence numbers are
+        only compared within a tab. vote.js waits for every request before it
+        sends the next one, as checking here cannot order requests that are
+        in flight at the same time."""
+        request_id = self.request.POST.get("request_id", "")[:64] or None
+        client_id = self.request.POST.get("client_id", "")[:64] or None
+        try:
+            sequence = int(self.request.POST.get("sequence", ""))
+        except ValueError:
+            sequence = None
+        return request_id, client_id, sequence
+
+    def get_skip_reason(self):
+        request_id, client_id, sequence = self.get_vote_request()
+        if not self.hashed_email or (request_id is None and client_id is None):
+            return None
+        seen = self.request.event.cache.get(voter_requests_key(self.hashed_email))
+        if not seen:
+            return None
+        if request_id in seen.get("ids", []):
+            return "repeated"
+        last_sequence = seen.get("sequences", {}).get(client_id)
+        if None not in (sequence, last_sequence) and sequence <= last_sequence:
+            return "outdated"
+        return None
+
+    def get_skipped_response(self):
+        if reason := self.get_skip_reason():
+            return JsonResponse({"skipped": True, "reason": reason})
+        return None
+
+    def remember_vote_request(self):
+        request_id, client_id, sequence = self.get_vote_request()
+        if not self.hashed_email or (request_id is None and client_id is None):
+            return
+        key = voter_requests_key(self.hashed_email)
+        seen = self.request.event.cache.get(key) or {}
+        ids = seen.get("ids", [])
+        sequences = seen.get("sequences", {})
+        if request_id:
+            ids = [*ids, request_id][-RECENT_VOTE_REQUESTS:]
+        if client_id and sequence is not None:
+            sequence = max(sequences.pop(client_id, sequence), sequence)
+            # Dicts keep their order, so the least recently used tabs go first
+            sequences = dict(
+                [*sequences.items(), (client_id, sequence)][-RECENT_VOTE_REQUESTS:]
+            )
+        self.request.event.cache.set(
+            key, {"ids": ids, "sequences": sequences}, VOTER_VERSION_TIMEOUT
+        )
+
+    def get_voted_tracks(self):
+        """Returns the track of every votable submission that the request
+        votes on, by primary key."""
+        codes = {
+            key.split("-", maxsplit=1)[0] for key in self.request.POST if "score" in key
+        }
+        if not (self.hashed_email and codes):
+            return {}
+        return {
+            pk: track
+            for pk, code, track in self.get_votable_submissions()
+            if code in codes
+        }
+
     def post(self, request, *args, **kwargs):
-        submissions = {
-            submission.code: submission for submission in self.get_queryset()
+        if skipped := self.get_skipped_response():
+            return skipped
+        with span("vote.query", request.event):
+            tracks = self.get_voted_tracks()
+            submissions = self.load_submissions(
+                list(tracks), self.get_displayed_fields()
+            )
+        votes = []
+        with span("vote.validate", request.event):
+            for submission in submissions:
+                form = self.get_form_for_submission(submission)
+                if (
+                    form.is_valid()
+                    and form.initial["score"] != form.cleaned_data["score"]
+                ):
+                    votes.append(form.get_vote())
+        if votes:
+            with span("vote.save", request.event):
+                save_votes(votes, event=request.event, tracks=tracks)
+            bump_version(
+                self.request.event,
+                voter_version_key(self.hashed_email),
+                timeout=VOTER_VERSION_TIMEOUT,
+            )
+        if request.POST.get("action") == "manual":
+            messages.success(self.request, _("Thank you for your vote!"))
+            response = redirect(self.request.path)
+        else:
+            response = JsonResponse({})
+        if votes:
+            mark_recent_vote(response)
+        self.remember_vote_request()
+        return response
+
+
+class SubmissionListJSONView(SubmissionListView):
+    """A compact, read-only version of the voter's submission list, for
+    clients that want to fetch submissions incrementally and cache them."""
+
+    http_method_names = ["get", "head", "options"]
+    profile_name = "submission_api"
+    default_limit = 20
+    max_limit = 100
+
+    def get_available_fields(self):
+        voting_settings = self.request.event.public_vote_settings
+        fields = {
+            "code": lambda submission: submission.code,
+            "title": lambda submission: submission.title,
+            "abstract": lambda submission: rich_text(submission.abstract),
+            "submission_type": lambda submission: (
+                str(submission.submission_type.name)
+                if submission.submission_type
+                else None
+            ),
+            "track": lambda submission: (
+                str(submission.track.name) if submission.track else None
+            ),
+            "score": lambda submission: submission.score,
+        }
+        if not voting_settings.anonymize_speakers:
+            fields["speakers"] = lambda submission: submission.display_speaker_names
+        if voting_settings.show_session_description:
+            fields["description"] = lambda submission: (
+                rich_text(submission.description) if submission.description else ""
+            )
+        if voting_settings.show_session_image:
+            fields["image"] = lambda submission: submission.image_url or None
+            fields["image_srcset"] = lambda submission: (
+                self.srcsets.get(submission.pk) or None
+            )
+        return fields
+
+    def get_fields(self):
+        available = self.get_available_fields()
+        requested = [
+            field.strip()
+            for field in self.request.GET.get("fields", "").split(",")
+            if field.strip()
+        ]
+        if not requested:
+            return available
+        return {name: available[name] for name in requested if name in available}
+
+    def get_int_param(self, name, default, maximum=None):
+        try:
+            value = max(int(self.request.GET.get(name, default)), 0)
+        except (TypeError, ValueError):
+            value = default
+        return min(value, maximum) if maximum else value
+
+    def get_page_url(self, cursor):
+        params = self.request.GET.copy()
+        params["cursor"] = cursor
+        return self.request.build_absolute_uri(
+            f"{self.request.path}?{params.urlencode()}"
+        )
+
+    def get_data(self):
+        cursor = self.get_int_param("cursor", 0)
+        limit = self.get_int_param("limit", self.default_limit, self.max_limit) or 1
+        fields = self.get_fields()
+
+        submission_pks = self.get_voter_order()
+        submissions = self.load_submissions(
+            submission_pks[cursor : cursor + limit], fields
+        )
+        self.srcsets = get_srcsets(submissions) if "image_srcset" in fields else {}
+        next_cursor = cursor + limit
+        return {
+            "count": len(submission_pks),
+            "next": (
+                self.get_page_url(next_cursor)
+                if next_cursor < len(submission_pks)
+                else None
+            ),
+            "previous": (self.get_page_url(max(cursor - limit, 0)) if cursor else None),
+            "results": [
+                {name: getter(submission) for name, getter in fields.items()}
+                for submission in submissions
+            ],
+        }
+
+    def get(self, request, *args, **kwargs):
+        if not self.hashed_email:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        response = self.get_not_modified_response() or JsonResponse(self.get_data())
+        return self.add_validators(response)
+
+
+class AsyncSignupView(AsyncPublicVotingRequired, SignupView):
+    async def get(self, request, *args, **kwargs):
+        # Building the page queries the database, and waiting for another
+        # request to build it sleeps, so both stay off the event loop.
+        return (
+            self.get_returning_voter_response()
+            or await sync_to_async(self.get_cached_page_response)()
+            or self.render_to_response(self.get_context_data())
+        )
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        # The mail itself is handed to the mail queue, but rendering and
+        # storing it touches the database, so we keep it off the event loop.
+        with span("signup.send_email", request.event):
+            await sync_to_async(form.send_email)()
+        return HttpResponseRedirect(self.get_success_url())
+
+    async def put(self, *args, **kwargs):
+        return await self.post(*args, **kwargs)
+
+
+class AsyncSubmissionListView(AsyncPublicVotingRequired, SubmissionListView):
+    async def aget_page(self):
+        # The votable submissions and the filter form come from the cache,
+        # or from the database on a cache miss, so they are loaded off the
+        # event loop.
+        submission_pks = await sync_to_async(self.get_voter_order)()
+        paginator = Paginator(submission_pks, self.paginate_by)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        with span("submission_list.query", self.request.event):
+            submissions = {
+                submission.pk: submission
+                async for submission in self.get_submissions_queryset(
+                    page.object_list, self.get_displayed_fields()
+                ).aiterator(chunk_size=self.paginate_by)
+            }
+        page.object_list = [
+            submissions[pk] for pk in page.object_list if pk in submissions
+        ]
+        return paginator, page
+
+    async def get(self, request, *args, **kwargs):
+        response = self.get_not_modified_response() or await self.aget_response()
+        return self.remember_voter(self.add_validators(response))
+
+    async def aget_response(self):
+        paginator = page = None
+        submissions = []
+        if self.hashed_email:
+            paginator, page = await self.aget_page()
+            submissions = page.object_list
+        self.object_list = submissions
+        result = {
+            "view": self,
+            "hashed_email": self.hashed_email,
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": bool(page and page.has_other_pages()),
+            "object_list": submissions,
+            self.context_object_name: submissions,
+            "show_submission_types": bool(page and self.show_submission_types),
         }
-        for key in self.request.POST:
-            if "score" not in key:
-                continue
-            prefix, __ = key.split("-", maxsplit=1)
-            submission = submissions.get(prefix)
-            if not submission:
-                continue
-            form = self.get_form_for_submission(submission)
-            if form.is_valid() and form.initial["score"] != form.cleaned_data["score"]:
-                form.save()
+        result.update(await sync_to_async(self.get_filter_context)())
+        result.update(self.get_progressive_context(page))
+        result.update(self.get_card_context())
+        result["voting_intro"] = await sync_to_async(get_intro_html)(self.request.event)
+        result.update(await sync_to_async(self.get_voter_progress_context)(submissions))
+        await sync_to_async(self.prepare_cards)(submissions)
+        response = self.render_to_response(result)
+        with span("submission_list.render", self.request.event):
+            await sync_to_async(response.render)()
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        if skipped := self.get_skipped_response():
+            return skipped
+        votes = []
+        tracks = await sync_to_async(self.get_voted_tracks)()
+        if tracks:
+            with span("vote.query", request.event):
+                submissions = [
+                    submission
+                    async for submission in self.get_submissions_queryset(
+                        list(tracks), self.get_displayed_fields()
+                    )
+                ]
+            with span("vote.validate", request.event):
+                for submission in submissions:
+                    form = self.get_form_for_submission(submission)
+                    if (
+                        form.is_valid()
+                        and form.initial["score"] != form.cleaned_data["score"]
+                    ):
+                        votes.append(form.get_vote())
+        if votes:
+            with span("vote.save", request.event):
+                await asave_votes(votes, event=request.event, tracks=tracks)
+            bump_version(
+                self.request.event,
+                voter_version_key(self.hashed_email),
+                timeout=VOTER_VERSION_TIMEOUT,
+            )
         if request.POST.get("action") == "manual":
             messages.success(self.request, _("Thank you for your vote!"))
-            return redirect(self.request.path)
-        return JsonResponse({})
+            response = redirect(self.request.path)
+        else:
+            response = JsonResponse({})
+        if votes:
+            mark_recent_vote(response)
+        self.remember_vote_request()
+        return response
 
 
 class PublicVotingSettingsView(PermissionRequired, FormView):
@@ -219,4 +862,182 @@ class PublicVotingSettingsView(PermissionRequired, FormView):
         result["export_url"] = PublicVotingCSVExporter(
             self.request.event
         ).urls.base.full()
+        if get_plugin_flag("profiling"):
+            result["profiling"] = True
+            result["profile_parameter"] = PROFILE_PARAMETER
+            result["profile_flag"] = get_profile_flag(self.request.event)
+            result["profiles"] = get_profiles(self.request.event)
         return result
+
+
+class ProfileDownloadView(PermissionRequired, View):
+    permission_required = "event.update_event"
+
+    def get_object(self):
+        return self.request.event
+
+    def get(self, request, *args, **kwargs):
+        path = get_profile_path(request.event, kwargs["name"])
+        if not get_plugin_flag("profiling") or not path:
+            raise Http404
+        return FileResponse(
+            path.open("rb"),
+            as_attachment=True,
+            filename=path.name,
+            content_type="application/octet-stream",
+        )
+
+
+class TimingMetricsView(PermissionRequired, View):
+    permission_required = "event.update_event"
+
+    def get_object(self):
+        return self.request.event
+
+    def get(self, request, *args, **kwargs):
+        if metrics.observe not in get_sinks():
+            raise Http404
+        return HttpResponse(
+            metrics.render(event=request.event.slug),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class VoteActivityView(PermissionRequired, View):
+    permission_required = "event.update_event"
+    # Minute buckets are only useful, and only cheap, for recent activity
+    minute_window = dt.timedelta(days=1)
+
+    def get_object(self):
+        return self.request.event
+
+    def get(self, request, *args, **kwargs):
+        resolution = request.GET.get("resolution")
+        since = None
+        if resolution == VoteRollup.MINUTE:
+            since = now() - self.minute_window
+        else:
+            resolution = VoteRollup.HOUR
+        return JsonResponse(
+            {
+                "resolution": resolution,
+                "results": [
+                    {**bucket, "bucket": bucket["bucket"].isoformat()}
+                    for bucket in get_vote_activity(
+                        request.event, resolution=resolution, since=since
+                    )
+                ],
+            }
+        )
+
+
+class VoteAnomalyView(PermissionRequired, TemplateView):
+    permission_required = "event.update_event"
+    template_name = "pretalx_public_voting/anomalies.html"
+
+    def get_object(self):
+        return self.request.event
+
+    @context
+    def voters(self):
+        return [
+            {
+                "email_hash": voter.email_hash,
+                "reasons": [REASONS[reason] for reason in voter.reasons],
+                "excluded": voter.excluded,
+                **voter.details,
+            }
+            for voter in FlaggedVoter.objects.filter(event=self.request.event).order_by(
+                "-excluded", "email_hash"
+            )
+        ]
+
+    def post(self, request, *args, **kwargs):
+        if "analyse" in request.POST:
+            count = analyse_votes(request.event)
+            messages.success(
+                request, _("The analysis flagged {count} voters.").format(count=count)
+            )
+        else:
+            excluded = request.POST.getlist("excluded")
+            voters = FlaggedVoter.objects.filter(event=request.event)
+            voters.filter(email_hash__in=excluded).update(excluded=True)
+            voters.exclude(email_hash__in=excluded).update(excluded=False)
+            update_results(request.event)
+            messages.success(request, _("The voters to exclude have been saved."))
+        return redirect(request.path)
+
+
+@method_decorator(scopes_disabled(), "dispatch")
+class OrganiserResultsView(PermissionRequired, TemplateView):
+    """Compares the results of several events of an organiser. Only reads
+    the counted results, see results.py."""
+
+    permission_required = "event.view_organiser"
+    template_name = "pretalx_public_voting/organiser_results.html"
+
+    def get_permission_object(self):
+        return self.request.organiser
+
+    @context
+    @cached_property
+    def events(self):
+        events = Event.objects.filter(
+            organiser=self.request.organiser, public_vote_settings__isnull=False
+        ).order_by("-date_from")
+        return [
+            event
+            for event in events
+            if self.request.user.has_perm("event.update_event", event)
+        ]
+
+    @context
+    @cached_property
+    def selected_events(self):
+        slugs = set(self.request.GET.getlist("event"))
+        return [event for event in self.events if not slugs or event.slug in slugs]
+
+    @context
+    @cached_property
+    def results(self):
+        return get_event_results(self.selected_events)
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("format") != "csv":
+            return super().get(request, *args, **kwargs)
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = (
+            f'attachment; filename="{request.organiser.slug}_public_voting.csv"'
+        )
+        writer = csv.writer(response)
+        writer.writerow(
+            (
+                "event",
+                "code",
+                "title",
+                "votes",
+                "mean",
+                "rank",
+                "normalized",
+                "normalized_rank",
+                "voters",
+                "event_votes",
+            )
+        )
+        for result in self.results:
+            writer.writerows(
+                (
+                    result["event"].slug,
+                    submission["code"],
+                    submission["title"],
+                    submission["votes"],
+                    round(submission["mean"], 3),
+                    submission["rank"],
+                    round(submission["normalized"], 3),
+                    submission["normalized_rank"],
+                    result["voters"],
+                    result["votes"],
+                )
+                for submission in result["submissions"]
+            )
+        return response
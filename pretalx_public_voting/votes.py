@@ -0,0 +1,186 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django_scopes import scopes_disabled
+
+from .models import BufferedVote, PublicVote, VoteEvent
+from .progress import lock_progress, record_progress
+from .utils import get_plugin_flag
+
+FLUSH_BATCH_SIZE = 5000
+FLUSH_DELAY = 5
+FLUSH_QUEUED_KEY = "public_voting_vote_buffer_flush_queued"
+UPSERT = {
+    "update_conflicts": True,
+    "unique_fields": ("submission", "email_hash"),
+    "update_fields": ("score", "timestamp"),
+}
+
+
+def is_buffering():
+    """With the ``vote_buffer`` setting, votes are appended to a spool table
+    and written to PublicVote in batches, instead of one upsert per request."""
+    return get_plugin_flag("vote_buffer")
+
+
+def to_buffered(votes):
+    return [
+        BufferedVote(
+            submission_id=vote.submission_id,
+            email_hash=vote.email_hash,
+            score=vote.score,
+        )
+        for vote in votes
+    ]
+
+
+def schedule_flush():
+    from .tasks import flush_vote_buffer  # noqa: PLC0415 -- tasks import this module
+
+    # Flush a few seconds after the first vote of a burst, at most once per
+    # delay, so that bursts end up in few large batches.
+    if cache.add(FLUSH_QUEUED_KEY, True, FLUSH_DELAY):
+        flush_vote_buffer.apply_async(countdown=FLUSH_DELAY, ignore_result=True)
+
+
+def to_events(votes):
+    return [
+        VoteEvent(
+            submission_id=vote.submission_id,
+            email_hash=vote.email_hash,
+            old_score=vote.old_score,
+            new_score=vote.score,
+        )
+        for vote in votes
+    ]
+
+
+def set_old_scores(votes, buffering):
+    """Sets the current score of every vote's voter on its submission as
+    ``old_score`` of the vote, or None for first votes."""
+    keys = {(vote.submission_id, vote.email_hash) for vote in votes}
+    filters = {
+        "submission_id__in": {submission_id for submission_id, __ in keys},
+        "email_hash__in": {email_hash for __, email_hash in keys},
+    }
+    scores = {}
+    with scopes_disabled():
+        # Buffered votes are read first: a flush that commits in between
+        # has already written them to PublicVote when it is read next.
+        if buffering:
+            buffered = (
+                BufferedVote.objects.filter(**filters)
+                .order_by("pk")
+                .values_list("submission_id", "email_hash", "score")
+            )
+            for submission_id, email_hash, score in buffered:
+                scores[submission_id, email_hash] = score
+        for submission_id, email_hash, score in PublicVote.objects.filter(
+            **filters
+        ).values_list("submission_id", "email_hash", "score"):
+            scores.setdefault((submission_id, email_hash), score)
+    for vote in votes:
+        vote.old_score = scores.get((vote.submission_id, vote.email_hash))
+
+
+def save_votes(votes, event=None, tracks=None):
+    """Saves the votes and logs them with the scores they replace. With an
+    ``event``, also counts the voters' progress, with ``tracks`` mapping
+    submissions to their tracks."""
+    buffering = is_buffering()
+    tracks = tracks or {}
+    with transaction.atomic():
+        if event:
+            # Locked before reading the old scores, so that a concurrent
+            # vote of the voter cannot change them until this one is saved
+            progress = lock_progress(event, votes, tracks)
+        set_old_scores(votes, buffering)
+        if buffering:
+            BufferedVote.objects.bulk_create(to_buffered(votes))
+        else:
+            PublicVote.objects.bulk_create(votes, **UPSERT)
+        VoteEvent.objects.bulk_create(to_events(votes))
+        if event:
+            record_progress(progress, votes, tracks)
+    if buffering:
+        schedule_flush()
+
+
+async def asave_votes(votes, event=None, tracks=None):
+    # Transactions are not available in async code yet
+    await sync_to_async(save_votes)(votes, event=event, tracks=tracks)
+
+
+def get_score_annotation(hashed_email, event):
+    """The voter's current score for the submission in the outer query,
+    including buffered votes that have not been flushed yet."""
+    # Filtering by event lets PostgreSQL use the event's partial index, see
+    # indexes.py
+    score = Subquery(
+        PublicVote.objects.filter(
+            event=event, email_hash=hashed_email, submission_id=OuterRef("pk")
+        ).values("score")
+    )
+    if not is_buffering():
+        return score
+    buffered = Subquery(
+        BufferedVote.objects.filter(
+            email_hash=hashed_email, submission_id=OuterRef("pk")
+        )
+        .order_by("-pk")
+        .values("score")[:1]
+    )
+    return Coalesce(buffered, score)
+
+
+def flush_votes(batch_size=FLUSH_BATCH_SIZE):
+    """Writes buffered votes to PublicVote, keeping only the latest vote of
+    every voter per submission. Returns the number of votes written."""
+    flushed = 0
+    with scopes_disabled():
+        while True:
+            with transaction.atomic():
+                # Concurrent flushes wait for the oldest rows instead of
+                # skipping them: a flush that claimed newer rows could write
+                # them first, and be overwritten with older scores.
+                rows = list(
+                    BufferedVote.objects.select_for_update(of=("self",))
+                    .order_by("pk")
+                    .values_list(
+                        "pk",
+                        "submission_id",
+                        "submission__event_id",
+                        "email_hash",
+                        "score",
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                latest = {}
+                # Rows with higher keys replace older votes of the same voter
+                for __, submission_id, event_id, email_hash, score in sorted(rows):
+                    latest[submission_id, email_hash] = event_id, score
+                PublicVote.objects.bulk_create(
+                    [
+                        PublicVote(
+                            submission_id=submission_id,
+                            event_id=event_id,
+                            email_hash=email_hash,
+                            score=score,
+                        )
+                        for (submission_id, email_hash), (
+                            event_id,
+                            score,
+                        ) in latest.items()
+                    ],
+                    **UPSERT,
+                )
+                # Delete by primary key, as rows with lower keys may have been
+                # committed by other transactions while we were flushing.
+                BufferedVote.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            flushed += len(latest)
+            if len(rows) < batch_size:
+                break
+    return flushed
@@ -0,0 +1,68 @@
+import datetime as dt
+import itertools
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from django_scopes import scope, scopes_disabled
+
+from .models import PublicVotingSettings
+from .query import get_displayed_fields, plan_submission_queryset
+from .snapshots import (
+    SNAPSHOT_TIMEOUT,
+    get_content_version,
+    get_facets,
+    get_votable_submissions,
+    get_voting_settings,
+    render_cards,
+)
+
+# Events are warmed up when voting starts within this time
+WARMUP_LEAD = dt.timedelta(minutes=30)
+WARMUP_BATCH_SIZE = 200
+
+
+def get_warmed_key(event):
+    return f"public_voting_warmed_{event.pk}"
+
+
+def warm_up(event):
+    """Builds the snapshots and card fragments that the first voters would
+    otherwise all build at the same time, and returns the number of votable
+    submissions."""
+    voting_settings = get_voting_settings(event)
+    if not voting_settings:
+        return 0
+    votable = get_votable_submissions(event)
+    show_submission_types = get_facets(event)["submission_types"] > 1
+    fields = get_displayed_fields(
+        voting_settings, show_submission_types=show_submission_types
+    )
+    submission_pks = iter(pk for pk, _, _ in votable)
+    while batch := list(itertools.islice(submission_pks, WARMUP_BATCH_SIZE)):
+        submissions = plan_submission_queryset(
+            event.submissions.filter(pk__in=batch), fields
+        )
+        render_cards(event, list(submissions), show_submission_types)
+    cache.set(get_warmed_key(event), get_content_version(event), SNAPSHOT_TIMEOUT)
+    return len(votable)
+
+
+def warm_up_upcoming():
+    """Warms up all events whose voting starts soon, unless they have been
+    warmed up since their submissions or settings last changed."""
+    _now = now()
+    with scopes_disabled():
+        upcoming = list(
+            PublicVotingSettings.objects.filter(
+                start__gt=_now, start__lte=_now + WARMUP_LEAD
+            ).select_related("event")
+        )
+    warmed = []
+    for voting_settings in upcoming:
+        event = voting_settings.event
+        if cache.get(get_warmed_key(event)) == get_content_version(event):
+            continue
+        with scope(event=event):
+            warm_up(event)
+        warmed.append(event)
+    return warmed
@@ -1,7 +1,15 @@
 import datetime as dt
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
 
 import pytest
+from django.conf import settings as django_settings
 from django.core import management
+from django.core.cache import cache
+from django.db import connection
 from django.utils.timezone import now
 from django_scopes import scopes_disabled
 
@@ -9,10 +17,162 @@ from pretalx.event.models import Event, Organiser, Team
 from pretalx.person.models import User
 from pretalx.submission.models import Submission, Track
 
+from pretalx_public_voting.budget import QueryCounter
 from pretalx_public_voting.models import PublicVotingSettings
+from pretalx_public_voting.search import create_search_index
 from pretalx_public_voting.utils import event_sign, hash_email
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Run the (slow) benchmarks marked with @pytest.mark.benchmark.",
+    )
+    parser.addoption(
+        "--benchmark-scale",
+        action="append",
+        default=None,
+        help="Data set sizes to benchmark, see SCALES in test_benchmarks.py. "
+        "Can be given multiple times, defaults to the smallest scale.",
+    )
+    parser.addoption(
+        "--benchmark-output",
+        default=None,
+        help="Write the benchmark results to this JSON file.",
+    )
+    parser.addoption(
+        "--benchmark-baseline",
+        default=None,
+        help="Compare the benchmark results to this JSON file from an earlier run, "
+        "and fail on regressions.",
+    )
+    parser.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown against the baseline (default: 0.25).",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: slow performance measurement")
+    # A second, independent database to test read replica routing with. Its
+    # test database is only created for tests that ask for it.
+    default = django_settings.DATABASES["default"]
+    django_settings.DATABASES.setdefault(
+        "replica",
+        {
+            **default,
+            "TEST": {
+                **default.get("TEST", {}),
+                "NAME": (
+                    None
+                    if "sqlite" in default["ENGINE"]
+                    else f"test_{default['NAME']}_replica"
+                ),
+            },
+        },
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="Benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+class BenchmarkRecorder:
+    """Measures latency, query count and peak memory of a callable, and
+    keeps the results for a machine-readable report."""
+
+    def __init__(self, config):
+        self.results = []
+        self.tolerance = config.getoption("--benchmark-tolerance")
+        self.baseline = {}
+        if baseline := config.getoption("--benchmark-baseline"):
+            with Path(baseline).open() as fp:
+                self.baseline = {
+                    (result["name"], result["scale"]): result
+                    for result in json.load(fp)["results"]
+                }
+
+    def measure(self, name, func, scale="", rounds=5):
+        func()  # Warm up caches and lazy imports
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            func()
+        tracemalloc.start()
+        try:
+            func()
+            __, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result = {
+            "name": name,
+            "scale": scale,
+            "rounds": rounds,
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": len(queries),
+            "peak_memory_kb": round(peak_memory / 1024, 1),
+        }
+        self.results.append(result)
+        self.check_regression(result)
+        return result
+
+    def record(self, name, scale="", **values):
+        self.results.append({"name": name, "scale": scale, **values})
+
+    def check_regression(self, result):
+        baseline = self.baseline.get((result["name"], result["scale"]))
+        if not baseline:
+            return
+        problems = []
+        if result["queries"] > baseline["queries"]:
+            problems.append(f"queries {baseline['queries']} -> {result['queries']}")
+        problems.extend(
+            f"{key} {baseline[key]} -> {result[key]}"
+            for key in ("median_ms", "peak_memory_kb")
+            if result[key] > baseline[key] * (1 + self.tolerance)
+        )
+        if problems:
+            pytest.fail(
+                f"Benchmark {result['name']} [{result['scale']}] regressed: "
+                + ", ".join(problems)
+            )
+
+    def write(self, path):
+        with Path(path).open("w") as fp:
+            json.dump({"results": self.results}, fp, indent=2)
+
+
+@pytest.fixture(scope="session")
+def voting_benchmark(pytestconfig):
+    recorder = BenchmarkRecorder(pytestconfig)
+    yield recorder
+    if output := pytestconfig.getoption("--benchmark-output"):
+        recorder.write(output)
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    # Test databases created without migrations only get the tables of the
+    # models, but not the full-text index that migration 0013 adds.
+    with django_db_blocker.unblock(), connection.schema_editor() as schema_editor:
+        create_search_index(schema_editor)
+
+
 @pytest.fixture(scope="session", autouse=True)
 def collect_static(request):
     management.call_command("collectstatic", "--noinput", "--clear")
@@ -132,3 +292,23 @@ def orga_client(orga_user, client):
 def review_client(review_user, client):
     client.force_login(review_user)
     return client
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def plugin_settings(settings):
+    plugin_settings = {}
+    settings.PLUGIN_SETTINGS = {
+        **getattr(settings, "PLUGIN_SETTINGS", {}),
+        "pretalx_public_voting": plugin_settings,
+    }
+    return plugin_settings
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import reverse
+from django_scopes import scope, scopes_disabled
+
+from pretalx.submission.models import Submission
+
+from pretalx_public_voting.anomalies import analyse_votes
+from pretalx_public_voting.exporters import PublicVotingCSVExporter
+from pretalx_public_voting.models import PublicVote
+from pretalx_public_voting.session import VOTER_COOKIE
+from pretalx_public_voting.utils import event_sign, hash_email
+from pretalx_public_voting.views import AsyncSubmissionListView, SubmissionListView
+
+VOTERS = 50
+SUBMISSIONS = 200
+
+# Data set sizes, as numbers of submissions and of votes
+SCALES = {"1k": (1_000, 100_000), "10k": (10_000, 1_000_000)}
+VOTES_PER_VOTER = 50
+BATCH_SIZE = 10_000
+
+
+def voter_email(index):
+    return f"voter{index}@example.com"
+
+
+def voter_requests(event):
+    factory = RequestFactory()
+    for index in range(VOTERS):
+        request = factory.get("/")
+        request.event = event
+        request.user = AnonymousUser()
+        signed_user = event_sign(hash_email(voter_email(index), event), event)
+        yield request, signed_user
+
+
+def bulk_create(model, objects):
+    # Consume generators in batches, so that memory does not grow with scale
+    objects = iter(objects)
+    with scopes_disabled():
+        while batch := list(itertools.islice(objects, BATCH_SIZE)):
+            model.objects.bulk_create(batch)
+
+
+def create_submissions(event, count):
+    with scopes_disabled():
+        submission_type = event.submission_types.first()
+    bulk_create(
+        Submission,
+        (
+            Submission(
+                event=event,
+                code=f"B{index:06d}",
+                title=f"Submission {index}",
+                abstract="A fairly average abstract. " * 20,
+                description="A much longer description. " * 100,
+                submission_type=submission_type,
+                state="submitted",
+            )
+            for index in range(count)
+        ),
+    )
+    with scopes_disabled():
+        return list(event.submissions.values_list("pk", flat=True))
+
+
+def create_votes(event, submission_pks, count):
+    rng = random.Random(count)
+
+    def generate():
+        for voter in range(count // VOTES_PER_VOTER):
+            email_hash = hash_email(voter_email(voter), event)
+            for submission_pk in rng.sample(submission_pks, VOTES_PER_VOTER):
+                yield PublicVote(
+                    submission_id=submission_pk,
+                    event=event,
+                    email_hash=email_hash,
+                    score=rng.randint(1, 3),
+                )
+
+    bulk_create(PublicVote, generate())
+
+
+@pytest.fixture
+def many_submissions(event, voting_settings):
+    create_submissions(event, SUBMISSIONS)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("scale", tuple(SCALES))
+def test_benchmark_voting_hot_paths(
+    request, scale, client, event, voting_settings, voting_benchmark
+):
+    if scale not in (request.config.getoption("--benchmark-scale") or ["1k"]):
+        pytest.skip(f"Scale {scale} not selected with --benchmark-scale")
+    submission_count, vote_count = SCALES[scale]
+    submission_pks = create_submissions(event, submission_count)
+    create_votes(event, submission_pks, vote_count)
+
+    signed_user = event_sign(hash_email(voter_email(0), event), event)
+    list_url = reverse(
+        "plugins:pretalx_public_voting:talks",
+        kwargs={"event": event.slug, "signed_user": signed_user},
+    )
+    signup_url = reverse(
+        "plugins:pretalx_public_voting:signup", kwargs={"event": event.slug}
+    )
+
+    def get_list():
+        assert client.get(list_url).status_code == 200
+
+    def get_later_page():
+        assert client.get(list_url, {"page": 10}).status_code == 200
+
+    scores = itertools.cycle(("1", "2", "3"))
+    with scopes_disabled():
+        code = Submission.objects.get(pk=submission_pks[0]).code
+
+    def post_vote():
+        response = client.post(list_url, {f"{code}-score": next(scores)})
+        assert response.status_code == 200
+
+    def get_signup():
+        assert client.get(signup_url).status_code == 200
+
+    def post_signup():
+        response = client.post(signup_url, {"email": "new@example.com"})
+        assert response.status_code == 302
+
+    def export():
+        with scopes_disabled():
+            PublicVotingCSVExporter(event).get_data(request=None)
+
+    voting_benchmark.measure("submission_list.get", get_list, scale=scale)
+    voting_benchmark.measure("submission_list.get_page_10", get_later_page, scale=scale)
+    voting_benchmark.measure("submission_list.post", post_vote, scale=scale)
+    voting_benchmark.measure("exporter.csv", export, scale=scale, rounds=1)
+    voting_benchmark.measure(
+        "anomalies.analyse", lambda: analyse_votes(event), scale=scale, rounds=1
+    )
+    # The list page remembers the voter, who would be sent back to it
+    client.cookies.pop(VOTER_COOKIE, None)
+    voting_benchmark.measure("signup.get", get_signup, scale=scale)
+    voting_benchmark.measure("signup.post", post_signup, scale=scale)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_submission_list_sync_vs_async(
+    event, many_submissions, voting_benchmark
+):
+    """Compare list page throughput of concurrent voters for both view flavours.
+
+    The sync views are served from a thread pool, like under WSGI or from
+    the sync_to_async pool under ASGI; the async views share one event loop."""
+    sync_view = SubmissionListView.as_view()
+    async_view = AsyncSubmissionListView.as_view()
+
+    def sync_voter(args):
+        request, signed_user = args
+        try:
+            with scope(event=event):
+                response = sync_view(request, event=event.slug, signed_user=signed_user)
+                assert len(response.context_data["submissions"]) == 20
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(sync_voter, voter_requests(event)))
+    duration = time.perf_counter() - started
+    voting_benchmark.record(
+        "submission_list.concurrent_sync", requests_per_second=VOTERS / duration
+    )
+
+    async def async_voters():
+        with scope(event=event):
+            responses = await asyncio.gather(
+                *(
+                    async_view(request, event=event.slug, signed_user=signed_user)
+                    for request, signed_user in voter_requests(event)
+                )
+            )
+        assert all(len(r.context_data["submissions"]) == 20 for r in responses)
+
+    started = time.perf_counter()
+    asyncio.run(async_voters())
+    duration = time.perf_counter() - started
+    voting_benchmark.record(
+        "submission_list.concurrent_async", requests_per_second=VOTERS / duration
+    )
@@ -1,23 +1,99 @@
 import datetime as dt
+import importlib
+import json
+import re
+import threading
+from io import BytesIO, StringIO
+from urllib.parse import unquote
 
+import numpy as np
 import pytest
-from django.core import mail
-from django.test import RequestFactory
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail, signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import translation
 from django.utils.timezone import now
 from django_scopes import scope, scopes_disabled
 
 from pretalx.event.models import Event
+from pretalx.person.models import User
+from pretalx.submission.models import Submission, Track
 
+from pretalx_public_voting import cache as voting_cache
+from pretalx_public_voting.analytics import update_vote_rollups
+from pretalx_public_voting.anomalies import Ballots, find_suspicious_voters
 from pretalx_public_voting.exporters import PublicVotingCSVExporter
-from pretalx_public_voting.models import PublicVote, PublicVotingSettings
+from pretalx_public_voting.indexes import get_open_event_ids, update_vote_indexes
+from pretalx_public_voting.loadtest import get_voter_plan
+from pretalx_public_voting.models import (
+    BufferedVote,
+    EventResult,
+    FlaggedVoter,
+    PublicVote,
+    PublicVotingSettings,
+    VoteEvent,
+    VoteRollup,
+    VoterProgress,
+)
+from pretalx_public_voting.profiling import get_profile_flag, is_profile_flag, profile
+from pretalx_public_voting.progress import get_voter_progress, recount_progress
+from pretalx_public_voting.query import get_displayed_fields, plan_submission_queryset
+from pretalx_public_voting.results import (
+    get_event_results,
+    update_results,
+    update_stale_results,
+)
+from pretalx_public_voting.routing import RECENT_VOTE_COOKIE
+from pretalx_public_voting.session import VOTER_COOKIE
 from pretalx_public_voting.signals import copy_event_settings, public_voting_settings
+from pretalx_public_voting.snapshots import (
+    CSRF_PLACEHOLDER,
+    get_card_key,
+    get_content_version,
+    get_fragment_cache,
+    get_intro_html,
+    get_voting_settings,
+)
+from pretalx_public_voting.thumbnails import (
+    THUMBNAIL_WIDTHS,
+    generate_missing_thumbnails,
+    get_thumbnail_name,
+)
+from pretalx_public_voting.timing import (
+    NO_SPAN,
+    SpanMetrics,
+    metrics,
+    span,
+    timing_span,
+)
 from pretalx_public_voting.utils import event_sign, event_unsign, hash_email
+from pretalx_public_voting.verification import verify_statistics
+from pretalx_public_voting.views import (
+    AsyncSignupView,
+    AsyncSubmissionListView,
+    SubmissionListView,
+)
+from pretalx_public_voting.votes import flush_votes, save_votes
 
 SETTINGS_URL_NAME = "plugins:pretalx_public_voting:settings"
 SIGNUP_URL_NAME = "plugins:pretalx_public_voting:signup"
 THANKS_URL_NAME = "plugins:pretalx_public_voting:thanks"
 TALKS_URL_NAME = "plugins:pretalx_public_voting:talks"
+TALKS_API_URL_NAME = "plugins:pretalx_public_voting:talks.api"
+METRICS_URL_NAME = "plugins:pretalx_public_voting:metrics"
+PROFILE_URL_NAME = "plugins:pretalx_public_voting:profile"
+ACTIVITY_URL_NAME = "plugins:pretalx_public_voting:activity"
+ANOMALIES_URL_NAME = "plugins:pretalx_public_voting:anomalies"
+RESULTS_URL_NAME = "plugins:pretalx_public_voting:organiser.results"
 
 
 @pytest.mark.django_db
@@ -132,6 +208,60 @@ def test_thanks_page(client, voting_settings):
     assert response.status_code == 200
 
 
+@pytest.mark.django_db
+def test_signup_page_is_cached(client, locmem_cache, event, voting_settings):
+    url = reverse(SIGNUP_URL_NAME, kwargs={"event": event.slug})
+    assert client.get(url).templates
+
+    # Other visitors get the cached page with their own CSRF token
+    visitor = Client(enforce_csrf_checks=True)
+    response = visitor.get(url)
+    assert response.templates == []
+    content = response.content.decode()
+    assert CSRF_PLACEHOLDER not in content
+    # The page is minified, which drops the quotes around attribute values
+    token = re.search(r"csrfmiddlewaretoken\W+type\W+hidden\W+value\W+(\w+)", content)[
+        1
+    ]
+    response = visitor.post(
+        url, {"email": "not an email", "csrfmiddlewaretoken": token}
+    )
+    assert response.status_code == 200
+    assert response.context["form"].errors
+
+    # Query parameters and changes to the event skip the cached page
+    assert client.get(url, {"submission_code": "ABCDEF"}).templates
+    event.name = "Renamed event"
+    event.save()
+    response = client.get(url)
+    assert response.templates
+    assert "Renamed event" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_thanks_page_is_cached(client, locmem_cache, event, voting_settings):
+    url = reverse(THANKS_URL_NAME, kwargs={"event": event.slug})
+    assert client.get(url).templates
+    assert client.get(url).templates == []
+    voting_settings.save()
+    assert client.get(url).templates
+
+
+@pytest.mark.django_db
+def test_voting_intro_is_cached_per_locale(locmem_cache, event, voting_settings):
+    voting_settings.text = {"en": "Vote *now*", "de": "Jetzt *abstimmen*"}
+    voting_settings.save()
+    get_voting_settings(event)
+    with translation.override("de"):
+        assert get_intro_html(event) == "<p>Jetzt <em>abstimmen</em></p>"
+    with translation.override("en"):
+        assert get_intro_html(event) == "<p>Vote <em>now</em></p>"
+        voting_settings.text = "Changed"
+        voting_settings.save()
+        get_voting_settings(event)
+        assert get_intro_html(event) == "<p>Changed</p>"
+
+
 @pytest.mark.django_db
 def test_submission_list_with_valid_link(
     client, voting_settings, submission, signed_email
@@ -285,3 +415,1808 @@ def test_event_sign_unsign_roundtrip(event):
 @pytest.mark.django_db
 def test_event_unsign_invalid(event):
     assert event_unsign("invalid:signature", event) is None
+
+
+def call_view(view_class, event, method="get", data=None, cookies=None, **kwargs):
+    factory = RequestFactory()
+    request = getattr(factory, method)("/", data=data or {})
+    request.COOKIES.update(cookies or {})
+    request.event = event
+    request.user = AnonymousUser()
+    view = view_class.as_view()
+    with scope(event=event):
+        if view_class.view_is_async:
+            return async_to_sync(view)(request, event=event.slug, **kwargs)
+        return view(request, event=event.slug, **kwargs)
+
+
+@pytest.mark.django_db
+def test_async_submission_list_matches_sync_order(event, voting_settings, signed_email):
+    with scopes_disabled():
+        for index in range(5):
+            Submission.objects.create(
+                event=event,
+                title=f"Submission {index}",
+                submission_type=event.submission_types.first(),
+                state="submitted",
+            )
+    sync_response = call_view(SubmissionListView, event, signed_user=signed_email)
+    async_response = call_view(AsyncSubmissionListView, event, signed_user=signed_email)
+    assert async_response.status_code == 200
+    assert [s.code for s in async_response.context_data["submissions"]] == [
+        s.code for s in sync_response.context_data["submissions"]
+    ]
+    assert async_response.context_data["page_obj"].paginator.count == 5
+
+
+@pytest.mark.django_db
+def test_async_submission_list_with_invalid_link(event, voting_settings, submission):
+    response = call_view(AsyncSubmissionListView, event, signed_user="invalid-sig")
+    assert response.status_code == 200
+    assert response.context_data["submissions"] == []
+
+
+@pytest.mark.django_db
+def test_async_submission_list_404_without_settings(event, signed_email):
+    with pytest.raises(Http404):
+        call_view(AsyncSubmissionListView, event, signed_user=signed_email)
+
+
+@pytest.mark.django_db
+def test_async_vote_creates_and_updates(
+    event, voting_settings, submission, signed_email
+):
+    email_hash = hash_email("voter@example.com", event)
+    response = call_view(
+        AsyncSubmissionListView,
+        event,
+        method="post",
+        data={f"{submission.code}-score": "2"},
+        signed_user=signed_email,
+    )
+    assert response.status_code == 200
+    call_view(
+        AsyncSubmissionListView,
+        event,
+        method="post",
+        data={f"{submission.code}-score": "3"},
+        signed_user=signed_email,
+    )
+    with scopes_disabled():
+        vote = PublicVote.objects.get(submission=submission, email_hash=email_hash)
+    assert vote.score == 3
+
+
+@pytest.mark.django_db
+def test_async_vote_ignores_invalid_link(event, voting_settings, submission):
+    call_view(
+        AsyncSubmissionListView,
+        event,
+        method="post",
+        data={f"{submission.code}-score": "2"},
+        signed_user="invalid-sig",
+    )
+    with scopes_disabled():
+        assert not PublicVote.objects.filter(submission=submission).exists()
+
+
+@pytest.mark.django_db
+def test_async_signup_rejects_unlisted_email(event, voting_settings):
+    voting_settings.allowed_emails = "allowed@example.com"
+    voting_settings.save()
+    response = call_view(
+        AsyncSignupView, event, method="post", data={"email": "denied@example.com"}
+    )
+    assert response.status_code == 200
+    assert response.context_data["form"].errors
+    assert len(mail.outbox) == 0
+
+
+@pytest.mark.django_db
+def test_async_signup_page_builds_cache(locmem_cache, event, voting_settings):
+    # The first request builds the cached page, the second one reads it
+    for _ in range(2):
+        response = call_view(AsyncSignupView, event)
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "csrfmiddlewaretoken" in content
+        assert CSRF_PLACEHOLDER not in content
+
+
+@pytest.mark.django_db
+def test_async_signup_sends_email(event, voting_settings):
+    response = call_view(
+        AsyncSignupView, event, method="post", data={"email": "voter@example.com"}
+    )
+    assert response.status_code == 302
+    assert len(mail.outbox) == 1
+
+
+@pytest.mark.django_db
+def test_submission_list_not_modified(
+    client, locmem_cache, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    response = client.get(url)
+    assert response.status_code == 200
+    assert "private" in response["Cache-Control"]
+    etag = response["ETag"]
+
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 304
+    response = client.get(url, headers={"if-modified-since": response["Last-Modified"]})
+    assert response.status_code == 304
+    response = client.get(url, {"page": 1}, headers={"if-none-match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_submission_list_etag_changes_on_vote(
+    client, locmem_cache, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    etag = client.get(url)["ETag"]
+    client.post(url, {f"{submission.code}-score": "2"})
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_submission_list_etag_changes_on_submission_change(
+    client, locmem_cache, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    etag = client.get(url)["ETag"]
+    with scope(event=submission.event):
+        submission.title = "New title"
+        submission.save()
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_submission_list_etag_changes_on_settings_change(
+    client, locmem_cache, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    etag = client.get(url)["ETag"]
+    voting_settings.anonymize_speakers = True
+    voting_settings.save()
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_submission_list_without_cache_is_never_not_modified(
+    client, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    etag = client.get(url)["ETag"]
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_submission_api_pages_with_cursor(client, event, voting_settings, signed_email):
+    with scopes_disabled():
+        for index in range(5):
+            Submission.objects.create(
+                event=event,
+                title=f"Submission {index}",
+                abstract="*important*",
+                submission_type=event.submission_types.first(),
+                state="submitted",
+            )
+    url = reverse(
+        TALKS_API_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    html_response = client.get(
+        reverse(
+            TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+        )
+    )
+    expected_order = [s.code for s in html_response.context["submissions"]]
+
+    data = client.get(url, {"limit": 2}).json()
+    assert data["count"] == 5
+    assert data["previous"] is None
+    codes = [result["code"] for result in data["results"]]
+    assert "<em>important</em>" in data["results"][0]["abstract"]
+    assert data["results"][0]["score"] is None
+    while data["next"]:
+        data = client.get(data["next"]).json()
+        codes += [result["code"] for result in data["results"]]
+    assert codes == expected_order
+
+
+@pytest.mark.django_db
+def test_submission_api_field_selection(
+    client, voting_settings, submission, signed_email
+):
+    event = voting_settings.event
+    voting_settings.anonymize_speakers = True
+    voting_settings.save()
+    with scopes_disabled():
+        PublicVote.objects.create(
+            submission=submission,
+            email_hash=hash_email("voter@example.com", event),
+            score=2,
+        )
+    url = reverse(
+        TALKS_API_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    data = client.get(url, {"fields": "code,score,speakers"}).json()
+    assert data["results"] == [{"code": submission.code, "score": 2}]
+    assert "description" not in client.get(url).json()["results"][0]
+
+
+@pytest.mark.django_db
+def test_submission_api_not_modified(
+    client, locmem_cache, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_API_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    etag = client.get(url)["ETag"]
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_submission_api_invalid_link(client, voting_settings, submission):
+    url = reverse(
+        TALKS_API_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": "invalid-sig"},
+    )
+    assert client.get(url).status_code == 404
+    assert client.post(url).status_code == 405
+
+
+@pytest.mark.django_db
+def test_submission_list_progressive_loading(
+    client, event, voting_settings, signed_email
+):
+    voting_settings.progressive_loading = True
+    voting_settings.save()
+    with scopes_disabled():
+        for index in range(25):
+            Submission.objects.create(
+                event=event,
+                title=f"Submission {index}",
+                submission_type=event.submission_types.first(),
+                state="submitted",
+            )
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.get(url)
+    content = response.content.decode()
+    assert response.context["progressive_loading"] is True
+    next_url = response.context["progressive_next_url"]
+    assert "cursor=20" in next_url
+    assert "submission-card-template" in content
+    assert "data-pretalx-voting-next-url" in content
+
+    data = client.get(next_url).json()
+    assert len(data["results"]) == 5
+    assert data["next"] is None
+    shown = {s.code for s in response.context["submissions"]}
+    assert not shown & {result["code"] for result in data["results"]}
+
+
+@pytest.mark.django_db
+def test_submission_list_without_progressive_loading(
+    client, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    response = client.get(url)
+    assert response.context["progressive_loading"] is False
+    assert "submission-card-template" not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_submission_list_only_loads_displayed_columns(
+    client, voting_settings, submission, signed_email
+):
+    voting_settings.anonymize_speakers = True
+    voting_settings.show_session_image = False
+    voting_settings.save()
+    url = reverse(
+        TALKS_URL_NAME,
+        kwargs={"event": voting_settings.event.slug, "signed_user": signed_email},
+    )
+    response = client.get(url)
+    shown = response.context["submissions"][0]
+    deferred = shown.get_deferred_fields()
+    assert {"description", "image", "notes", "track_id"} <= deferred
+    assert not {"title", "abstract", "code"} & deferred
+    assert "speakers" not in getattr(shown, "_prefetched_objects_cache", {})
+
+
+@pytest.mark.django_db
+def test_displayed_fields_follow_settings(voting_settings):
+    assert get_displayed_fields(voting_settings, show_submission_types=False) == {
+        "code",
+        "title",
+        "abstract",
+        "score",
+        "speakers",
+        "image",
+    }
+    voting_settings.anonymize_speakers = True
+    voting_settings.show_session_description = True
+    assert "speakers" not in get_displayed_fields(voting_settings)
+    assert {"description", "submission_type"} <= get_displayed_fields(voting_settings)
+
+
+@pytest.mark.django_db
+def test_plan_submission_queryset_for_votes(event, submission):
+    with scope(event=event):
+        planned = plan_submission_queryset(event.submissions.all(), {"code"})
+        assert not planned.query.select_related
+        assert not planned._prefetch_related_lookups
+        loaded = planned.get()
+    assert loaded.code == submission.code
+    assert "title" in loaded.get_deferred_fields()
+
+
+def test_timing_disabled_by_default(plugin_settings):
+    assert span("submission_list.query") is NO_SPAN
+    plugin_settings["timing"] = "unknown"
+    assert span("submission_list.query") is NO_SPAN
+
+
+@pytest.mark.django_db
+def test_timing_spans_for_submission_list(
+    client, plugin_settings, event, voting_settings, submission, signed_email
+):
+    plugin_settings["timing"] = "signal"
+    spans = []
+
+    def receiver(sender, name, duration, event, **kwargs):
+        spans.append((name, event))
+        assert duration >= 0
+
+    timing_span.connect(receiver)
+    try:
+        url = reverse(
+            TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+        )
+        client.get(url)
+        client.post(url, {f"{submission.code}-score": "2"})
+    finally:
+        timing_span.disconnect(receiver)
+    assert {name for name, __ in spans} == {
+        "submission_list.unsign",
+        "submission_list.pks",
+        "submission_list.shuffle",
+        "submission_list.query",
+        "submission_list.forms",
+        "submission_list.progress",
+        "submission_list.render",
+        "vote.query",
+        "vote.validate",
+        "vote.save",
+    }
+    assert {span_event for __, span_event in spans} == {event.slug}
+
+
+@pytest.mark.django_db
+def test_timing_log_sink(caplog, plugin_settings, event):
+    plugin_settings["timing"] = "log"
+    with (
+        caplog.at_level("INFO", logger="pretalx_public_voting.timing"),
+        span("signup.send_email", event),
+    ):
+        pass
+    assert "span=signup.send_email duration_ms=" in caplog.text
+    assert f"event={event.slug}" in caplog.text
+
+
+@pytest.mark.django_db
+def test_timing_metrics_endpoint(
+    client, orga_user, plugin_settings, event, voting_settings, signed_email
+):
+    url = reverse(METRICS_URL_NAME, kwargs={"event": event.slug})
+    client.force_login(orga_user)
+    assert client.get(url).status_code == 404
+
+    plugin_settings["timing"] = "metrics"
+    metrics.reset()
+    client.get(
+        reverse(
+            TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+        )
+    )
+    response = client.get(url)
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "# TYPE pretalx_public_voting_span_seconds histogram" in content
+    assert (
+        'pretalx_public_voting_span_seconds_count{span="submission_list.query"} 1'
+        in content
+    )
+    assert 'span="submission_list.render",le="+Inf"} 1' in content
+
+
+@pytest.mark.django_db
+def test_timing_metrics_endpoint_for_reviewer(review_client, plugin_settings, event):
+    plugin_settings["timing"] = "metrics"
+    response = review_client.get(
+        reverse(METRICS_URL_NAME, kwargs={"event": event.slug})
+    )
+    assert response.status_code == 404
+
+
+def test_span_metrics_are_kept_per_event():
+    collected = SpanMetrics(buckets=(0.1, 1))
+    collected.observe("vote.save", 0.05, "one")
+    collected.observe("vote.save", 0.5, "one")
+    collected.observe("vote.save", 5, "two")
+    content = collected.render(event="one")
+    assert (
+        'pretalx_public_voting_span_seconds_bucket{span="vote.save",le="0.1"} 1'
+        in content
+    )
+    assert (
+        'pretalx_public_voting_span_seconds_bucket{span="vote.save",le="1"} 2'
+        in content
+    )
+    assert 'pretalx_public_voting_span_seconds_count{span="vote.save"} 2' in content
+    assert 'count{span="vote.save"} 1' in collected.render(event="two")
+
+
+@pytest.fixture
+def profiling(plugin_settings, tmp_path):
+    plugin_settings["profiling"] = "true"
+    plugin_settings["profiling_dir"] = str(tmp_path)
+    return plugin_settings
+
+
+def profile_names(tmp_path, event):
+    directory = tmp_path / event.slug
+    return sorted(path.name for path in directory.glob("*.prof"))
+
+
+@pytest.mark.django_db
+def test_profiling_with_signed_flag(
+    client, profiling, tmp_path, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    assert client.get(url).status_code == 200
+    assert client.get(url, {"profile": "profile:invalid"}).status_code == 200
+    # Voter links are signed differently and do not profile
+    assert client.get(url, {"profile": event_sign("profile", event)}).status_code == 200
+    assert profile_names(tmp_path, event) == []
+    assert event_unsign(get_profile_flag(event), event) is None
+
+    response = client.get(url, {"profile": get_profile_flag(event)})
+    assert response.status_code == 200
+    names = profile_names(tmp_path, event)
+    assert len(names) == 1
+    assert "-submission_list.get-" in names[0]
+
+
+@pytest.mark.django_db
+def test_profiling_flag_ignored_when_disabled(
+    client, plugin_settings, tmp_path, event, voting_settings, signed_email
+):
+    plugin_settings["profiling_dir"] = str(tmp_path)
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    client.get(url, {"profile": get_profile_flag(event)})
+    assert profile_names(tmp_path, event) == []
+
+
+@pytest.mark.django_db
+def test_profiling_sample_rate_and_rotation(
+    client, profiling, tmp_path, event, voting_settings
+):
+    profiling["profiling_sample_rate"] = 1
+    profiling["profiling_max_files"] = 2
+    url = reverse(SIGNUP_URL_NAME, kwargs={"event": event.slug})
+    for _ in range(3):
+        assert client.get(url).status_code == 200
+    names = profile_names(tmp_path, event)
+    assert len(names) == 2
+    assert all("-signup.get-" in name for name in names)
+
+
+@pytest.mark.django_db
+def test_profiling_async_view(
+    profiling, tmp_path, event, voting_settings, submission, signed_email
+):
+    response = call_view(
+        AsyncSubmissionListView,
+        event,
+        data={"profile": get_profile_flag(event)},
+        signed_user=signed_email,
+    )
+    assert response.status_code == 200
+    names = profile_names(tmp_path, event)
+    assert len(names) == 1
+    assert "-submission_list.get-" in names[0]
+
+
+@pytest.mark.django_db
+def test_profiling_skips_nested_profiles(profiling, tmp_path, event):
+    # Only one profiler can be active at a time, e.g. for concurrent async
+    # requests on the same event loop
+    with profile(event, "outer") as outer, profile(event, "inner") as inner:
+        assert outer is not None
+        assert inner is None
+    (name,) = profile_names(tmp_path, event)
+    assert "-outer-" in name
+    with profile(event, "again") as again:
+        assert again is not None
+
+
+@pytest.mark.django_db
+def test_profiles_listed_and_downloadable(
+    client, orga_user, profiling, tmp_path, event, voting_settings
+):
+    profiling["profiling_sample_rate"] = 1
+    client.get(reverse(SIGNUP_URL_NAME, kwargs={"event": event.slug}))
+    (name,) = profile_names(tmp_path, event)
+
+    client.force_login(orga_user)
+    response = client.get(reverse(SETTINGS_URL_NAME, kwargs={"event": event.slug}))
+    content = response.content.decode()
+    assert name in content
+    flag = re.search(r"profile=([^<\s]+)", content)[1]
+    assert is_profile_flag(unquote(flag), event)
+
+    response = client.get(
+        reverse(PROFILE_URL_NAME, kwargs={"event": event.slug, "name": name})
+    )
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == f'attachment; filename="{name}"'
+    assert b"".join(response.streaming_content)
+
+    response = client.get(
+        reverse(PROFILE_URL_NAME, kwargs={"event": event.slug, "name": "secret.prof"})
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_profile_download_for_reviewer(review_client, profiling, event):
+    response = review_client.get(
+        reverse(
+            PROFILE_URL_NAME,
+            kwargs={
+                "event": event.slug,
+                "name": "20260101T000000-signup.get-00000000.prof",
+            },
+        )
+    )
+    assert response.status_code == 404
+
+
+def image_file(width, height):
+    from PIL import Image  # noqa: PLC0415
+
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color="red").save(buffer, format="PNG")
+    return ContentFile(buffer.getvalue(), name="header.png")
+
+
+@pytest.fixture
+def image_submission(settings, tmp_path, submission, voting_settings):
+    settings.MEDIA_ROOT = tmp_path
+    voting_settings.show_session_image = True
+    voting_settings.save()
+    with scopes_disabled():
+        submission.image.save("header.png", image_file(1200, 600))
+    return submission
+
+
+@pytest.mark.django_db
+def test_submission_list_image_thumbnails(
+    client, event, image_submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    # Thumbnails are never generated while rendering the page
+    content = client.get(url).content.decode()
+    client.get(url)
+    assert "srcset" not in content
+    assert not default_storage.exists(
+        get_thumbnail_name(image_submission.image, THUMBNAIL_WIDTHS[0])
+    )
+
+    assert generate_missing_thumbnails() == 1
+    assert generate_missing_thumbnails() == 0
+    # Generated thumbnails are recorded in the database, not just the cache
+    content = client.get(url).content.decode()
+    for width in THUMBNAIL_WIDTHS:
+        name = get_thumbnail_name(image_submission.image, width)
+        assert default_storage.exists(name)
+        assert f"{default_storage.url(name)} {width}w" in content
+    assert f"{image_submission.image.url} 1200w" in content
+    assert "sizes=" in content
+
+    with default_storage.open(get_thumbnail_name(image_submission.image, 320)) as f:
+        from PIL import Image  # noqa: PLC0415
+
+        thumbnail = Image.open(f)
+        assert thumbnail.format == "WEBP"
+        assert thumbnail.size == (320, 160)
+
+
+@pytest.mark.django_db
+def test_submission_list_small_image_without_thumbnails(
+    client, event, image_submission, signed_email
+):
+    with scopes_disabled():
+        image_submission.image.save("small.png", image_file(200, 100))
+    assert generate_missing_thumbnails() == 1
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    content = client.get(url).content.decode()
+    assert image_submission.image.url in content
+    assert "srcset" not in content
+
+
+@pytest.mark.django_db
+def test_submission_api_image_srcset(
+    client, locmem_cache, event, image_submission, signed_email
+):
+    generate_missing_thumbnails()
+    url = reverse(
+        TALKS_API_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    (result,) = client.get(url, {"fields": "code,image,image_srcset"}).json()["results"]
+    assert result["image"] == image_submission.image.url
+    assert result["image_srcset"].endswith(
+        " 960w, " + image_submission.image.url + " 1200w"
+    )
+
+
+@pytest.fixture
+def replica(plugin_settings):
+    plugin_settings["replica_database"] = "replica"
+    return "replica"
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_submission_list_reads_from_replica(
+    client, replica, event, voting_settings, submission, signed_email
+):
+    # Nothing is replicated in tests, so the replica has no submissions. The
+    # list of votable submissions is always built from the primary.
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.get(url)
+    assert response.status_code == 200
+    assert submission.title not in response.content.decode()
+    assert "No submissions yet" in response.content.decode()
+    # The replica may lag behind the versions the ETag is built from
+    assert "ETag" not in response
+
+    api_url = reverse(
+        TALKS_API_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    data = client.get(api_url).json()
+    assert data["count"] == 1
+    assert data["results"] == []
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_submission_list_reads_own_votes_after_write(
+    client, replica, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.post(url, {f"{submission.code}-score": "2"})
+    assert response.status_code == 200
+    assert response.cookies[RECENT_VOTE_COOKIE]["max-age"] == 30
+    with scopes_disabled():
+        assert PublicVote.objects.using("default").get().score == 2
+        assert not PublicVote.objects.using("replica").exists()
+
+    response = client.get(url)
+    assert submission.title in response.content.decode()
+    assert "ETag" in response
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_async_submission_list_reads_from_replica(
+    replica, event, voting_settings, submission, signed_email
+):
+    response = call_view(AsyncSubmissionListView, event, signed_user=signed_email)
+    assert response.status_code == 200
+    assert list(response.context_data["submissions"]) == []
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_csv_exporter_reads_from_replica(replica, event, voting_settings, submission):
+    PublicVote.objects.create(submission=submission, email_hash="a", score=3)
+    with scopes_disabled():
+        __, data = PublicVotingCSVExporter(event).get_csv_data(request=None)
+    assert data == []
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_csv_exporter_reads_flushed_votes_from_primary(
+    replica, plugin_settings, event, voting_settings, submission
+):
+    plugin_settings["vote_buffer"] = "true"
+    with scopes_disabled():
+        BufferedVote.objects.create(submission=submission, email_hash="a", score=3)
+        __, data = PublicVotingCSVExporter(event).get_csv_data(request=None)
+    assert [row["score"] for row in data] == [3]
+
+
+@pytest.mark.django_db
+def test_submission_list_without_replica_does_not_mark_votes(
+    client, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.post(url, {f"{submission.code}-score": "2"})
+    assert RECENT_VOTE_COOKIE not in response.cookies
+
+
+@pytest.mark.django_db
+def test_vote_buffer_reads_latest_buffered_score(
+    client, plugin_settings, event, voting_settings, submission, signed_email
+):
+    plugin_settings["vote_buffer"] = "true"
+    email_hash = event_unsign(signed_email, event)
+    PublicVote.objects.create(submission=submission, email_hash=email_hash, score=1)
+    BufferedVote.objects.create(submission=submission, email_hash=email_hash, score=2)
+    BufferedVote.objects.create(submission=submission, email_hash=email_hash, score=3)
+
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.get(url)
+    assert [s.score for s in response.context["submissions"]] == [3]
+
+
+@pytest.mark.django_db
+def test_flush_votes_keeps_latest_vote(event, voting_settings, submission):
+    with scopes_disabled():
+        other = Submission.objects.create(
+            event=event, title="Other", submission_type=submission.submission_type
+        )
+    PublicVote.objects.create(submission=submission, email_hash="a", score=1)
+    BufferedVote.objects.bulk_create(
+        [
+            BufferedVote(submission=submission, email_hash="a", score=2),
+            BufferedVote(submission=other, email_hash="a", score=1),
+            BufferedVote(submission=submission, email_hash="b", score=1),
+            BufferedVote(submission=submission, email_hash="a", score=3),
+        ]
+    )
+    assert flush_votes(batch_size=3) == 3 + 1
+    with scopes_disabled():
+        assert not BufferedVote.objects.exists()
+        votes = {
+            (vote.submission_id, vote.email_hash): vote.score
+            for vote in PublicVote.objects.all()
+        }
+    assert votes == {
+        (submission.pk, "a"): 3,
+        (other.pk, "a"): 1,
+        (submission.pk, "b"): 1,
+    }
+
+
+@pytest.mark.django_db
+def test_vote_buffer_flushes_votes(
+    client, plugin_settings, event, voting_settings, submission, signed_email
+):
+    plugin_settings["vote_buffer"] = "true"
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.post(url, {f"{submission.code}-score": "2"})
+    assert response.status_code == 200
+    # Celery runs eagerly in tests, so the flush has already happened
+    with scopes_disabled():
+        assert not BufferedVote.objects.exists()
+        assert PublicVote.objects.get().score == 2
+
+
+@pytest.mark.django_db
+def test_async_vote_buffer(
+    plugin_settings, event, voting_settings, submission, signed_email
+):
+    plugin_settings["vote_buffer"] = "true"
+    response = call_view(
+        AsyncSubmissionListView,
+        event,
+        method="post",
+        data={f"{submission.code}-score": "3"},
+        signed_user=signed_email,
+    )
+    assert response.status_code == 200
+    with scopes_disabled():
+        assert PublicVote.objects.get().score == 3
+
+
+@pytest.mark.django_db
+def test_vote_skips_repeated_and_stale_requests(
+    client, locmem_cache, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    field = f"{submission.code}-score"
+
+    def vote(score, request_id, sequence, client_id="tab"):
+        response = client.post(
+            url,
+            {
+                field: score,
+                "request_id": request_id,
+                "client_id": client_id,
+                "sequence": sequence,
+            },
+        )
+        assert response.status_code == 200
+        with scopes_disabled():
+            return response.json(), PublicVote.objects.get().score
+
+    assert vote("2", "first", 10) == ({}, 2)
+    # A retry of the same request
+    assert vote("3", "first", 10) == ({"skipped": True, "reason": "repeated"}, 2)
+    # An older request from the same tab that arrives late
+    assert vote("1", "older", 5) == ({"skipped": True, "reason": "outdated"}, 2)
+    assert vote("3", "newer", 11) == ({}, 3)
+    # Sequence numbers of other tabs and devices are not comparable
+    assert vote("1", "other", 1, client_id="phone") == ({}, 1)
+
+
+@pytest.mark.django_db
+def test_async_vote_skips_repeated_requests(
+    locmem_cache, event, voting_settings, submission, signed_email
+):
+    def vote(score):
+        return call_view(
+            AsyncSubmissionListView,
+            event,
+            method="post",
+            data={
+                f"{submission.code}-score": score,
+                "request_id": "a",
+                "client_id": "tab",
+                "sequence": 1,
+            },
+            signed_user=signed_email,
+        )
+
+    assert vote("2").status_code == 200
+    assert json.loads(vote("3").content) == {"skipped": True, "reason": "repeated"}
+    with scopes_disabled():
+        assert PublicVote.objects.get().score == 2
+
+
+@pytest.mark.django_db
+def test_vote_without_request_id_is_never_skipped(
+    client, locmem_cache, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    for score in ("2", "3", "2"):
+        client.post(url, {f"{submission.code}-score": score})
+        with scopes_disabled():
+            assert PublicVote.objects.get().score == int(score)
+
+
+@pytest.mark.django_db
+def test_votes_are_logged_as_events(
+    client, plugin_settings, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    client.post(url, {f"{submission.code}-score": "2"})
+    client.post(url, {f"{submission.code}-score": "2"})
+    plugin_settings["vote_buffer"] = "true"
+    client.post(url, {f"{submission.code}-score": "3"})
+    with scopes_disabled():
+        events = list(
+            VoteEvent.objects.order_by("pk").values_list(
+                "submission_id", "email_hash", "old_score", "new_score"
+            )
+        )
+    email_hash = event_unsign(signed_email, event)
+    assert events == [
+        (submission.pk, email_hash, None, 2),
+        (submission.pk, email_hash, 2, 3),
+    ]
+
+
+@pytest.mark.django_db
+def test_vote_rollups(orga_client, event, voting_settings, submission):
+    VoteEvent.objects.bulk_create(
+        [
+            VoteEvent(submission=submission, email_hash="a", new_score=1),
+            VoteEvent(submission=submission, email_hash="a", old_score=1, new_score=3),
+            VoteEvent(submission=submission, email_hash="b", new_score=2),
+        ]
+    )
+    assert update_vote_rollups() == 2
+    # Recounting does not count anything twice
+    assert update_vote_rollups() == 2
+    with scopes_disabled():
+        rollups = {rollup.resolution: rollup for rollup in VoteRollup.objects.all()}
+    assert set(rollups) == {"minute", "hour"}
+    for rollup in rollups.values():
+        assert (rollup.votes, rollup.new_votes, rollup.score_sum) == (3, 2, 6)
+
+    url = reverse(ACTIVITY_URL_NAME, kwargs={"event": event.slug})
+    results = orga_client.get(url, {"resolution": "minute"}).json()["results"]
+    assert len(results) == 1
+    assert results[0]["votes"] == 3
+    assert results[0]["bucket"] == rollups["minute"].bucket.isoformat()
+    response = orga_client.get(url).json()
+    assert response["resolution"] == "hour"
+    assert response["results"][0]["new_votes"] == 2
+
+
+@pytest.mark.django_db
+def test_vote_activity_for_reviewer(review_client, event):
+    response = review_client.get(
+        reverse(ACTIVITY_URL_NAME, kwargs={"event": event.slug})
+    )
+    assert response.status_code == 404
+
+
+def test_find_suspicious_voters():
+    start = dt.datetime(2026, 1, 1, tzinfo=dt.UTC).timestamp()
+    votes = [("normal", 1, 1, start), ("normal", 2, 3, start + 10)]
+    # Same score on ten submissions
+    votes += [("straight", index, 2, start + 3600 * index) for index in range(10)]
+    # Five voters with identical ballots, hours apart
+    votes += [(f"cluster{index}", 11, 3, start + 7200 * index) for index in range(5)]
+    # Twenty voters with different ballots within a minute, days later
+    votes += [
+        (f"burst{index}", submission, index // 12 + 1, start + 864000 + index)
+        for index in range(20)
+        for submission in (index % 12, (index + 1) % 12)
+    ]
+    email_hashes, submissions, scores, timestamps = zip(*votes, strict=True)
+    ballots = Ballots(
+        np.array(email_hashes, dtype="S32"),
+        np.array(submissions),
+        np.array(scores),
+        np.array(timestamps),
+    )
+    assert len(ballots) == len(votes)
+
+    suspicious = find_suspicious_voters(ballots)
+    reasons = {voter: flags["reasons"] for voter, flags in suspicious.items()}
+    assert reasons == {
+        "straight": ["straight_line"],
+        **{f"cluster{index}": ["cluster"] for index in range(5)},
+        **{f"burst{index}": ["burst"] for index in range(20)},
+    }
+    assert suspicious["straight"]["details"] == {
+        "votes": 10,
+        "mean": 2,
+        "variance": 0,
+        "cluster_size": 1,
+        "first_vote": "2026-01-01T00:00:00+00:00",
+    }
+    assert suspicious["cluster0"]["details"]["cluster_size"] == 5
+    empty = np.empty(0)
+    assert find_suspicious_voters(Ballots(empty, empty, empty, empty)) == {}
+
+
+@pytest.mark.django_db
+def test_ballots_first_votes_come_from_the_vote_log(event, voting_settings, submission):
+    started = dt.datetime(2026, 1, 1, tzinfo=dt.UTC)
+    with scopes_disabled():
+        PublicVote.objects.bulk_create(
+            PublicVote(
+                submission=submission, event=event, email_hash=email_hash, score=1
+            )
+            for email_hash in ("logged", "unlogged")
+        )
+        VoteEvent.objects.bulk_create(
+            VoteEvent(submission=submission, email_hash="logged", new_score=score)
+            for score in (2, 1)
+        )
+        VoteEvent.objects.filter(new_score=2).update(timestamp=started)
+        VoteEvent.objects.filter(new_score=1).update(old_score=2)
+        # Changing a vote later does not move the time the voter started
+        PublicVote.objects.update(timestamp=started + dt.timedelta(days=1))
+        ballots = Ballots.load(event)
+    assert list(ballots.voters) == [b"logged", b"unlogged"]
+    assert list(ballots.first_votes()) == [
+        started.timestamp(),
+        (started + dt.timedelta(days=1)).timestamp(),
+    ]
+
+
+@pytest.mark.django_db
+def test_exclude_suspicious_voters(orga_client, event, voting_settings, submission):
+    url = reverse(ANOMALIES_URL_NAME, kwargs={"event": event.slug})
+    email_hashes = [
+        hash_email(f"voter{index}@example.com", event) for index in range(6)
+    ]
+    with scopes_disabled():
+        PublicVote.objects.bulk_create(
+            PublicVote(
+                submission=submission, event=event, email_hash=email_hash, score=3
+            )
+            for email_hash in email_hashes[:5]
+        )
+        PublicVote.objects.create(
+            submission=submission, email_hash=email_hashes[5], score=1
+        )
+
+    response = orga_client.post(url, {"analyse": "1"}, follow=True)
+    assert "flagged 5 voters" in response.content.decode()
+    with scopes_disabled():
+        assert set(FlaggedVoter.objects.values_list("email_hash", flat=True)) == set(
+            email_hashes[:5]
+        )
+
+    orga_client.post(url, {"excluded": email_hashes[:2]})
+    exporter = PublicVotingCSVExporter(event)
+    with scopes_disabled():
+        _, data = exporter.get_csv_data(request=None)
+    assert {row["voter"] for row in data} == set(email_hashes[2:])
+
+    content = orga_client.get(url).content.decode()
+    assert email_hashes[4][:12] in content
+
+    # Another analysis drops voters that are no longer suspicious, but keeps
+    # the excluded ones
+    with scopes_disabled():
+        PublicVote.objects.filter(email_hash=email_hashes[4]).update(score=2)
+        orga_client.post(url, {"analyse": "1"})
+        flagged = dict(FlaggedVoter.objects.values_list("email_hash", "excluded"))
+    assert flagged == {email_hashes[0]: True, email_hashes[1]: True}
+
+
+@pytest.mark.django_db
+def test_suspicious_voters_for_reviewer(review_client, event):
+    url = reverse(ANOMALIES_URL_NAME, kwargs={"event": event.slug})
+    assert review_client.get(url).status_code == 404
+    assert review_client.post(url, {"analyse": "1"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_voter_session_skips_signup(
+    client, event, voting_settings, submission, signed_email
+):
+    signup_url = reverse(SIGNUP_URL_NAME, kwargs={"event": event.slug})
+    talks_url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    assert client.get(signup_url).status_code == 200
+
+    cookie = client.get(talks_url).cookies[VOTER_COOKIE]
+    assert cookie.value == signed_email
+    assert cookie["path"] == f"/{event.slug}/p/voting/"
+    assert cookie["httponly"]
+    assert VOTER_COOKIE not in client.get(talks_url).cookies
+
+    response = client.get(signup_url, {"submission_code": submission.code})
+    assert response.status_code == 302
+    assert response.url == f"{talks_url}?submission_code={submission.code}"
+
+    # Voting on the list keeps the voter, and forgetting them shows the signup
+    client.post(talks_url, {f"{submission.code}-score": "2"})
+    assert client.get(signup_url).status_code == 302
+    client.cookies.pop(VOTER_COOKIE)
+    assert client.get(signup_url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_voter_session_ignores_invalid_links_and_cookies(
+    client, event, voting_settings
+):
+    response = client.get(
+        reverse(TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": "invalid"})
+    )
+    assert VOTER_COOKIE not in response.cookies
+
+    client.cookies[VOTER_COOKIE] = signing.Signer(salt="other-event").sign("voter")
+    response = client.get(reverse(SIGNUP_URL_NAME, kwargs={"event": event.slug}))
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_voter_session(event, voting_settings, signed_email):
+    response = call_view(AsyncSubmissionListView, event, signed_user=signed_email)
+    assert response.cookies[VOTER_COOKIE].value == signed_email
+
+    response = call_view(AsyncSignupView, event, cookies={VOTER_COOKIE: signed_email})
+    assert response.status_code == 302
+    assert signed_email in response.url
+
+
+@pytest.mark.django_db
+def test_submission_list_filter_by_track_with_counts(
+    client, voting_settings, submission, signed_email, track
+):
+    event = voting_settings.event
+    with scopes_disabled():
+        other_track = Track.objects.create(event=event, name="Other track")
+        other = Submission.objects.create(
+            event=event,
+            title="Other Submission",
+            submission_type=submission.submission_type,
+            track=other_track,
+            state="submitted",
+        )
+        submission.track = track
+        submission.save()
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    response = client.get(url, {"track": [other_track.pk]})
+    assert [sub.pk for sub in response.context["submissions"]] == [other.pk]
+    options = response.context["filter_form"]["track"].field.widget.optgroups(
+        "track", []
+    )[0][1]
+    assert {option["label"] for option in options} == {
+        f"{track.name} (1)",
+        "Other track (1)",
+    }
+    assert client.get(url, {"track": ["invalid"]}).status_code == 200
+
+
+def test_get_or_build_single_flight(locmem_cache, monkeypatch):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return "built"
+
+    assert voting_cache.get_or_build("key", build, 60) == "built"
+    assert voting_cache.get_or_build("key", build, 60) == "built"
+    assert len(builds) == 1
+
+    # While another request builds a value, wait for its result
+    locmem_cache.add("other_lock", True)
+    threading.Timer(0.1, locmem_cache.set, ("other", "theirs")).start()
+    assert voting_cache.get_or_build("other", build, 60) == "theirs"
+    assert len(builds) == 1
+
+    # ... but not forever
+    monkeypatch.setattr(voting_cache, "BUILD_WAIT", 0.1)
+    locmem_cache.add("stuck_lock", True)
+    assert voting_cache.get_or_build("stuck", build, 60) == "built"
+    assert len(builds) == 2
+    assert locmem_cache.get("stuck_lock")
+
+
+@pytest.mark.django_db
+def test_warm_up_prebuilds_cards(
+    client, locmem_cache, event, voting_settings, submission, signed_email
+):
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+    with CaptureQueriesContext(connection) as cold:
+        cold_response = client.get(url)
+    locmem_cache.clear()
+
+    call_command("warm_up_public_voting", event=event.slug)
+    for locale in event.locales:
+        key = get_card_key(submission, locale, get_content_version(event), False)
+        assert submission.title in get_fragment_cache().get(key)
+    with CaptureQueriesContext(connection) as warm:
+        warm_response = client.get(url)
+    assert warm_response.context["submissions"] == cold_response.context["submissions"]
+    assert submission.title in warm_response.content.decode()
+    assert len(warm) < len(cold)
+
+    # Changing the settings invalidates all snapshots
+    get_fragment_cache().set(key, "<p>Outdated card</p>")
+    assert "Outdated card" in client.get(url).content.decode()
+    with scopes_disabled():
+        voting_settings.limit_submission_types.add(submission.submission_type)
+    assert "Outdated card" not in client.get(url).content.decode()
+
+    with pytest.raises(CommandError):
+        call_command("warm_up_public_voting", event="missing")
+
+
+@pytest.mark.django_db
+def test_warm_up_upcoming_events(locmem_cache, event, voting_settings, submission):
+    def warm_up_upcoming():
+        out = StringIO()
+        call_command("warm_up_public_voting", stdout=out)
+        return out.getvalue()
+
+    assert warm_up_upcoming() == ""
+    voting_settings.start = now() + dt.timedelta(minutes=10)
+    voting_settings.save()
+    assert warm_up_upcoming() == f"Warmed up {event.slug}.\n"
+    assert warm_up_upcoming() == ""
+    # Changes made after the warm-up get warmed up, too
+    with scopes_disabled():
+        submission.title = "New title"
+        submission.save()
+    assert warm_up_upcoming() == f"Warmed up {event.slug}.\n"
+
+
+@pytest.mark.django_db
+def test_voter_progress(
+    client, event, voting_settings, submission, signed_email, track
+):
+    with scopes_disabled():
+        other_track = Track.objects.create(event=event, name="Other track")
+        other = Submission.objects.create(
+            event=event,
+            title="Other Submission",
+            submission_type=submission.submission_type,
+            track=other_track,
+            state="submitted",
+        )
+        submission.track = track
+        submission.save()
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+
+    def progress(**params):
+        return client.get(url, params).context["voter_progress"]
+
+    assert progress() == {
+        "scored": 0,
+        "total": 2,
+        "filter_scored": 0,
+        "filter_total": 2,
+        "remaining": 2,
+    }
+    client.post(url, {f"{submission.code}-score": "2"})
+    # Changing a score does not count again
+    client.post(url, {f"{submission.code}-score": "3"})
+    assert progress()["scored"] == 1
+    assert progress()["remaining"] == 1
+    assert progress(track=[track.pk])["remaining"] == 0
+    assert progress(track=[other_track.pk])["remaining"] == 1
+    assert progress(submission_code=submission.code)["remaining"] == 0
+    assert progress(submission_code=other.code)["remaining"] == 1
+    content = client.get(url, {"track": [other_track.pk]}).content.decode()
+    assert "remaining in this filter" in content
+
+    # Votes on submissions that are no longer votable do not count
+    with scopes_disabled():
+        submission.state = "withdrawn"
+        submission.save()
+    assert progress()["scored"] == 0
+    assert progress()["total"] == 1
+
+
+@pytest.mark.django_db
+def test_voter_progress_counts_per_voter(event, voting_settings, submission):
+    first, second = (hash_email(email, event) for email in ("a@b.c", "d@e.f"))
+    for email_hash in (first, second):
+        vote = PublicVote(
+            submission=submission, event=event, email_hash=email_hash, score=1
+        )
+        save_votes([vote], event=event, tracks={submission.pk: None})
+    with scopes_disabled():
+        other = Submission.objects.create(
+            event=event,
+            title="Other Submission",
+            submission_type=submission.submission_type,
+            state="submitted",
+        )
+    vote = PublicVote(submission=other, event=event, email_hash=first, score=1)
+    save_votes([vote], event=event, tracks={other.pk: None})
+    assert get_voter_progress(event, first) == {None: 2}
+    assert get_voter_progress(event, second) == {None: 1}
+    with scopes_disabled():
+        assert VoterProgress.objects.count() == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("buffering", (False, True))
+def test_voter_progress_counts_repeated_first_votes_once(
+    monkeypatch, plugin_settings, buffering, event, voting_settings, submission
+):
+    if buffering:
+        plugin_settings["vote_buffer"] = "true"
+        # Keep the votes in the buffer, as if the flush had not run yet
+        monkeypatch.setattr("pretalx_public_voting.votes.schedule_flush", lambda: None)
+    # The same first vote from two tabs, or a retried request, both loaded
+    # the page before either vote was saved
+    for __ in range(2):
+        vote = PublicVote(submission=submission, event=event, email_hash="a", score=2)
+        save_votes([vote], event=event, tracks={submission.pk: None})
+    with scopes_disabled():
+        row = VoterProgress.objects.get()
+        assert (row.votes, row.score_sum, row.score_squares) == (1, 2, 4)
+        assert list(
+            VoteEvent.objects.order_by("pk").values_list("old_score", "new_score")
+        ) == [(None, 2), (2, 2)]
+
+
+@pytest.mark.django_db
+def test_async_voter_progress(event, voting_settings, submission, signed_email):
+    call_view(
+        AsyncSubmissionListView,
+        event,
+        method="post",
+        data={f"{submission.code}-score": "2"},
+        signed_user=signed_email,
+    )
+    response = call_view(AsyncSubmissionListView, event, signed_user=signed_email)
+    assert response.context_data["voter_progress"]["scored"] == 1
+    assert response.context_data["voter_progress"]["remaining"] == 0
+
+
+@pytest.mark.django_db
+def test_voter_progress_migration_counts_existing_votes(event, submission):
+    migration = importlib.import_module(
+        "pretalx_public_voting.migrations.0012_voterprogress"
+    )
+    PublicVote.objects.bulk_create(
+        [
+            PublicVote(submission=submission, event=event, email_hash="a", score=1),
+            PublicVote(submission=submission, event=event, email_hash="b", score=2),
+        ]
+    )
+    with scopes_disabled():
+        migration.count_existing_votes(django_apps, None)
+    assert get_voter_progress(event, "a") == {None: 1}
+    assert get_voter_progress(event, "b") == {None: 1}
+
+
+@pytest.mark.django_db
+def test_submission_search(
+    client, django_capture_on_commit_callbacks, event, voting_settings, signed_email
+):
+    with scopes_disabled():
+        speaker = User.objects.create_user(
+            email="speaker@example.com", password="speakerpassw0rd", name="Ada Speaker"
+        )
+        python, rust, both = (
+            Submission.objects.create(
+                event=event,
+                title=title,
+                abstract=abstract,
+                description="A secret description",
+                submission_type=event.submission_types.first(),
+                state="submitted",
+            )
+            for title, abstract in (
+                ("Python packaging", "Wheels"),
+                ("Rust in production", "Memory safety"),
+                ("Python and Rust", "Extensions, with wheels"),
+            )
+        )
+        rust.speakers.add(speaker)
+    url = reverse(
+        TALKS_URL_NAME, kwargs={"event": event.slug, "signed_user": signed_email}
+    )
+
+    def search(query):
+        response = client.get(url, {"q": query})
+        assert response.context["filter_active"]
+        return {submission.pk for submission in response.context["submissions"]}
+
+    assert search("python") == {python.pk, both.pk}
+    assert search("PYTH") == {python.pk, both.pk}
+    assert search("rust wheel") == {both.pk}
+    assert search("ada") == {rust.pk}
+    # Only texts that voters can see are searchable
+    assert search("secret") == set()
+    with scopes_disabled(), django_capture_on_commit_callbacks(execute=True):
+        voting_settings.show_session_description = True
+        voting_settings.save()
+    assert search("secret") == {python.pk, rust.pk, both.pk}
+    with scopes_disabled(), django_capture_on_commit_callbacks(execute=True):
+        voting_settings.anonymize_speakers = True
+        voting_settings.save()
+    assert search("ada") == set()
+
+    # Changed and withdrawn submissions are updated right away
+    with scopes_disabled():
+        python.title = "Snakes"
+        python.save()
+        both.state = "withdrawn"
+        both.save()
+    assert search("python") == set()
+    assert search("snakes") == {python.pk}
+    assert search("rust") == {rust.pk}
+    with CaptureQueriesContext(connection) as queries:
+        search("snakes")
+    # Searches use the full-text index instead of scanning texts
+    assert any(" MATCH " in query["sql"] for query in queries)
+    assert not [
+        query
+        for query in queries
+        if "LIKE" in query["sql"] and "searchdocument" in query["sql"]
+    ]
+
+    # Searches without any words do not filter
+    assert client.get(url, {"q": "?!"}).context["filter_active"] is False
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("filename", ("votes.ndjson.gz", "votes.csv"))
+def test_export_and_import_votes(
+    tmp_path, filename, event, voting_settings, submission
+):
+    voters = [hash_email(f"voter{index}@example.com", event) for index in range(3)]
+    timestamp = dt.datetime(2024, 5, 1, 12, tzinfo=dt.UTC)
+    with scopes_disabled():
+        PublicVote.objects.bulk_create(
+            PublicVote(
+                submission=submission, event=event, email_hash=voter, score=index + 1
+            )
+            for index, voter in enumerate(voters)
+        )
+        PublicVote.objects.update(timestamp=timestamp)
+    path = str(tmp_path / filename)
+    out = StringIO()
+    call_command("export_public_votes", path, event=event.slug, stdout=out)
+    assert out.getvalue().startswith("Exported 3 votes in ")
+
+    with scopes_disabled():
+        PublicVote.objects.all().delete()
+    out = StringIO()
+    call_command("import_public_votes", path, event=event.slug, stdout=out)
+    assert out.getvalue().startswith(
+        "Imported 3 votes (3 new, 0 replaced) and skipped 0 in "
+    )
+    with scopes_disabled():
+        assert set(
+            PublicVote.objects.values_list(
+                "submission_id", "email_hash", "score", "timestamp"
+            )
+        ) == {
+            (submission.pk, voter, index + 1, timestamp)
+            for index, voter in enumerate(voters)
+        }
+    assert get_voter_progress(event, voters[0]) == {None: 1}
+
+
+@pytest.mark.django_db
+def test_import_votes_validates_and_upserts(
+    tmp_path, event, voting_settings, submission
+):
+    voter = hash_email("voter@example.com", event)
+    with scopes_disabled():
+        PublicVote.objects.create(submission=submission, email_hash=voter, score=1)
+    lines = [
+        {"code": submission.code, "voter": voter, "score": 2},
+        {"code": "UNKNOWN", "voter": voter, "score": 2},
+        {"code": submission.code, "voter": "voter@example.com", "score": 2},
+        {"code": submission.code, "voter": voter, "score": 4},
+        {"code": submission.code, "voter": voter, "score": "high"},
+        {"code": submission.code, "voter": voter, "score": 1, "timestamp": "yesterday"},
+        {"code": submission.code, "voter": voter, "score": 3},
+    ]
+    path = tmp_path / "votes.ndjson"
+    path.write_text(
+        "\n".join(json.dumps(line) for line in lines) + "\nnot json\n\n[1, 2]\n"
+    )
+
+    out, err = StringIO(), StringIO()
+    call_command(
+        "import_public_votes",
+        str(path),
+        event=event.slug,
+        dry_run=True,
+        stdout=out,
+        stderr=err,
+    )
+    assert out.getvalue().startswith(
+        "Validated 1 votes (0 new, 1 replaced) and skipped 7 in "
+    )
+    assert err.getvalue().splitlines() == [
+        "Line 2: 'UNKNOWN' is no submission voters can vote on",
+        "Line 3: 'voter@example.com' is no hashed email address",
+        "Line 4: 4 is not between 1 and 3",
+        "Line 5: 'high' is no score",
+        "Line 6: Invalid isoformat string: 'yesterday'",
+        "Line 8: not a JSON object",
+        "Line 10: not a JSON object",
+    ]
+    with scopes_disabled():
+        assert PublicVote.objects.get().score == 1
+
+    # Later votes of the same voter win, within and across batches
+    for batch_size, expected in (
+        (1, "Imported 2 votes (1 new, 1 replaced)"),
+        (100, "Imported 1 votes (1 new, 0 replaced)"),
+    ):
+        with scopes_disabled():
+            PublicVote.objects.all().delete()
+        out = StringIO()
+        call_command(
+            "import_public_votes",
+            str(path),
+            event=event.slug,
+            batch_size=batch_size,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        with scopes_disabled():
+            assert PublicVote.objects.get().score == 3
+        assert out.getvalue().startswith(f"{expected} and skipped 7 in ")
+
+    with pytest.raises(CommandError):
+        call_command("import_public_votes", str(path), event="missing")
+
+
+@pytest.mark.django_db
+def test_partial_vote_indexes_follow_open_voting(
+    plugin_settings, event, voting_settings, submission
+):
+    with scopes_disabled():
+        vote = PublicVote.objects.create(submission=submission, email_hash="a", score=1)
+    assert vote.event_id == event.pk
+    assert get_open_event_ids() == {event.pk}
+    with scopes_disabled():
+        voting_settings.start = now() + dt.timedelta(minutes=10)
+        voting_settings.save()
+        assert get_open_event_ids() == {event.pk}
+        voting_settings.start = now() + dt.timedelta(days=1)
+        voting_settings.save()
+        assert get_open_event_ids() == set()
+        voting_settings.start = None
+        voting_settings.end = now() - dt.timedelta(minutes=1)
+        voting_settings.save()
+        assert get_open_event_ids() == set()
+        # Voting without an end is open until the event is over
+        voting_settings.end = None
+        voting_settings.save()
+        assert get_open_event_ids() == {event.pk}
+        event.date_from = event.date_to = dt.date.today() - dt.timedelta(days=1)
+        event.save()
+        assert get_open_event_ids() == set()
+    # Partial indexes are only supported on PostgreSQL
+    plugin_settings["partial_vote_indexes"] = "true"
+    assert update_vote_indexes() == (set(), set())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_test(event, voting_settings, submission):
+    codes = [submission.code]
+    with scopes_disabled():
+        plan = get_voter_plan(event, codes, seed=1, voter=0, pages=2, votes=2)
+        assert plan == get_voter_plan(event, codes, seed=1, voter=0, pages=2, votes=2)
+        assert plan != get_voter_plan(event, codes, seed=2, voter=0, pages=2, votes=2)
+    assert [action for action, *__ in plan] == [
+        "signup.get",
+        "signup.post",
+        *(["submission_list.get"] + ["submission_list.post"] * 2) * 2,
+    ]
+
+    out = StringIO()
+    call_command(
+        "load_test_public_voting",
+        event=event.slug,
+        voters=4,
+        concurrency=2,
+        pages=1,
+        votes=2,
+        use_async=True,
+        signup=False,
+        stdout=out,
+    )
+    output = out.getvalue()
+    assert "12 requests in" in output
+    assert "submission_list.get: 4 requests" in output
+    assert "submission_list.post: 8 requests" in output
+    assert "error rate 0.00%" in output
+    # The simulated voters leave no votes behind
+    with scopes_disabled():
+        assert not PublicVote.objects.exists()
+        assert not VoteEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_organiser_results(orga_client, event, voting_settings, submission):
+    today = dt.date.today()
+    with scopes_disabled():
+        second = Submission.objects.create(
+            event=event,
+            title="Second Submission",
+            submission_type=submission.submission_type,
+            state="submitted",
+        )
+        PublicVote.objects.bulk_create(
+            PublicVote(submission=voted, event=event, email_hash=voter, score=score)
+            for voted, voter, score in (
+                (submission, "a", 3),
+                (submission, "b", 3),
+                (second, "a", 1),
+            )
+        )
+        later, hidden = (
+            Event.objects.create(
+                name=slug.title(),
+                slug=slug,
+                email="orga@orga.org",
+                date_from=today + dt.timedelta(days=30),
+                date_to=today + dt.timedelta(days=31),
+                organiser=event.organiser,
+            )
+            for slug in ("later", "hidden")
+        )
+        # The orga user's team has no access to the hidden event
+        event.organiser.teams.get(name="Organisers").limit_events.add(later)
+        for other in (later, hidden):
+            PublicVotingSettings.objects.create(event=other)
+            PublicVote.objects.create(
+                submission=Submission.objects.create(
+                    event=other,
+                    title=f"{other.name} Submission",
+                    submission_type=other.submission_types.first(),
+                    state="submitted",
+                ),
+                email_hash="a",
+                score=2,
+            )
+    recount_progress(event)
+
+    assert {result.slug for result in update_stale_results()} == {
+        "test",
+        "later",
+        "hidden",
+    }
+    assert update_stale_results() == []
+
+    url = reverse(RESULTS_URL_NAME, kwargs={"organiser": event.organiser.slug})
+    with CaptureQueriesContext(connection) as queries:
+        response = orga_client.get(url)
+    # Comparing events only reads the counted results
+    assert not any(
+        "pretalx_public_voting_publicvote" in query["sql"]
+        for query in queries.captured_queries
+    )
+    results = response.context["results"]
+    assert [result["event"].slug for result in results] == ["later", "test"]
+    assert results[1]["voters"] == 2
+    assert results[1]["votes"] == 3
+    assert results[1]["mean"] == pytest.approx(7 / 3)
+    # Voter a scores 3 and 1, so 3 counts as one standard deviation above
+    # their mean. Voter b only ever gave one score, which tells nothing apart.
+    assert [
+        (row["code"], row["votes"], row["mean"], row["rank"], row["normalized"])
+        for row in results[1]["submissions"]
+    ] == [(submission.code, 2, 3, 1, 0.5), (second.code, 1, 1, 2, -1)]
+
+    rows = orga_client.get(url, {"event": "test", "format": "csv"}).content.decode()
+    assert rows.splitlines() == [
+        "event,code,title,votes,mean,rank,normalized,normalized_rank,voters,event_votes",
+        f"test,{submission.code},{submission.title},2,3.0,1,0.5,1,2,3",
+        f"test,{second.code},Second Submission,1,1.0,2,-1.0,2,2,3",
+    ]
+
+    # New votes make the results stale, and excluded voters are left out
+    vote = PublicVote(submission=second, event=event, email_hash="b", score=2)
+    save_votes([vote], event=event)
+    with scopes_disabled():
+        FlaggedVoter.objects.create(event=event, email_hash="a", excluded=True)
+    assert update_stale_results() == [event]
+    result = get_event_results([event])[0]
+    assert (result["voters"], result["votes"]) == (1, 2)
+
+    # Votes count however long ago the results were counted
+    with scopes_disabled():
+        EventResult.objects.update(updated=now() - dt.timedelta(days=2))
+        VoteEvent.objects.all().delete()
+        PublicVote.objects.exclude(event=event).update(
+            timestamp=now() - dt.timedelta(days=3)
+        )
+        PublicVote.objects.filter(event=event).update(
+            timestamp=now() - dt.timedelta(days=1)
+        )
+    assert update_stale_results() == [event]
+
+
+@pytest.mark.django_db
+def test_normalized_results(event, voting_settings, submission):
+    with scopes_disabled():
+        others = [
+            Submission.objects.create(
+                event=event,
+                title=f"Submission {index}",
+                submission_type=submission.submission_type,
+                state="submitted",
+            )
+            for index in range(2)
+        ]
+    # The harsh voter's 1 counts for more than the generous voter's 3
+    for email_hash, scores in (("harsh", (1, 0, 0)), ("generous", (3, 2, 4))):
+        for voted, score in zip([*others, submission], scores, strict=True):
+            vote = PublicVote(
+                submission=voted, event=event, email_hash=email_hash, score=score
+            )
+            save_votes([vote], event=event, tracks={voted.pk: None})
+    # Changing a score updates the voter's statistics
+    vote = PublicVote(
+        submission=submission, event=event, email_hash="generous", score=5
+    )
+    save_votes([vote], event=event, tracks={submission.pk: None})
+    with scopes_disabled():
+        assert VoterProgress.objects.get(email_hash="generous").score_squares == 38
+
+    update_results(event)
+    rows = get_event_results([event])[0]["submissions"]
+    assert [(row["code"], row["rank"], row["normalized_rank"]) for row in rows] == [
+        (submission.code, 1, 2),
+        (others[0].code, 2, 1),
+        (others[1].code, 3, 3),
+    ]
+    harsh, generous = np.std([1, 0, 0]), np.std([3, 2, 5])
+    assert rows[0]["normalized"] == pytest.approx(
+        ((0 - 1 / 3) / harsh + (5 - 10 / 3) / generous) / 2
+    )
+
+    out = StringIO()
+    call_command("verify_public_voting_scores", event=event.slug, stdout=out)
+    assert "0 voters and 0 submissions differ" in out.getvalue()
+
+    # Votes written around the vote writer leave the statistics behind
+    with scopes_disabled():
+        PublicVote.objects.filter(email_hash="harsh", submission=submission).update(
+            score=2
+        )
+    with pytest.raises(CommandError):
+        call_command("verify_public_voting_scores", event=event.slug, stdout=out)
+    out = StringIO()
+    call_command("verify_public_voting_scores", event=event.slug, fix=True, stdout=out)
+    assert "1 voters and 3 submissions differ" in out.getvalue()
+    assert out.getvalue().endswith("0 voters and 0 submissions differ.\n")
+
+
+@pytest.mark.django_db
+def test_verify_scores_flushes_buffered_votes(
+    monkeypatch, plugin_settings, event, voting_settings, submission
+):
+    plugin_settings["vote_buffer"] = "true"
+    # Keep the vote in the buffer, as if the flush had not run yet
+    monkeypatch.setattr("pretalx_public_voting.votes.schedule_flush", lambda: None)
+    vote = PublicVote(submission=submission, event=event, email_hash="a", score=2)
+    save_votes([vote], event=event, tracks={submission.pk: None})
+    with scopes_disabled():
+        assert BufferedVote.objects.exists()
+
+    differences = verify_statistics(event)
+    assert differences["voters"] == 1
+    assert differences["voter_differences"] == []
+    with scopes_disabled():
+        assert not BufferedVote.objects.exists()
+
+
+@pytest.mark.django_db
+def test_organiser_results_for_reviewer(review_client, event, voting_settings):
+    url = reverse(RESULTS_URL_NAME, kwargs={"organiser": event.organiser.slug})
+    assert review_client.get(url).context["events"] == []
@@ -0,0 +1,149 @@
+import pytest
+from django.urls import reverse
+from django_scopes import scopes_disabled
+
+from pretalx.submission.models import Submission, SubmissionType, Track
+
+from pretalx_public_voting.budget import QueryBudgetExceededError, query_budget
+from pretalx_public_voting.exporters import PublicVotingCSVExporter
+from pretalx_public_voting.models import PublicVote
+from pretalx_public_voting.utils import hash_email
+
+# Maximum number of queries per request, at the default page size of 20.
+# They include the queries pretalx itself runs for every request (event,
+# session, permissions), and must not depend on the size of the event.
+QUERY_BUDGETS = {
+    "submission_list.get": 13,
+    "submission_list.post": 16,
+    "signup.get": 6,
+    "signup.post": 9,
+    "settings.get": 19,
+    "settings.post": 18,
+    "exporter.csv": 1,
+}
+
+# Number of submissions, votes per submission, tracks and submission types
+SIZES = {"small": (1, 1, 1, 1), "large": (60, 5, 10, 5)}
+
+
+@pytest.fixture(params=tuple(SIZES))
+def voting_event(request, event, voting_settings, signed_email):
+    submission_count, votes, track_count, type_count = SIZES[request.param]
+    with scopes_disabled():
+        tracks = Track.objects.bulk_create(
+            Track(event=event, name=f"Track {index}") for index in range(track_count)
+        )
+        types = [event.submission_types.first()] + SubmissionType.objects.bulk_create(
+            SubmissionType(event=event, name=f"Type {index}")
+            for index in range(type_count - 1)
+        )
+        submissions = Submission.objects.bulk_create(
+            Submission(
+                event=event,
+                code=f"Q{index:05d}",
+                title=f"Submission {index}",
+                submission_type=types[index % len(types)],
+                track=tracks[index % len(tracks)],
+                state="submitted",
+            )
+            for index in range(submission_count)
+        )
+        PublicVote.objects.bulk_create(
+            PublicVote(
+                submission=submission,
+                event=event,
+                email_hash=hash_email(f"voter{voter}@example.com", event),
+                score=1,
+            )
+            for submission in submissions
+            for voter in range(votes)
+        )
+        voting_settings.limit_tracks.set(tracks)
+        voting_settings.limit_submission_types.set(types)
+    return event, submissions
+
+
+def budget(name):
+    return query_budget(QUERY_BUDGETS[name], label=name)
+
+
+def talks_url(event, signed_email):
+    return reverse(
+        "plugins:pretalx_public_voting:talks",
+        kwargs={"event": event.slug, "signed_user": signed_email},
+    )
+
+
+@pytest.mark.django_db
+def test_query_budget_fails_when_exceeded(event):
+    @query_budget(1, label="Test")
+    def load():
+        list(Submission.objects.all())
+        list(Track.objects.all())
+
+    with (
+        scopes_disabled(),
+        pytest.raises(QueryBudgetExceededError, match="Test ran 2 queries"),
+    ):
+        load()
+
+
+@pytest.mark.django_db
+def test_query_budget_counts_queries(event):
+    with query_budget(1) as counter, scopes_disabled():
+        list(Submission.objects.all())
+    assert len(counter) == 1
+
+
+@pytest.mark.django_db
+def test_submission_list_get_budget(client, voting_event, signed_email):
+    event, _ = voting_event
+    with budget("submission_list.get"):
+        response = client.get(talks_url(event, signed_email))
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_submission_list_post_budget(client, voting_event, signed_email):
+    event, submissions = voting_event
+    data = {f"{submission.code}-score": "2" for submission in submissions[:20]}
+    with budget("submission_list.post"):
+        response = client.post(talks_url(event, signed_email), data)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_signup_budget(client, voting_event):
+    event, _ = voting_event
+    url = reverse("plugins:pretalx_public_voting:signup", kwargs={"event": event.slug})
+    with budget("signup.get"):
+        assert client.get(url).status_code == 200
+    with budget("signup.post"):
+        assert client.post(url, {"email": "voter@example.com"}).status_code == 302
+
+
+@pytest.mark.django_db
+def test_settings_budget(orga_client, voting_event):
+    event, _ = voting_event
+    url = reverse(
+        "plugins:pretalx_public_voting:settings", kwargs={"event": event.slug}
+    )
+    with budget("settings.get"):
+        assert orga_client.get(url).status_code == 200
+    with scopes_disabled():
+        data = {
+            "min_score": 1,
+            "max_score": 3,
+            "limit_tracks": [t.pk for t in event.tracks.all()],
+            "limit_submission_types": [t.pk for t in event.submission_types.all()],
+        }
+    with budget("settings.post"):
+        response = orga_client.post(url, data)
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_exporter_budget(voting_event):
+    event, _ = voting_event
+    with budget("exporter.csv"), scopes_disabled():
+        PublicVotingCSVExporter(event).get_data(request=None)